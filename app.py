@@ -6,6 +6,7 @@
 """
 
 import sys
+import multiprocessing
 import os
 import logging
 import signal
@@ -70,4 +71,6 @@ def main():
         logger.info("Приложение завершено")
 
 if __name__ == "__main__":
+    # Нужен процессам разбора JSON в собранном exe
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
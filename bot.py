@@ -6,6 +6,7 @@
 """
 
 import logging
+import multiprocessing
 from pathlib import Path
 from src.config.settings import Settings
 from src.core.app_manager import AppManager
@@ -53,4 +54,6 @@ def main():
         print(f"❌ Ошибка: {e}")
 
 if __name__ == "__main__":
+    # Нужен процессам разбора JSON в собранном exe
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -343,6 +343,7 @@ a = Analysis(
         'bs4',
         'lxml',
         'openpyxl',
+        'sqlite3',
         'pandas',
         'dotenv',
     ],
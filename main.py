@@ -6,6 +6,7 @@
 """
 
 import sys
+import multiprocessing
 import logging
 from pathlib import Path
 
@@ -40,4 +41,6 @@ def main():
         logging.error(f"Критическая ошибка GUI: {e}")
 
 if __name__ == "__main__":
+    # Нужен процессам разбора JSON в собранном exe
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -5,6 +5,9 @@ class Settings:
     BASE_DIR = Path(__file__).parent.parent.parent
     OUTPUT_DIR = BASE_DIR / "output"
     LOGS_DIR = BASE_DIR / "logs"
+    CACHE_DIR = BASE_DIR / "cache"
+    CHECKPOINT_DIR = BASE_DIR / "checkpoints"
+    DATA_DIR = BASE_DIR / "data"
 
     MAX_PRODUCTS = 50
     MAX_WORKERS = 10
@@ -17,6 +20,105 @@ class Settings:
     OZON_BASE_URL = "https://www.ozon.ru"
     OZON_API_URL = "https://www.ozon.ru/api/composer-api.bx/page/json/v2"
 
+    # Запросы к API через requests с cookies прогретого браузера
+    USE_HTTP_FETCH = True
+    HTTP_FETCH_TIMEOUT = 30
+
+    # Движок парсинга товаров: 'selenium' - воркеры с браузерами, 'async' - asyncio + aiohttp
+    # с cookies одного прогретого драйвера (сотни запросов одновременно в одном процессе)
+    PRODUCT_ENGINE = 'selenium'
+    ASYNC_MAX_CONCURRENCY = 200        # Одновременных запросов к API
+    ASYNC_CONNECTION_LIMIT = 100       # Соединений в пуле aiohttp
+    ASYNC_REWARM_LIMIT = 5             # Сколько раз за запуск заново проходить антибот в браузере
+
+    # Разбор ответов API товаров в отдельных процессах (0 - в потоке воркера); мелкие ответы разбираются на месте
+    JSON_DECODE_PROCESSES = 0
+    JSON_DECODE_MIN_BYTES = 64 * 1024
+
+    # Получение JSON ответов через Chrome DevTools (Network.getResponseBody)
+    USE_NETWORK_INTERCEPTION = True
+    NETWORK_POLL_INTERVAL = 0.1
+
+    # Сбор ссылок категории: 'api' - по страницам composer-api (nextPage), 'scroll' - скролл страницы
+    LINK_COLLECTION_MODE = 'api'
+    # Если все выбранные поля есть в плитках категории, API товаров не запрашивается
+    LISTING_ONLY_RUNS = True
+
+    # Ожидание подгрузки плиток после скролла
+    SCROLL_WAIT_TIMEOUT = 8
+    SCROLL_WAIT_MIN = 2
+    SCROLL_POLL_INTERVAL = 0.25
+    SCROLL_STALL_SECONDS = 15
+
+    # Общий пул прогретых драйверов для всех этапов и пользователей
+    USE_DRIVER_POOL = True
+    DRIVER_POOL_SIZE = 15
+    DRIVER_POOL_MAX_USES = 200
+    DRIVER_POOL_IDLE_TTL = 600
+    DRIVER_POOL_SPARES = 2                # Сколько свободных драйверов держать наготове для замены
+
+    # Оценка здоровья драйвера (EWMA успехов, проверок антибота и времени на элемент)
+    DRIVER_HEALTH_ALPHA = 0.2
+    DRIVER_HEALTH_MIN_SAMPLES = 5         # Не оцениваем драйвер по первым элементам
+    DRIVER_HEALTH_MIN_SCORE = 0.5         # Ниже - драйвер заменяется
+    DRIVER_HEALTH_LATENCY_TARGET = 10.0   # Секунд на элемент без штрафа
+
+    # Общая очередь задач воркеров: сколько раз выдавать неудачный элемент (включая первую попытку)
+    WORK_QUEUE_MAX_ATTEMPTS = 2
+
+    # Потоковый конвейер: товары и продавцы парсятся, пока еще собираются ссылки
+    STREAMING_PIPELINE = True
+    PIPELINE_QUEUE_SIZE = 200
+
+    # Кэш продавцов (SQLite): время жизни групп полей в часах
+    SELLER_CACHE_ENABLED = True
+    SELLER_CACHE_TTL_HOURS = {
+        'legal': 24 * 30,   # название компании, ИНН, дата регистрации
+        'stats': 24,        # заказы, отзывы, рейтинг
+    }
+
+    # Кэш товаров (SQLite): артикулы моложе окна свежести берутся из кэша без браузера
+    PRODUCT_CACHE_ENABLED = True
+    PRODUCT_CACHE_MAX_AGE_MINUTES = 360
+
+    # Журнал запуска для продолжения после падения или перезапуска бота
+    CHECKPOINT_ENABLED = True
+
+    # Товары дописываются в products_*.jsonl по мере готовности, JSON и Excel строятся из этого файла
+    STREAM_RESULTS = True
+
+    # Форматы выгрузки: 'xlsx' (оформленный Excel), 'csv', 'parquet' (нужен pyarrow)
+    EXPORT_FORMATS = ['xlsx']
+
+    # История цен всех полученных товаров (data/price_history.sqlite3)
+    PRICE_HISTORY_ENABLED = True
+
+    # Мониторинг цен: каталог артикулов категории в data/catalogue.sqlite3
+    MONITOR_DISCOVERY_PRODUCTS = 100     # Сколько первых ссылок категории просматривать в поиске новых товаров
+    MONITOR_REMOVED_AFTER_MISSES = 2     # Проверок подряд без ответа, после которых товар считается снятым
+    MONITOR_REPORT_LIMIT = 10            # Сколько изменений цен показывать в сообщении
+
+    # Общий лимит запросов к Ozon для всех воркеров и пользователей (token bucket)
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_RPS = 3.0                  # Начальная частота, запросов в секунду
+    RATE_LIMIT_BURST = 5                  # Сколько запросов можно сделать подряд без ожидания
+    RATE_LIMIT_MIN_RPS = 0.3
+    RATE_LIMIT_MAX_RPS = 12.0
+    RATE_LIMIT_BACKOFF = 0.5              # Множитель частоты при блокировке
+    RATE_LIMIT_STEP = 0.25                # Прибавка частоты после серии успешных запросов
+    RATE_LIMIT_INCREASE_EVERY = 20        # Длина серии успешных запросов
+    RATE_LIMIT_DECREASE_COOLDOWN = 10     # Не чаще одного снижения за столько секунд
+
+    # Повторы по классам ошибок: число повторов, начальная и максимальная задержка (секунды)
+    RETRY_POLICIES = {
+        'timeout': {'max_retries': 2, 'base_delay': 2, 'max_delay': 20},
+        'block': {'max_retries': 2, 'base_delay': 10, 'max_delay': 60},
+        'no_widget_states': {'max_retries': 3, 'base_delay': 0.5, 'max_delay': 5},
+        'driver_crash': {'max_retries': 2, 'base_delay': 3, 'max_delay': 30},
+        'parse_error': {'max_retries': 1, 'base_delay': 1, 'max_delay': 5},
+    }
+    RETRY_JITTER = 0.5                    # Доля задержки, выбираемая случайно
+
 
     LOG_LEVEL = "INFO"
     LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -26,4 +128,7 @@ class Settings:
     
     def ensure_directories(self):
         self.OUTPUT_DIR.mkdir(exist_ok=True)
-        self.LOGS_DIR.mkdir(exist_ok=True)
\ No newline at end of file
+        self.LOGS_DIR.mkdir(exist_ok=True)
+        self.CACHE_DIR.mkdir(exist_ok=True)
+        self.CHECKPOINT_DIR.mkdir(exist_ok=True)
+        self.DATA_DIR.mkdir(exist_ok=True)
\ No newline at end of file
@@ -1,15 +1,30 @@
+import html
 import logging
 import threading
 import asyncio
 import time
+from pathlib import Path
 from typing import Dict, Any, List, Optional
 from ..config.settings import Settings
 from ..parsers.link_parser import OzonLinkParser
-from ..parsers.product_parser import OzonProductParser
+from ..parsers.product_parser import create_product_parser
+from ..parsers.product_decoder import product_decoder
+from ..parsers.product_json import ProductInfo
 from ..parsers.seller_parser import OzonSellerParser
-from ..utils.excel_exporter import ExcelExporter
+from ..utils.seller_cache import get_seller_cache
+from ..utils.price_history import get_price_history
+from ..utils.checkpoint import RunJournal
+from ..utils.result_sink import ResultSink, product_record
+from ..utils.link_index import LinkIndex
+from ..utils.exporters import get_exporter
 from ..telegram.bot_manager import TelegramBotManager
 from ..utils.resource_manager import resource_manager
+from ..utils.driver_pool import driver_pool
+from ..utils.rate_limiter import rate_limiter
+from ..utils.retry_policy import retry_engine
+from .pipeline import StreamingPipeline
+from .price_monitor import MonitorDiff, PriceMonitor
+from .stage_planner import StagePlan, plan_stages
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +40,19 @@ class AppManager:
         self.user_results = {}  # Результаты по пользователям: {user_id: results}
         self.telegram_bot: Optional[TelegramBotManager] = None
     
-    def start_parsing(self, category_url: str, selected_fields: list = None, user_id: str = None) -> bool:
+    def start_parsing(self, category_url: str, selected_fields: list = None, user_id: str = None,
+                      cache_max_age_minutes: float = None, resume_run_id: str = None,
+                      max_products: int = None) -> bool:
+        return self._start_user_task(
+            user_id, self._parsing_task,
+            (category_url, selected_fields, user_id, cache_max_age_minutes, resume_run_id, max_products)
+        )
+    
+    def start_monitoring(self, category_url: str, user_id: str = None) -> bool:
+        """Мониторинг цен категории: запрашиваются известные артикулы и новые с первых страниц"""
+        return self._start_user_task(user_id, self._monitoring_task, (category_url, user_id))
+    
+    def _start_user_task(self, user_id: str, task, args: tuple) -> bool:
         with self.parsing_lock:
             # Проверяем, не парсит ли уже этот пользователь
             if user_id and user_id in self.active_parsing_users:
@@ -45,7 +72,7 @@ class AppManager:
             # Запускаем парсинг в отдельном потоке
             parsing_thread = threading.Thread(
                 target=self._parsing_task_wrapper,
-                args=(category_url, selected_fields, user_id),
+                args=(task, args, user_id),
                 daemon=True
             )
             parsing_thread.start()
@@ -61,10 +88,30 @@ class AppManager:
                     self.is_running = False
             return False
     
-    def _parsing_task_wrapper(self, category_url: str, selected_fields: list = None, user_id: str = None):
+    def resume_parsing(self, user_id: str = None, run_id: str = None) -> bool:
+        """Продолжает прерванный запуск: готовые ссылки, товары и продавцы берутся из журнала"""
+        run_id = run_id or RunJournal.find_unfinished(user_id)
+        if not run_id:
+            logger.warning(f"Нет прерванных запусков для пользователя {user_id}")
+            return False
+        
+        state = RunJournal.load(run_id)
+        if state is None:
+            logger.warning(f"Запуск {run_id} не найден")
+            return False
+        
+        logger.info(
+            f"Продолжение запуска {run_id}: ссылок {len(state.links)}, "
+            f"товаров {len(state.products)}, продавцов {len(state.sellers)} уже готово"
+        )
+        # Лимит товаров берется из журнала, общие настройки не меняются
+        return self.start_parsing(state.category_url, state.selected_fields, user_id, resume_run_id=run_id,
+                                  max_products=state.max_products or None)
+    
+    def _parsing_task_wrapper(self, task, args: tuple, user_id: str = None):
         """Wrapper для парсинга с правильной очисткой ресурсов"""
         try:
-            self._parsing_task(category_url, selected_fields, user_id)
+            task(*args)
         except Exception as e:
             logger.error(f"Ошибка в парсинге для пользователя {user_id}: {e}")
         finally:
@@ -97,82 +144,56 @@ class AppManager:
                 self.stop_event.set()
                 self.is_running = False
     
-    def _parsing_task(self, category_url: str, selected_fields: list = None, user_id: str = None):
-        # Поля, которые требуют парсинга селлера
-        SELLER_FIELDS = {'inn', 'company_name', 'seller_name', 'orders_count', 'reviews_count', 'average_rating', 'working_time'}
-        
-        # Проверяем, нужен ли парсинг селлеров
-        needs_seller_parsing = False
-        if selected_fields:
-            needs_seller_parsing = any(field in SELLER_FIELDS for field in selected_fields)
-        else:
-            # Если поля не указаны, по умолчанию парсим селлеров
-            needs_seller_parsing = True
+    def _parsing_task(self, category_url: str, selected_fields: list = None, user_id: str = None,
+                      cache_max_age_minutes: float = None, resume_run_id: str = None, max_products: int = None):
+        max_products = max_products or self.settings.MAX_PRODUCTS
+        # Минимальный набор этапов для выбранных полей; без выбора выполняются все этапы
+        stage_plan = plan_stages(selected_fields)
+        needs_seller_parsing = stage_plan.sellers
+        logger.info(f"План запуска для полей {selected_fields}: {stage_plan.describe()}")
         
         start_time = time.time()
         
+        # Журнал запуска: результаты дописываются по мере готовности, чтобы прерванный запуск можно было продолжить
+        journal = None
+        if resume_run_id:
+            journal = RunJournal.resume(resume_run_id)
+        elif self.settings.CHECKPOINT_ENABLED:
+            try:
+                journal = RunJournal.create(category_url, selected_fields, user_id, max_products)
+            except OSError as e:
+                logger.warning(f"Не удалось создать журнал запуска: {e}")
+        
         try:
             # Начинаем сессию парсинга для пользователя
             if user_id:
-                resource_manager.start_parsing_session(user_id, 'full_parsing', 0)
-            
-            link_parser = OzonLinkParser(category_url, self.settings.MAX_PRODUCTS, user_id)
-            
-            success, product_links = link_parser.start_parsing()
-            
-            if self.stop_event.is_set():
-                return
-            
-            if not success or not product_links:
-                logger.error("Не удалось собрать ссылки товаров")
-                return
-            
-            if self.stop_event.is_set():
-                return
-            
-            product_parser = OzonProductParser(self.settings.MAX_WORKERS, user_id)
-            product_results = product_parser.parse_products(product_links)
-            
-            # Принудительно закрываем все воркеры продуктов перед началом парсинга продавцов
-            product_parser.cleanup()
-            
-            if self.stop_event.is_set():
-                return
-            
-            seller_results = []
-            
-            if needs_seller_parsing:
-                seller_ids = []
-                total_products = len(product_results)
-                successful_products = len([p for p in product_results if p.success])
-                products_with_seller_id = 0
-                
-                for product in product_results:
-                    if product.success:
-                        if product.seller_id:
-                            seller_ids.append(product.seller_id)
-                            products_with_seller_id += 1
-                        else:
-                            logger.warning(f"Товар {product.article} ({product.name[:50]}) не имеет seller_id")
-                
-                unique_seller_ids = list(set(seller_ids))
-                logger.info(f"Статистика seller_id: всего товаров={total_products}, успешных={successful_products}, с seller_id={products_with_seller_id}, уникальных селлеров={len(unique_seller_ids)}")
-                
-                if unique_seller_ids:
-                    logger.info(f"Начинаем парсинг {len(unique_seller_ids)} продавцов (поля: {selected_fields})")
-                    seller_parser = OzonSellerParser(self.settings.MAX_WORKERS, user_id)
-                    seller_results = seller_parser.parse_sellers(unique_seller_ids)
-                    logger.info(f"✓ Парсинг селлеров завершен. Получено: {len(seller_results)}, успешных: {len([s for s in seller_results if s.success])}")
-                    # Закрываем воркеры продавцов после завершения
-                    seller_parser.cleanup()
-                else:
-                    logger.info("Нет ID селлеров для парсинга")
+                allocated_workers = resource_manager.start_parsing_session(user_id, 'full_parsing', 0)
+            else:
+                allocated_workers = min(5, self.settings.MAX_WORKERS)
+            
+            # Прогреваем драйверы для воркеров, пока собираются ссылки
+            if self.settings.USE_DRIVER_POOL and stage_plan.products:
+                driver_pool.prewarm(allocated_workers)
+            
+            if stage_plan.listing_only:
+                stages = self._run_listing_stages(category_url, max_products, selected_fields, user_id,
+                                                  stage_plan, journal)
+            elif self.settings.STREAMING_PIPELINE:
+                stages = self._run_streaming_stages(category_url, max_products, selected_fields, user_id,
+                                                    needs_seller_parsing, allocated_workers,
+                                                    cache_max_age_minutes, journal)
             else:
-                logger.info(f"Парсинг селлеров пропущен: в selected_fields ({selected_fields}) нет полей селлера")
+                stages = self._run_sequential_stages(category_url, max_products, selected_fields, user_id,
+                                                     needs_seller_parsing, cache_max_age_minutes, journal)
             
-            if self.stop_event.is_set():
+            if stages is None or self.stop_event.is_set():
                 return
             
+            link_parser, product_links, product_results, seller_results, results_file = stages
+            # В плитках нет цены по карте - история пишется только по ценам из API товара
+            if stage_plan.products and stage_plan.decode_plan.price:
+                self._record_price_history(product_results)
+            
             seller_data = {}
             for seller in seller_results:
                 if seller.success:
@@ -182,17 +203,20 @@ class AppManager:
             total_time = end_time - start_time
             successful_products = len([p for p in product_results if p.success])
             failed_products = len([p for p in product_results if not p.success])
+            cached_products = len([p for p in product_results if p.from_cache])
             avg_time_per_product = total_time / len(product_results) if product_results else 0
             
             # Сохраняем результаты для конкретного пользователя
             user_results = {
                 'links': product_links,
+                'results_file': results_file,
                 'products': product_results,
                 'sellers': seller_results,
                 'category_url': category_url,
                 'total_products': len(product_results),
                 'successful_products': successful_products,
                 'failed_products': failed_products,
+                'cached_products': cached_products,
                 'total_sellers': len(seller_results),
                 'successful_sellers': len([s for s in seller_results if s.success]),
                 'output_folder': getattr(link_parser, 'output_folder', 'unknown'),
@@ -202,10 +226,16 @@ class AppManager:
                     'total_time': total_time,
                     'successful_products': successful_products,
                     'failed_products': failed_products,
+                    'cached_products': cached_products,
                     'average_time_per_product': avg_time_per_product
                 }
             }
             
+            if needs_seller_parsing and self.settings.SELLER_CACHE_ENABLED:
+                cache_stats = get_seller_cache().get_stats()
+                user_results['parsing_stats']['seller_cache'] = cache_stats
+                logger.info(f"Кэш продавцов с запуска приложения: попаданий {cache_stats['hits']}, промахов {cache_stats['misses']}")
+            
             # Сохраняем результаты для пользователя
             if user_id:
                 self.user_results[user_id] = user_results
@@ -214,20 +244,217 @@ class AppManager:
             self.last_results = user_results
             
             self._save_results_to_file(user_id)
-            self._export_to_excel(user_id)
+            self._export_results(user_id)
+            
+            if journal:
+                journal.mark_done()
+            
             self._send_report_to_telegram(user_id)
             
         finally:
+            # Незавершенный журнал остается на диске для resume_parsing
+            if journal:
+                journal.close()
             # Завершаем сессию парсинга для пользователя
             if user_id:
                 resource_manager.finish_parsing_session(user_id)
     
+    def _run_sequential_stages(self, category_url: str, max_products: int, selected_fields: list, user_id: str,
+                               needs_seller_parsing: bool, cache_max_age_minutes: float = None,
+                               journal: RunJournal = None):
+        """Ссылки, затем все товары, затем все продавцы. None - если парсинг прерван"""
+        link_parser = OzonLinkParser(category_url, max_products, user_id)
+        resume_state = journal.state if journal else None
+        
+        if resume_state and resume_state.links_done:
+            success, product_links = link_parser.restore_links(resume_state.links, resume_state.output_folder)
+        else:
+            success, product_links = link_parser.start_parsing()
+            if journal and success:
+                journal.record_links(product_links)
+                journal.record_links_done(link_parser.output_folder)
+        
+        if self.stop_event.is_set():
+            return None
+        
+        if not success or not product_links:
+            logger.error("Не удалось собрать ссылки товаров")
+            return None
+        
+        if self.stop_event.is_set():
+            return None
+        
+        # Готовые товары сразу пишутся в JSONL и журнал запуска
+        result_sink = None
+        if self.settings.STREAM_RESULTS:
+            folder = link_parser.output_folder
+            result_sink = ResultSink(self.settings.OUTPUT_DIR / folder / f"products_{folder}.jsonl")
+        
+        def on_product(result):
+            if result_sink:
+                result_sink.write(result, product_links.url_for(result.article))
+            if journal:
+                journal.record_product(result)
+        
+        product_parser = create_product_parser(
+            self.settings.MAX_WORKERS, user_id,
+            on_result=on_product,
+            cache_max_age_minutes=cache_max_age_minutes,
+            completed_results=resume_state.product_results() if resume_state else None,
+            selected_fields=selected_fields
+        )
+        try:
+            product_results = product_parser.parse_products(product_links)
+        finally:
+            if result_sink:
+                result_sink.close()
+        
+        # Принудительно закрываем все воркеры продуктов перед началом парсинга продавцов
+        product_parser.cleanup()
+        
+        if self.stop_event.is_set():
+            return None
+        
+        seller_results = []
+        
+        if needs_seller_parsing:
+            seller_ids = []
+            total_products = len(product_results)
+            successful_products = len([p for p in product_results if p.success])
+            products_with_seller_id = 0
+            
+            for product in product_results:
+                if product.success:
+                    if product.seller_id:
+                        seller_ids.append(product.seller_id)
+                        products_with_seller_id += 1
+                    else:
+                        logger.warning(f"Товар {product.article} ({product.name[:50]}) не имеет seller_id")
+            
+            unique_seller_ids = list(set(seller_ids))
+            logger.info(f"Статистика seller_id: всего товаров={total_products}, успешных={successful_products}, с seller_id={products_with_seller_id}, уникальных селлеров={len(unique_seller_ids)}")
+            
+            if unique_seller_ids:
+                logger.info(f"Начинаем парсинг {len(unique_seller_ids)} продавцов (поля: {selected_fields})")
+                seller_parser = OzonSellerParser(
+                    self.settings.MAX_WORKERS, user_id,
+                    on_result=journal.record_seller if journal else None,
+                    selected_fields=selected_fields,
+                    completed_results=resume_state.seller_results() if resume_state else None
+                )
+                seller_results = seller_parser.parse_sellers(unique_seller_ids)
+                logger.info(f"✓ Парсинг селлеров завершен. Получено: {len(seller_results)}, успешных: {len([s for s in seller_results if s.success])}")
+                # Закрываем воркеры продавцов после завершения
+                seller_parser.cleanup()
+            else:
+                logger.info("Нет ID селлеров для парсинга")
+        else:
+            logger.info(f"Парсинг селлеров пропущен: в selected_fields ({selected_fields}) нет полей селлера")
+        
+        if self.stop_event.is_set():
+            return None
+        
+        return link_parser, product_links, product_results, seller_results, result_sink and str(result_sink.path)
+    
+    def _run_listing_stages(self, category_url: str, max_products: int, selected_fields: list, user_id: str,
+                            stage_plan: StagePlan, journal: RunJournal = None):
+        """
+        Запуск без API товаров: результат строится из ссылок и плиток категории.
+        Товары, в плитках которых нет нужных полей (скролл вместо API, восстановленный запуск),
+        дозапрашиваются через API товаров. None - если парсинг прерван
+        """
+        link_parser = OzonLinkParser(category_url, max_products, user_id)
+        resume_state = journal.state if journal else None
+        
+        if resume_state and resume_state.links_done:
+            success, product_links = link_parser.restore_links(resume_state.links, resume_state.output_folder)
+        else:
+            success, product_links = link_parser.start_parsing()
+            if journal and success:
+                journal.record_links(product_links)
+                journal.record_links_done(link_parser.output_folder)
+        
+        if self.stop_event.is_set():
+            return None
+        
+        if not success or not product_links:
+            logger.error("Не удалось собрать ссылки товаров")
+            return None
+        
+        result_sink = None
+        if self.settings.STREAM_RESULTS:
+            folder = link_parser.output_folder
+            result_sink = ResultSink(self.settings.OUTPUT_DIR / folder / f"products_{folder}.jsonl")
+        
+        def on_product(result):
+            if result_sink:
+                result_sink.write(result, product_links.url_for(result.article))
+            if journal:
+                journal.record_product(result)
+        
+        products = {}
+        missing = LinkIndex()
+        for article in product_links.articles():
+            tile = link_parser.tiles.get(article)
+            if not stage_plan.tile_complete(tile):
+                missing.add(product_links.url_for(article), product_links.image_for(article))
+                continue
+            product = ProductInfo(article=article, image_url=product_links.image_for(article), success=True)
+            if tile:
+                product.name, product.price, product.original_price = tile.name, tile.price, tile.original_price
+            products[article] = product
+            on_product(product)
+        
+        logger.info(f"Из плиток категории: {len(products)} товаров, дозапрос через API: {len(missing)}")
+        
+        try:
+            if missing:
+                product_parser = create_product_parser(
+                    self.settings.MAX_WORKERS, user_id,
+                    on_result=on_product,
+                    completed_results=resume_state.product_results() if resume_state else None,
+                    selected_fields=selected_fields
+                )
+                for product in product_parser.parse_products(missing):
+                    products[product.article] = product
+                product_parser.cleanup()
+        finally:
+            if result_sink:
+                result_sink.close()
+        
+        if self.stop_event.is_set():
+            return None
+        
+        product_results = [products[article] for article in product_links.articles() if article in products]
+        return link_parser, product_links, product_results, [], result_sink and str(result_sink.path)
+    
+    def _run_streaming_stages(self, category_url: str, max_products: int, selected_fields: list, user_id: str,
+                              needs_seller_parsing: bool, num_workers: int, cache_max_age_minutes: float = None,
+                              journal: RunJournal = None):
+        """Все этапы одновременно через потоковый конвейер. None - если ссылки не собраны"""
+        pipeline = StreamingPipeline(
+            category_url, max_products, user_id,
+            needs_seller_parsing, num_workers, self.stop_event, selected_fields, cache_max_age_minutes, journal
+        )
+        
+        if not pipeline.run():
+            logger.error("Не удалось собрать ссылки товаров")
+            return None
+        
+        results_file = pipeline.result_sink and str(pipeline.result_sink.path)
+        return pipeline.link_parser, pipeline.product_links, pipeline.product_results, pipeline.seller_results, results_file
+    
 
+    def _iter_product_records(self, results: dict):
+        """Товары по одному в порядке категории со ссылками из LinkIndex"""
+        links = LinkIndex.wrap(results.get('links'))
+        for product in results.get('products', []):
+            yield product_record(product, links.url_for(product.article))
+    
     def _save_results_to_file(self, user_id: str = None):
         try:
             import json
             from datetime import datetime
-            from pathlib import Path
             
             folder_name = self.last_results.get('output_folder', 'unknown')
             filename = f"category_{folder_name}.json"
@@ -238,128 +465,130 @@ class AppManager:
             
             # Получаем результаты для конкретного пользователя
             results = self.user_results.get(user_id, self.last_results) if user_id else self.last_results
+            seller_map = results.get('seller_data', {})
             
-            save_data = {
+            header = {
                 'timestamp': current_timestamp,
                 'category_url': results.get('category_url', ''),
                 'total_products': results.get('total_products', 0),
                 'successful_products': results.get('successful_products', 0),
                 'total_sellers': results.get('total_sellers', 0),
-                'successful_sellers': results.get('successful_sellers', 0),
-                'products': []
+                'successful_sellers': results.get('successful_sellers', 0)
             }
             
-            for product in results.get('products', []):
-                product_url = ""
-                for url in results.get('links', {}).keys():
-                    if product.article in url:
-                        product_url = url
-                        break
-                
-                seller_info = results.get('seller_data', {}).get(product.seller_id, None)
-                
-                seller_data = {
-                    'name': product.company_name,
-                    'id': product.seller_id,
-                    'link': product.seller_link,
-                    'inn': '',
-                    'company_name': ''
-                }
+            # Пишем товары по одному, не собирая весь список в памяти
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(header, ensure_ascii=False, indent=2)[:-2])
+                f.write(',\n  "products": [')
                 
-                if seller_info:
-                    company_name = seller_info.company_name.replace('\\"', '"').replace('\"', '"').replace('"', '"')
+                for index, record in enumerate(self._iter_product_records(results)):
+                    seller_info = seller_map.get(record['seller_id'], None)
                     
-                    seller_data.update({
-                        'inn': seller_info.inn,
-                        'company_name': company_name,
-                        'orders_count': seller_info.orders_count,
-                        'reviews_count': seller_info.reviews_count,
-                        'working_time': seller_info.working_time,
-                        'average_rating': seller_info.average_rating
-                    })
-                
-                if 'name' in seller_data:
-                    seller_data['name'] = seller_data['name'].replace('\\"', '"').replace('\"', '"').replace('"', '"')
+                    seller_data = {
+                        'name': record['company_name'],
+                        'id': record['seller_id'],
+                        'link': record['seller_link'],
+                        'inn': '',
+                        'company_name': ''
+                    }
+                    
+                    if seller_info:
+                        company_name = seller_info.company_name.replace('\\"', '"').replace('\"', '"').replace('"', '"')
+                        
+                        seller_data.update({
+                            'inn': seller_info.inn,
+                            'company_name': company_name,
+                            'orders_count': seller_info.orders_count,
+                            'reviews_count': seller_info.reviews_count,
+                            'working_time': seller_info.working_time,
+                            'average_rating': seller_info.average_rating
+                        })
+                    
+                    if 'name' in seller_data:
+                        seller_data['name'] = seller_data['name'].replace('\\"', '"').replace('\"', '"').replace('"', '"')
+                    
+                    product_data = {
+                        'article': record['article'],
+                        'name': record['name'],
+                        'seller': seller_data,
+                        'image_url': record['image_url'],
+                        'card_price': record['card_price'],
+                        'price': record['price'],
+                        'original_price': record['original_price'],
+                        'product_url': record['product_url'],
+                        'success': record['success'],
+                        'error': record['error']
+                    }
+                    
+                    f.write(",\n    " if index else "\n    ")
+                    f.write(json.dumps(product_data, ensure_ascii=False, indent=2).replace("\n", "\n    "))
                 
-                save_data['products'].append({
-                    'article': product.article,
-                    'name': product.name,
-                    'seller': seller_data,
-                    'image_url': product.image_url,
-                    'card_price': product.card_price,
-                    'price': product.price,
-                    'original_price': product.original_price,
-                    'product_url': product_url,
-                    'success': product.success,
-                    'error': product.error
-                })
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, ensure_ascii=False, indent=2)
+                f.write("\n  ]\n}")
             
         except Exception as e:
             logger.error(f"Ошибка сохранения результатов: {e}")
     
-    def _export_to_excel(self, user_id: str = None):
+    def _iter_export_products(self, results: dict):
+        seller_map = results.get('seller_data', {})
+        
+        for record in self._iter_product_records(results):
+            seller_info = seller_map.get(record['seller_id'], None)
+            
+            seller_data = {
+                'name': record['company_name'],
+                'inn': '',
+                'company_name': '',
+                'orders_count': '',
+                'reviews_count': '',
+                'average_rating': '',
+                'working_time': ''
+            }
+            
+            if seller_info:
+                seller_data.update({
+                    'inn': seller_info.inn,
+                    'company_name': seller_info.company_name.replace('\"', '"').replace('"', '"'),
+                    'orders_count': seller_info.orders_count,
+                    'reviews_count': seller_info.reviews_count,
+                    'average_rating': seller_info.average_rating,
+                    'working_time': seller_info.working_time
+                })
+            
+            yield {
+                'article': record['article'],
+                'name': record['name'],
+                'seller': seller_data,
+                'image_url': record['image_url'],
+                'card_price': record['card_price'],
+                'price': record['price'],
+                'original_price': record['original_price'],
+                'product_url': record['product_url'],
+                'success': record['success'],
+                'error': record['error']
+            }
+    
+    def _export_results(self, user_id: str = None):
         try:
             # Получаем результаты для конкретного пользователя
             results = self.user_results.get(user_id, self.last_results) if user_id else self.last_results
             
             folder_name = results.get('output_folder', 'unknown')
             output_dir = self.settings.OUTPUT_DIR / folder_name
-            
-            exporter = ExcelExporter(output_dir, f"category_{folder_name}")
             selected_fields = results.get('selected_fields', [])
             
-            export_data = {'products': []}
+            exported_files = []
+            for export_format in self.settings.EXPORT_FORMATS:
+                exporter = get_exporter(export_format, output_dir, f"category_{folder_name}")
+                # Каждый формат читает товары из потока заново
+                export_data = {'products': self._iter_export_products(results)}
+                if exporter.export_results(export_data, selected_fields):
+                    exported_files.append(str(exporter.filepath))
             
-            for product in results.get('products', []):
-                product_url = ""
-                for url in results.get('links', {}).keys():
-                    if product.article in url:
-                        product_url = url
-                        break
-                
-                seller_info = results.get('seller_data', {}).get(product.seller_id, None)
-                
-                seller_data = {
-                    'name': product.company_name,
-                    'inn': '',
-                    'company_name': '',
-                    'orders_count': '',
-                    'reviews_count': '',
-                    'average_rating': '',
-                    'working_time': ''
-                }
-                
-                if seller_info:
-                    seller_data.update({
-                        'inn': seller_info.inn,
-                        'company_name': seller_info.company_name.replace('\"', '"').replace('"', '"'),
-                        'orders_count': seller_info.orders_count,
-                        'reviews_count': seller_info.reviews_count,
-                        'average_rating': seller_info.average_rating,
-                        'working_time': seller_info.working_time
-                    })
-                
-                export_data['products'].append({
-                    'article': product.article,
-                    'name': product.name,
-                    'seller': seller_data,
-                    'image_url': product.image_url,
-                    'card_price': product.card_price,
-                    'price': product.price,
-                    'original_price': product.original_price,
-                    'product_url': product_url,
-                    'success': product.success,
-                    'error': product.error
-                })
-            
-            if exporter.export_results(export_data, selected_fields):
-                self._send_files_to_telegram(str(exporter.filepath), user_id)
+            if exported_files:
+                self._send_files_to_telegram(exported_files, user_id)
             
         except Exception as e:
-            logger.error(f"Ошибка экспорта в Excel: {e}")
+            logger.error(f"Ошибка экспорта результатов: {e}")
     
     def start_telegram_bot(self, bot_token: str, user_ids) -> bool:
         try:
@@ -388,6 +617,60 @@ class AppManager:
         time.sleep(1)
         return self.start_parsing(category_url, selected_fields, user_id)
     
+    def _record_price_history(self, product_results: list):
+        if not self.settings.PRICE_HISTORY_ENABLED:
+            return
+        try:
+            get_price_history().record(product_results)
+        except Exception as e:
+            logger.warning(f"Ошибка записи истории цен: {e}")
+    
+    def _monitoring_task(self, category_url: str, user_id: str = None):
+        monitor = PriceMonitor(category_url, self.settings.MAX_PRODUCTS, self.settings.MAX_WORKERS,
+                               user_id, self.stop_event)
+        try:
+            diff = monitor.run()
+        finally:
+            if user_id:
+                resource_manager.finish_parsing_session(user_id)
+        
+        if diff is None or self.stop_event.is_set():
+            return
+        
+        self._record_price_history(monitor.results)
+        diff_file = monitor.save_diff(diff)
+        self._send_via_temp_bot(
+            file_paths=[str(diff_file)], target_user_id=user_id,
+            message=self._format_monitoring_report(diff), output_folder=monitor.output_folder
+        )
+    
+    def _format_monitoring_report(self, diff: MonitorDiff) -> str:
+        title = "📋 <b>Мониторинг цен: каталог категории создан</b>" if diff.baseline else "📉 <b>Мониторинг цен</b>"
+        lines = [
+            title,
+            "",
+            f"📦 <b>Проверено товаров:</b> {diff.checked}",
+            f"🆕 <b>Новых:</b> {len(diff.new)}",
+            f"🚫 <b>Снято с продажи:</b> {len(diff.removed)}",
+            f"💱 <b>Изменилась цена:</b> {len(diff.price_changed)}"
+        ]
+        if diff.failed:
+            lines.append(f"⚠️ <b>Не удалось проверить:</b> {diff.failed}")
+        
+        changes = sorted(
+            diff.price_changed,
+            key=lambda change: abs(change.card_price - change.old_card_price) or abs(change.price - change.old_price),
+            reverse=True
+        )[:self.settings.MONITOR_REPORT_LIMIT]
+        if changes:
+            lines.extend(["", "<b>Крупнейшие изменения:</b>"])
+            for change in changes:
+                old_price = change.old_card_price or change.old_price
+                new_price = change.card_price or change.price
+                lines.append(f"• {change.article} {html.escape(change.name[:40])}: {old_price} → {new_price} ₽")
+        
+        return "\n".join(lines)
+    
     def get_status(self):
         with self.parsing_lock:
             status = {
@@ -405,6 +688,9 @@ class AppManager:
         # Добавляем информацию о ресурсах
         resource_status = resource_manager.get_status()
         status.update(resource_status)
+        status['driver_pool'] = driver_pool.get_status()
+        status['rate_limiter'] = rate_limiter.get_status()
+        status['retries'] = retry_engine.get_stats()
         
         return status
     
@@ -416,10 +702,11 @@ class AppManager:
     def _send_report_to_telegram(self, user_id: str = None):
         self._send_via_temp_bot(report_only=True, target_user_id=user_id)
     
-    def _send_files_to_telegram(self, excel_path: str, user_id: str = None):
-        self._send_via_temp_bot(excel_path=excel_path, target_user_id=user_id)
+    def _send_files_to_telegram(self, file_paths: List[str], user_id: str = None):
+        self._send_via_temp_bot(file_paths=file_paths, target_user_id=user_id)
     
-    def _send_via_temp_bot(self, excel_path: str = None, report_only: bool = False, target_user_id: str = None):
+    def _send_via_temp_bot(self, file_paths: List[str] = None, report_only: bool = False, target_user_id: str = None,
+                           message: str = None, output_folder: str = None):
         try:
             from ..utils.config_loader import load_telegram_config
             
@@ -458,6 +745,7 @@ class AppManager:
                             total_time = stats.get('total_time', 0)
                             successful = stats.get('successful_products', 0)
                             failed = stats.get('failed_products', 0)
+                            cached = stats.get('cached_products', 0)
                             avg_time = stats.get('average_time_per_product', 0)
                             
                             hours = int(total_time // 3600)
@@ -480,20 +768,27 @@ class AppManager:
                                 f"📦 <b>Всего товаров:</b> {successful + failed}\n"
                                 f"✅ <b>Успешно:</b> {successful}\n"
                                 f"❌ <b>Неудачно:</b> {failed}\n"
+                                f"💾 <b>Из кэша:</b> {cached}\n"
                                 f"📊 <b>Успешность:</b> {success_rate:.1f}%"
                             )
                             
                             await temp_bot.send_message(chat_id=target_user, text=report, parse_mode="HTML")
                         
-                        if excel_path:
-                            caption = (
-                                "🎉 <b>Парсинг успешно завершен!</b>\n\n"
-                                "📊 <b>Ваш Excel файл готов!</b>\n"
-                                "💎 Данные отформатированы и готовы к использованию\n\n"
-                                "📥 Скачайте файл ниже ⬇️"
-                            )
+                        if message:
+                            await temp_bot.send_message(chat_id=target_user, text=message, parse_mode="HTML")
+                        
+                        for file_path in file_paths or []:
+                            if file_path.endswith('.xlsx'):
+                                caption = (
+                                    "🎉 <b>Парсинг успешно завершен!</b>\n\n"
+                                    "📊 <b>Ваш Excel файл готов!</b>\n"
+                                    "💎 Данные отформатированы и готовы к использованию\n\n"
+                                    "📥 Скачайте файл ниже ⬇️"
+                                )
+                            else:
+                                caption = f"📄 <b>Выгрузка {Path(file_path).suffix[1:].upper()}</b>"
                             
-                            document = FSInputFile(excel_path)
+                            document = FSInputFile(file_path)
                             await temp_bot.send_document(
                                 chat_id=target_user,
                                 document=document,
@@ -501,9 +796,9 @@ class AppManager:
                                 parse_mode="HTML"
                             )
                     
-                    if excel_path:
+                    if file_paths:
                         await asyncio.sleep(10)
-                        self._delete_output_folder()
+                        self._delete_output_folder(output_folder)
                         
                 finally:
                     await temp_bot.session.close()
@@ -513,13 +808,13 @@ class AppManager:
         except Exception as e:
             logger.error(f"Ошибка отправки через временный бот: {e}")
     
-    def _delete_output_folder(self):
+    def _delete_output_folder(self, folder_name: str = None):
         try:
             import shutil
             import os
             import stat
             
-            folder_name = self.last_results.get('output_folder', '')
+            folder_name = folder_name or self.last_results.get('output_folder', '')
             if folder_name:
                 output_dir = self.settings.OUTPUT_DIR / folder_name
                 if output_dir.exists():
@@ -537,4 +832,6 @@ class AppManager:
 
     def _do_shutdown(self):
         self.stop_parsing()
-        self.stop_telegram_bot()
\ No newline at end of file
+        self.stop_telegram_bot()
+        driver_pool.shutdown()
+        product_decoder.shutdown()
\ No newline at end of file
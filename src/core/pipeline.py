@@ -0,0 +1,213 @@
+"""
+Потоковый конвейер парсинга: ссылки, товары и продавцы обрабатываются одновременно
+"""
+import logging
+import threading
+from typing import Dict, List, Optional
+from ..config.settings import Settings
+from ..parsers.link_parser import OzonLinkParser
+from ..parsers.product_parser import ProductInfo, create_product_parser
+from ..parsers.seller_parser import OzonSellerParser, SellerInfo
+from ..utils.resource_manager import resource_manager
+from ..utils.work_queue import WorkQueue
+from ..utils.checkpoint import RunJournal
+from ..utils.result_sink import ResultSink
+from ..utils.link_index import LinkIndex
+
+logger = logging.getLogger(__name__)
+
+class StreamingPipeline:
+    """
+    Ссылки передаются воркерам товаров по мере скролла, новые seller_id - воркерам продавцов
+    сразу после разбора товара. Этапы связаны ограниченными очередями.
+    """
+
+    def __init__(self, category_url: str, max_products: int, user_id: str = None,
+                 needs_seller_parsing: bool = True, num_workers: int = 5,
+                 stop_event: Optional[threading.Event] = None, selected_fields: Optional[List[str]] = None,
+                 cache_max_age_minutes: Optional[float] = None, journal: Optional[RunJournal] = None):
+        self.category_url = category_url
+        self.max_products = max_products
+        self.user_id = user_id
+        self.needs_seller_parsing = needs_seller_parsing
+        self.stop_event = stop_event or threading.Event()
+        self.journal = journal
+        # Состояние прерванного запуска, если конвейер его продолжает
+        resume_state = journal.state if journal else None
+        self.resume_state = resume_state
+
+        # Продавцов заметно меньше, чем товаров - им достается меньшая часть воркеров.
+        # Воркер продавцов нужен всегда, когда выбраны поля продавца: при одном выделенном воркере
+        # этапы получают по одному воркеру, иначе продавцы не попали бы в очередь
+        if needs_seller_parsing:
+            self.seller_workers = max(1, num_workers // 4)
+            self.product_workers = max(1, num_workers - self.seller_workers)
+        else:
+            self.seller_workers = 0
+            self.product_workers = max(1, num_workers)
+
+        self.product_queue = WorkQueue(max_attempts=Settings.WORK_QUEUE_MAX_ATTEMPTS,
+                                       maxsize=Settings.PIPELINE_QUEUE_SIZE)
+        self.seller_queue = WorkQueue(max_attempts=Settings.WORK_QUEUE_MAX_ATTEMPTS,
+                                      maxsize=Settings.PIPELINE_QUEUE_SIZE)
+
+        self.link_parser = OzonLinkParser(category_url, max_products, user_id)
+        self.product_parser = create_product_parser(
+            Settings.MAX_WORKERS, user_id, on_result=self._on_product,
+            cache_max_age_minutes=cache_max_age_minutes,
+            completed_results=resume_state.product_results() if resume_state else None,
+            selected_fields=selected_fields
+        )
+        self.seller_parser = OzonSellerParser(
+            Settings.MAX_WORKERS, user_id,
+            on_result=journal.record_seller if journal else None,
+            selected_fields=selected_fields,
+            completed_results=resume_state.seller_results() if resume_state else None
+        )
+
+        self._lock = threading.Lock()
+        self.product_links = LinkIndex()
+        self.articles: List[str] = []
+        self.result_sink: Optional[ResultSink] = None
+        self.product_results: List[ProductInfo] = []
+        self.seller_results: List[SellerInfo] = []
+        self.cached_sellers: List[SellerInfo] = []
+        self.queued_sellers = set()
+        self.links_success = False
+
+    def run(self) -> bool:
+        if self.user_id:
+            resource_manager.start_parsing_session(self.user_id, 'pipeline', self.max_products)
+
+        logger.info(
+            f"Потоковый конвейер: {self.product_workers} воркеров товаров, "
+            f"{self.seller_workers} воркеров продавцов для пользователя {self.user_id}"
+        )
+
+        links_thread = threading.Thread(target=self._run_link_stage, daemon=True)
+        links_thread.start()
+
+        seller_thread = None
+        if self.seller_workers:
+            seller_thread = threading.Thread(target=self._run_seller_stage, daemon=True)
+            seller_thread.start()
+
+        try:
+            # Воркеры товаров в текущем потоке: ждут ссылки и завершаются, когда очередь закрыта и пуста
+            self.product_parser.parse_stream(self.product_queue, {}, self.product_workers)
+        finally:
+            self.seller_queue.close()
+            links_thread.join()
+            if seller_thread:
+                seller_thread.join()
+            if self.result_sink:
+                self.result_sink.close()
+
+        self.product_results = self.product_parser._sort_results_by_original_order(
+            self.product_results, self.articles
+        )
+
+        logger.info(
+            f"Конвейер завершен: ссылок {len(self.product_links)}, товаров {len(self.product_results)}, "
+            f"продавцов {len(self.seller_results)}"
+        )
+        return self.links_success and bool(self.product_links)
+
+    def _run_link_stage(self):
+        try:
+            if self.resume_state and self.resume_state.links_done:
+                self.links_success, links = self.link_parser.restore_links(
+                    self.resume_state.links, self.resume_state.output_folder
+                )
+                self._open_result_sink()
+                self._on_links(links)
+            else:
+                self._open_result_sink()
+                self.links_success, _ = self.link_parser.start_parsing(on_links=self._on_collected_links)
+                if self.journal and self.links_success:
+                    self.journal.record_links_done(self.link_parser.output_folder)
+        except Exception as e:
+            logger.error(f"Ошибка этапа ссылок в конвейере: {e}")
+        finally:
+            # Больше ссылок не будет - воркеры товаров доработают очередь и завершатся
+            self.product_queue.close()
+
+    def _open_result_sink(self):
+        if not Settings.STREAM_RESULTS:
+            return
+        folder = self.link_parser.output_folder
+        try:
+            self.result_sink = ResultSink(Settings.OUTPUT_DIR / folder / f"products_{folder}.jsonl")
+        except OSError as e:
+            logger.warning(f"Не удалось открыть файл потоковой записи результатов: {e}")
+
+    def _run_seller_stage(self):
+        try:
+            parsed = self.seller_parser.parse_stream(self.seller_queue, self.seller_workers)
+            with self._lock:
+                self.seller_results = self.cached_sellers + parsed
+        except Exception as e:
+            logger.error(f"Ошибка этапа продавцов в конвейере: {e}")
+
+    def _on_collected_links(self, new_links: Dict[str, str]):
+        if self.journal:
+            self.journal.record_links(new_links)
+        self._on_links(new_links)
+
+    def _on_links(self, new_links: Dict[str, str]):
+        if self.stop_event.is_set():
+            return
+
+        new_articles = []
+        with self._lock:
+            for url, img_url in new_links.items():
+                article = self.product_links.add(url, img_url)
+                if article:
+                    self.articles.append(article)
+                    new_articles.append(article)
+
+        # Свежие товары из кэша сразу считаются готовыми, воркерам уходят только остальные
+        cached, missing = self.product_parser.lookup_cached(new_articles)
+        for result in cached.values():
+            self._on_product(result)
+
+        for article in missing:
+            self.product_queue.put(article)
+
+    def _on_product(self, result: ProductInfo):
+        new_seller_id = None
+
+        with self._lock:
+            # Изображение из ссылок вместо API, как в последовательном режиме
+            image_from_links = self.product_links.image_for(result.article)
+            if result.success and image_from_links:
+                result.image_url = image_from_links
+
+            self.product_results.append(result)
+            processed = len(self.product_results)
+            product_url = self.product_links.url_for(result.article)
+
+            if (self.seller_workers and result.success and result.seller_id
+                    and result.seller_id not in self.queued_sellers):
+                self.queued_sellers.add(result.seller_id)
+                new_seller_id = result.seller_id
+
+        if self.result_sink:
+            self.result_sink.write(result, product_url)
+
+        if self.journal:
+            self.journal.record_product(result)
+
+        if self.user_id:
+            resource_manager.update_progress(self.user_id, processed)
+
+        if new_seller_id and not self.stop_event.is_set():
+            cached, _ = self.seller_parser.lookup_cached([new_seller_id])
+            if cached:
+                with self._lock:
+                    self.cached_sellers.extend(cached.values())
+                if self.journal:
+                    for seller in cached.values():
+                        self.journal.record_seller(seller)
+            else:
+                self.seller_queue.put(new_seller_id)
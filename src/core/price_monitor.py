@@ -0,0 +1,184 @@
+"""
+Режим мониторинга цен: повторно запрашиваются только известные артикулы категории,
+новые товары ищутся неглубоким обходом ссылок, результат - разница с прошлой проверкой
+"""
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+from ..config.settings import Settings
+from ..parsers.link_parser import OzonLinkParser
+from ..parsers.product_parser import ProductInfo, create_product_parser
+from ..utils.article_catalogue import get_article_catalogue
+from ..utils.link_index import LinkIndex
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class MonitorItem:
+    article: str
+    name: str = ""
+    product_url: str = ""
+    card_price: int = 0
+    price: int = 0
+
+@dataclass
+class PriceChange:
+    article: str
+    name: str
+    product_url: str
+    old_card_price: int
+    card_price: int
+    old_price: int
+    price: int
+
+@dataclass
+class MonitorDiff:
+    category_url: str
+    baseline: bool = False   # Первая проверка категории: каталог только создан
+    checked: int = 0
+    failed: int = 0          # Известные товары, которые не удалось получить, но и отсутствие не подтверждено
+    total_time: float = 0.0
+    new: List[MonitorItem] = field(default_factory=list)
+    removed: List[MonitorItem] = field(default_factory=list)
+    price_changed: List[PriceChange] = field(default_factory=list)
+
+class PriceMonitor:
+    """
+    Каталог артикулов категории хранится в ArticleCatalogue. При первой проверке ссылки собираются
+    полностью (max_products), при следующих - только первые MONITOR_DISCOVERY_PRODUCTS для поиска новых товаров;
+    цены всех известных артикулов запрашиваются напрямую через API товаров, без обхода категории.
+    Пропуском для снятия с продажи считается только отсутствие товара в успешно собранных ссылках категории,
+    неудачный запрос товара (блокировка, таймаут) пропуском не считается.
+    """
+
+    FIELDS = ['name', 'card_price', 'price', 'original_price']
+
+    def __init__(self, category_url: str, max_products: int, max_workers: int, user_id: str = None,
+                 stop_event: Optional[threading.Event] = None):
+        self.category_url = category_url
+        self.max_products = max_products
+        self.max_workers = max_workers
+        self.user_id = user_id
+        self.stop_event = stop_event or threading.Event()
+        self.output_folder = ""
+        self.results: List[ProductInfo] = []
+
+    def run(self) -> Optional[MonitorDiff]:
+        """Проверяет категорию; None - если проверка прервана или товаров нет"""
+        start_time = time.time()
+        catalogue = get_article_catalogue()
+        known = catalogue.get_active(self.category_url)
+        diff = MonitorDiff(category_url=self.category_url, baseline=not known)
+
+        links = LinkIndex({item['url']: item['image_url'] for item in known.values() if item['url']})
+        discovery_limit = Settings.MONITOR_DISCOVERY_PRODUCTS if known else self.max_products
+        discovery_success, discovered = self._discover(discovery_limit)
+        if self.stop_event.is_set():
+            return None
+        links.update(discovered)
+
+        if not links:
+            logger.error(f"Мониторинг: нет известных и новых товаров для {self.category_url}")
+            return None
+
+        logger.info(
+            f"Мониторинг: известных товаров {len(known)}, "
+            f"новых по ссылкам {len([a for a in discovered.articles() if a not in known])}"
+        )
+
+        # Цены нужны свежие - кэш товаров не используется; продавцы для отчета не нужны
+        product_parser = create_product_parser(
+            self.max_workers, self.user_id, cache_max_age_minutes=0, selected_fields=self.FIELDS
+        )
+        results = product_parser.parse_products(links)
+        self.results = results
+        product_parser.cleanup()
+        if self.stop_event.is_set():
+            return None
+
+        seen = []
+        failed = []
+        for result in results:
+            product_url = links.url_for(result.article)
+            if not result.success:
+                if result.article in known:
+                    failed.append(result.article)
+                continue
+
+            seen.append((result, product_url, links.image_for(result.article)))
+            old = known.get(result.article)
+            if old is None:
+                diff.new.append(self._item(result, product_url))
+            elif (old['card_price'], old['price']) != (result.card_price, result.price):
+                diff.price_changed.append(PriceChange(
+                    article=result.article, name=result.name, product_url=product_url,
+                    old_card_price=old['card_price'], card_price=result.card_price,
+                    old_price=old['price'], price=result.price
+                ))
+
+        catalogue.put_seen(self.category_url, seen)
+        absent = self._confirm_absent(failed, discovery_success, discovered, discovery_limit)
+        removed = catalogue.record_misses(self.category_url, absent)
+        diff.removed = [
+            MonitorItem(article=article, name=known[article]['name'], product_url=known[article]['url'],
+                        card_price=known[article]['card_price'], price=known[article]['price'])
+            for article in removed
+        ]
+        diff.checked = len(results)
+        diff.failed = len(failed) - len(removed)
+        diff.total_time = time.time() - start_time
+
+        logger.info(
+            f"Мониторинг завершен: проверено {diff.checked}, новых {len(diff.new)}, "
+            f"снято {len(diff.removed)}, изменилась цена {len(diff.price_changed)}"
+        )
+        return diff
+
+    def _discover(self, max_products: int) -> Tuple[bool, LinkIndex]:
+        """Ссылки с первых страниц категории"""
+        link_parser = OzonLinkParser(self.category_url, max_products, self.user_id)
+        success, links = link_parser.start_parsing()
+        self.output_folder = self.output_folder or link_parser.output_folder
+        if not success:
+            logger.warning("Мониторинг: не удалось собрать ссылки, проверяются только известные товары")
+        return success, links
+
+    def _confirm_absent(self, articles: List[str], success: bool, listing: LinkIndex, limit: int) -> List[str]:
+        """
+        Из неполученных известных товаров - те, которых нет в успешно собранных ссылках категории.
+        Ссылки первых страниц подтверждают отсутствие, только если обход дошел до конца категории;
+        иначе для подтверждения ссылки собираются полностью (max_products)
+        """
+        if not articles:
+            return []
+        if not (success and (len(listing) < limit or limit >= self.max_products)):
+            if self.stop_event.is_set():
+                return []
+            logger.info(f"Мониторинг: {len(articles)} товаров не получены, проверяем их наличие в категории")
+            success, listing = self._discover(self.max_products)
+        if not success:
+            # Без списка категории отсутствие не подтверждено - пропуск не засчитывается
+            return []
+        listed = set(listing.articles())
+        return [article for article in articles if article not in listed]
+
+    def _item(self, result: ProductInfo, product_url: str) -> MonitorItem:
+        return MonitorItem(article=result.article, name=result.name, product_url=product_url,
+                           card_price=result.card_price, price=result.price)
+
+    def save_diff(self, diff: MonitorDiff) -> Path:
+        """Сохраняет разницу в JSON в папку запуска"""
+        output_dir = Settings.OUTPUT_DIR / self.output_folder
+        output_dir.mkdir(parents=True, exist_ok=True)
+        filepath = output_dir / f"monitor_{self.output_folder}.json"
+
+        data = {'timestamp': datetime.now().strftime("%d.%m.%Y_%H-%M-%S")}
+        data.update(asdict(diff))
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return filepath
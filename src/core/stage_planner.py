@@ -0,0 +1,55 @@
+"""
+Планировщик этапов: по выбранным полям определяет минимальный набор источников данных запуска
+"""
+from dataclasses import dataclass
+from typing import Iterable, Optional
+from ..config.settings import Settings
+from ..parsers.product_json import FULL_PLAN, SELLER_FIELDS, DecodePlan
+
+# Поля, которые есть у любой собранной ссылки: артикул, ссылка и изображение плитки
+LINK_FIELDS = frozenset({'article', 'product_url', 'image_url'})
+# Поля из JSON плитки категории (ListingTile); цена по карте в плитке не различается
+TILE_FIELDS = frozenset({'name', 'price', 'original_price'})
+
+@dataclass(frozen=True)
+class StagePlan:
+    """
+    products - нужен API товара, sellers - нужен этап продавцов (а значит seller_id товара),
+    tile_fields - поля, которые в запуске без API товара берутся из плиток категории.
+    """
+    products: bool = True
+    sellers: bool = True
+    decode_plan: DecodePlan = FULL_PLAN
+    tile_fields: frozenset = frozenset()
+
+    @property
+    def listing_only(self) -> bool:
+        return not self.products
+
+    def tile_complete(self, tile) -> bool:
+        """Плитка дает все нужные поля; старой цены нет у товаров без скидки, ее отсутствие не считается пропуском"""
+        if not self.tile_fields:
+            return True
+        return tile is not None and all(getattr(tile, field) for field in self.tile_fields - {'original_price'})
+
+    def describe(self) -> str:
+        if self.listing_only:
+            return "только ссылки категории"
+        return "ссылки, товары и продавцы" if self.sellers else "ссылки и товары"
+
+def plan_stages(selected_fields: Optional[Iterable[str]]) -> StagePlan:
+    """Самый дешевый набор этапов для выбранных полей; без выбора выполняются все этапы"""
+    if not selected_fields:
+        return StagePlan()
+    fields = set(selected_fields)
+
+    listing_fields = LINK_FIELDS
+    # Данные плиток есть только в ответах composer-api; при скролле страницы доступны ссылка и изображение
+    if Settings.LINK_COLLECTION_MODE == 'api':
+        listing_fields = listing_fields | TILE_FIELDS
+
+    if Settings.LISTING_ONLY_RUNS and fields <= listing_fields:
+        return StagePlan(products=False, sellers=False, decode_plan=DecodePlan.for_fields(fields),
+                         tile_fields=frozenset(fields & TILE_FIELDS))
+
+    return StagePlan(sellers=bool(fields & SELLER_FIELDS), decode_plan=DecodePlan.for_fields(fields))
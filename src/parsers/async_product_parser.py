@@ -0,0 +1,255 @@
+"""
+Асинхронный движок парсинга товаров: запросы к composer-api через aiohttp с cookies прогретого драйвера
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import aiohttp
+from yarl import URL
+
+from ..config.settings import Settings
+from ..utils.driver_pool import driver_pool
+from ..utils.http_fetcher import HttpFetcher
+from ..utils.link_index import LinkIndex
+from ..utils.rate_limiter import rate_limiter
+from ..utils.resource_manager import resource_manager
+from ..utils.retry_policy import retry_engine, BLOCK, NO_WIDGET_STATES, PARSE_ERROR, TIMEOUT
+from ..utils.selenium_manager import SeleniumManager
+from ..utils.work_queue import WorkItem, WorkQueue
+from .product_decoder import product_decoder
+from .product_json import ProductInfo, product_api_url
+from .product_parser import OzonProductParser
+
+logger = logging.getLogger(__name__)
+
+class AsyncProductParser(OzonProductParser):
+    """
+    Тот же контракт, что у OzonProductParser, но товары запрашиваются из одного потока через aiohttp.
+    Браузер нужен только для прохождения антибота: его cookies и user-agent получают все запросы.
+    Одновременность ограничена ASYNC_MAX_CONCURRENCY, общая частота запросов - rate_limiter.
+    """
+
+    WORKER_ID = 1
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.selenium_manager: Optional[SeleniumManager] = None
+        self.user_agent = ""
+        self.cookies: Dict[str, str] = {}
+        self.generation = 0  # Номер набора cookies, растет после каждого прохождения антибота
+        self.rewarms = 0
+        self._ready: Optional[asyncio.Event] = None
+        self._rewarm_lock: Optional[asyncio.Lock] = None
+
+    def _parse_articles(self, missing: List[str]) -> List[ProductInfo]:
+        # Этап товаров учитывается в сессии пользователя так же, как у воркеров с браузерами
+        if self.user_id:
+            resource_manager.start_parsing_session(self.user_id, 'products', len(missing))
+        logger.info(f"Асинхронный парсинг {len(missing)} товаров для пользователя {self.user_id}")
+        if not self._warm_cookies(missing[0]):
+            self._release_driver()
+            logger.warning("Не удалось получить cookies для асинхронного парсинга, переход на воркеры с браузерами")
+            return super()._parse_articles(missing)
+
+        try:
+            results = asyncio.run(self._parse_queue(WorkQueue(missing, max_attempts=1)))
+        finally:
+            self._release_driver()
+        return self._sort_results_by_original_order(results, missing)
+
+    def parse_stream(self, work_queue: WorkQueue, product_links: Dict[str, str], num_workers: int) -> List[ProductInfo]:
+        """Потоковый режим: артикулы берутся из очереди конвейера, пока ее не закроют"""
+        self.product_links = LinkIndex.wrap(product_links)
+        logger.info(f"Асинхронный потоковый парсинг товаров для пользователя {self.user_id}")
+
+        results = []
+        work_queue.register_worker()
+        try:
+            # Для прохождения антибота нужен реальный артикул - ждем первый
+            first = work_queue.get(self.WORKER_ID)
+            if first is None:
+                return results
+            work_queue.release(first)
+
+            warmed = self._warm_cookies(first.key)
+            if warmed:
+                try:
+                    results = asyncio.run(self._parse_queue(work_queue))
+                finally:
+                    self._release_driver()
+        finally:
+            work_queue.unregister_worker()
+
+        if not warmed:
+            self._release_driver()
+            logger.warning("Не удалось получить cookies для асинхронного парсинга, переход на воркеры с браузерами")
+            return super().parse_stream(work_queue, product_links, num_workers)
+
+        self._store_in_cache(results)
+        return results
+
+    async def _parse_queue(self, work_queue: WorkQueue) -> List[ProductInfo]:
+        """Раздает артикулы из очереди задачам asyncio, не больше ASYNC_MAX_CONCURRENCY одновременно"""
+        loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        self._ready.set()
+        self._rewarm_lock = asyncio.Lock()
+        semaphore = asyncio.Semaphore(Settings.ASYNC_MAX_CONCURRENCY)
+        results: List[ProductInfo] = []
+        tasks = set()
+
+        async def process(item: WorkItem):
+            # Ошибка одного товара не должна прерывать gather и терять уже полученные результаты
+            try:
+                try:
+                    result = await self._process_article(session, item.key)
+                except Exception as e:
+                    logger.error(f"Критическая ошибка товара {item.key}: {e}")
+                    result = ProductInfo(article=item.key, error=str(e))
+                results.append(result)
+                if self.on_result:
+                    try:
+                        self.on_result(result)
+                    except Exception as e:
+                        logger.error(f"Ошибка обработки результата товара {item.key}: {e}")
+            finally:
+                work_queue.task_done(item)
+                semaphore.release()
+
+        async with self._create_session() as session:
+            while True:
+                await semaphore.acquire()
+                # get блокирует поток, пока в очереди нет артикулов, поэтому ждем его вне цикла событий
+                item = await loop.run_in_executor(None, work_queue.get, self.WORKER_ID)
+                if item is None:
+                    semaphore.release()
+                    break
+                task = asyncio.create_task(process(item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        logger.info(f"Асинхронный парсинг завершен: {len(results)} товаров, повторных прогревов {self.rewarms}")
+        return results
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=Settings.ASYNC_CONNECTION_LIMIT, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=Settings.HTTP_FETCH_TIMEOUT),
+            headers={
+                'Accept': 'application/json',
+                'Accept-Language': 'ru-RU,ru;q=0.9',
+                'Referer': 'https://www.ozon.ru/',
+            }
+        )
+        self._apply_cookies(session)
+        return session
+
+    def _apply_cookies(self, session: aiohttp.ClientSession):
+        session.cookie_jar.clear()
+        session.cookie_jar.update_cookies(self.cookies, response_url=URL(Settings.OZON_BASE_URL))
+
+    async def _process_article(self, session: aiohttp.ClientSession, article: str) -> ProductInfo:
+        retries = retry_engine.budget()
+
+        while True:
+            generation = self.generation
+            result, error_class = await self._fetch_product(session, article)
+            if result.success:
+                self._apply_link_image(result)
+                logger.debug(f"Товар {article} обработан успешно")
+                break
+
+            if error_class == BLOCK:
+                await self._rewarm(session, generation, article)
+
+            delay = retries.next_delay(error_class)
+            if delay is None:
+                logger.warning(f"Ошибка товара {article}: {result.error}")
+                break
+            await asyncio.sleep(delay)
+
+        return result
+
+    async def _fetch_product(self, session: aiohttp.ClientSession, article: str):
+        """Один запрос к API товара: (результат, класс ошибки для повтора)"""
+        # Пока браузер заново проходит антибот, новые запросы не отправляются
+        await self._ready.wait()
+        await rate_limiter.acquire_async()
+        try:
+            async with session.get(product_api_url(article), headers={'User-Agent': self.user_agent}) as response:
+                status = response.status
+                content_type = response.headers.get('Content-Type', '')
+                body = await response.read()
+        except asyncio.TimeoutError:
+            return ProductInfo(article=article, error="Таймаут запроса к API"), TIMEOUT
+        except aiohttp.ClientError as e:
+            return ProductInfo(article=article, error=f"Ошибка HTTP запроса: {e}"), TIMEOUT
+
+        if status in HttpFetcher.CHALLENGE_STATUSES or not ('json' in content_type or body.lstrip().startswith(b'{')):
+            rate_limiter.report_block()
+            return ProductInfo(article=article, error=f"Страница антибота (статус {status})"), BLOCK
+
+        if status != 200:
+            return ProductInfo(article=article, error=f"HTTP статус {status}"), PARSE_ERROR
+
+        rate_limiter.report_success()
+        result = await product_decoder.decode_async(article, body, self.decode_plan)
+        return result, NO_WIDGET_STATES if 'widgetStates' in result.error else PARSE_ERROR
+
+    async def _rewarm(self, session: aiohttp.ClientSession, generation: int, article: str):
+        """Заново проходит антибот в браузере; запросы, получившие блокировку одновременно, ждут одно прохождение"""
+        async with self._rewarm_lock:
+            if generation != self.generation or self.rewarms >= Settings.ASYNC_REWARM_LIMIT:
+                return
+            self.rewarms += 1
+            logger.info(f"Асинхронный парсинг получил страницу антибота, обновляем cookies ({self.rewarms}/{Settings.ASYNC_REWARM_LIMIT})")
+
+            self._ready.clear()
+            try:
+                warmed = await asyncio.get_running_loop().run_in_executor(None, self._warm_cookies, article)
+            finally:
+                self._ready.set()
+            if warmed:
+                self._apply_cookies(session)
+
+    def _warm_cookies(self, article: str) -> bool:
+        """Открывает API товара в браузере, проходит антибот и забирает cookies и user-agent"""
+        try:
+            if self.selenium_manager is not None and self.selenium_manager.blocked:
+                self._release_driver()
+            if self.selenium_manager is None:
+                if Settings.USE_DRIVER_POOL:
+                    self.selenium_manager = driver_pool.acquire()
+                else:
+                    self.selenium_manager = SeleniumManager()
+                    self.selenium_manager.create_api_driver()
+
+            if not self.selenium_manager.navigate_to_url(product_api_url(article)):
+                return False
+            if not self.selenium_manager.wait_for_json_response(timeout=30):
+                return False
+
+            fetcher = self.selenium_manager.http_fetcher
+            if not fetcher.load_from_driver(self.selenium_manager.driver):
+                return False
+            self.user_agent = fetcher.user_agent
+            self.cookies = {cookie.name: cookie.value for cookie in fetcher.session.cookies}
+            self.generation += 1
+            logger.info(f"Cookies для асинхронного парсинга получены: {len(self.cookies)}")
+            return True
+        except Exception as e:
+            logger.warning(f"Ошибка получения cookies для асинхронного парсинга: {e}")
+            return False
+
+    def _release_driver(self):
+        if self.selenium_manager is None:
+            return
+        if Settings.USE_DRIVER_POOL:
+            driver_pool.release(self.selenium_manager)
+        else:
+            self.selenium_manager.close()
+        self.selenium_manager = None
@@ -1,32 +1,85 @@
+import html
 import logging
 import time
 import json
 import re
+from dataclasses import dataclass
 from datetime import datetime
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from typing import Dict, Tuple
+from typing import Callable, Dict, Tuple, Optional
+from urllib.parse import urlsplit, quote
+from ..config.settings import Settings
 from ..utils.selenium_manager import SeleniumManager
+from ..utils.driver_pool import driver_pool
 from ..utils.resource_manager import resource_manager
+from ..utils.retry_policy import retry_engine, BLOCK, TIMEOUT
+from ..utils.link_index import LinkIndex, extract_article
+from .product_json import extract_price_number
 
 logger = logging.getLogger(__name__)
 
+@dataclass
+class ListingTile:
+    """Данные товара из плитки категории (только при сборе через composer-api)"""
+    name: str = ""
+    price: int = 0
+    original_price: int = 0
+
 class OzonLinkParser:
     
+    # Плитки помечаются data-seen после извлечения, чтобы не сканировать их повторно на каждом скролле.
+    # Плитки без ссылки или картинки (ленивая загрузка) не помечаются и проверяются снова.
+    EXTRACT_NEW_TILES_SCRIPT = """
+        const container = document.getElementById('contentScrollPaginator');
+        if (!container) return {};
+        const items = {};
+        container.querySelectorAll("[class*='tile-root']:not([data-seen])").forEach((tile) => {
+            const link = tile.querySelector("a[data-prerender='true']");
+            const img = tile.querySelector('img');
+            if (!link || !img || !link.href || !img.src) return;
+            if (link.href.startsWith('https://www.ozon.ru/product/')) {
+                items[link.href] = img.src;
+            }
+            tile.setAttribute('data-seen', '1');
+        });
+        return items;
+    """
+    
+    TILES_STATE_SCRIPT = """
+        const container = document.getElementById('contentScrollPaginator');
+        if (!container) return [0, false];
+        const tiles = container.querySelectorAll("[class*='tile-root']").length;
+        const loader = container.querySelector("[class*='loader'], [class*='spinner'], [class*='skeleton']");
+        return [tiles, loader !== null];
+    """
+    
     def __init__(self, category_url: str, max_products: int = 100, user_id: str = None):
         self.category_url = category_url
         self.max_products = max_products
         self.user_id = user_id
         self.selenium_manager = SeleniumManager()
         self.driver = None
-        self.collected_links = {}
+        self.collected_links = LinkIndex()
+        self.tiles: Dict[str, ListingTile] = {}  # article -> данные плитки
+        self.scroll_latencies = []
+        self.on_links = None
         
         self.category_name = self._extract_category_name(category_url)
         self.timestamp = datetime.now().strftime("%d.%m.%Y_%H-%M-%S")
         self.output_folder = f"{self.category_name}_{self.timestamp}"
     
+    def restore_links(self, links: Dict[str, str], output_folder: str = "") -> Tuple[bool, LinkIndex]:
+        """Берет ссылки из журнала прерванного запуска вместо повторного сбора"""
+        if output_folder:
+            self.output_folder = output_folder
+        self._create_output_folder()
+        self.collected_links = LinkIndex(links)
+        logger.info(f"Восстановлено {len(self.collected_links)} ссылок прерванного запуска")
+        return bool(self.collected_links), self.collected_links
+    
     def _extract_category_name(self, url: str) -> str:
         try:
             match = re.search(r'/category/([^/]+)-(\d+)/', url)
@@ -38,19 +91,33 @@ class OzonLinkParser:
         except Exception:
             return "unknown_category"
     
-    def start_parsing(self) -> Tuple[bool, Dict[str, str]]:
+    def start_parsing(self, on_links: Optional[Callable[[Dict[str, str]], None]] = None) -> Tuple[bool, LinkIndex]:
+        """
+        Собирает ссылки категории в LinkIndex, который затем используют все этапы.
+        on_links вызывается с каждой новой порцией ссылок сразу после ее сбора (потоковый режим);
+        в этом режиме сессией ресурсов управляет вызывающий код.
+        """
+        self.on_links = on_links
+        track_session = self.user_id and on_links is None
         try:
             # Регистрируем сессию парсинга ссылок
-            if self.user_id:
+            if track_session:
                 resource_manager.start_parsing_session(self.user_id, 'links', self.max_products)
             
             self._create_output_folder()
-            self.driver = self.selenium_manager.create_driver()
+            self._create_driver()
             
             if not self._load_page():
-                return False, {}
+                return False, LinkIndex()
             
-            self._collect_links()
+            if Settings.LINK_COLLECTION_MODE == 'api':
+                if not self._collect_links_via_api():
+                    logger.warning("Не удалось собрать ссылки через JSON API, переключаемся на скролл страницы")
+                    if not self._load_page():
+                        return False, LinkIndex()
+                    self._collect_links()
+            else:
+                self._collect_links()
             success = self._save_links()
             
             logger.info(f"Собрано {len(self.collected_links)} ссылок для пользователя {self.user_id}")
@@ -58,121 +125,264 @@ class OzonLinkParser:
             
         except Exception as e:
             logger.error(f"Ошибка парсинга ссылок: {e}")
-            return False, {}
+            return False, LinkIndex()
         finally:
             self._cleanup()
             # Завершаем сессию парсинга ссылок
-            if self.user_id:
+            if track_session:
                 resource_manager.finish_parsing_session(self.user_id)
     
     def _load_page(self) -> bool:
-        max_driver_retries = 3  # Максимум 3 драйвера
+        retries = retry_engine.budget()
+        driver_number = 1
         
-        for driver_attempt in range(max_driver_retries):
+        while True:
             try:
-                logger.info(f"Попытка загрузки страницы с драйвером #{driver_attempt + 1}/{max_driver_retries}")
+                logger.info(f"Попытка загрузки страницы с драйвером #{driver_number}")
                 
-                # Если это не первая попытка - пересоздаем драйвер
-                if driver_attempt > 0:
-                    logger.info(f"Пересоздание драйвера после блокировки (драйвер #{driver_attempt + 1})")
-                    self.selenium_manager.close()
-                    time.sleep(3)  # Пауза перед созданием нового драйвера
-                    self.driver = self.selenium_manager.create_driver()
-                
-                # Пытаемся перейти на URL (внутри 3 попытки перезагрузки страницы)
+                # Пытаемся перейти на URL (внутри попытки перезагрузки страницы)
                 if not self.selenium_manager.navigate_to_url(self.category_url):
-                    if driver_attempt < max_driver_retries - 1:
-                        logger.warning(f"Не удалось загрузить страницу с драйвером #{driver_attempt + 1}, попытка с новым драйвером...")
-                        continue
-                    return False
-                
-                # Ожидаем контейнер товаров
-                WebDriverWait(self.driver, 60).until(
-                    EC.presence_of_element_located((By.ID, "contentScrollPaginator"))
-                )
-                
-                logger.info(f"✓ Страница успешно загружена с драйвером #{driver_attempt + 1}")
-                return True
+                    logger.warning(f"Не удалось загрузить страницу с драйвером #{driver_number}")
+                    error_class = TIMEOUT
+                else:
+                    # Ожидаем контейнер товаров
+                    WebDriverWait(self.driver, 60).until(
+                        EC.presence_of_element_located((By.ID, "contentScrollPaginator"))
+                    )
+                    
+                    logger.info(f"✓ Страница успешно загружена с драйвером #{driver_number}")
+                    return True
                 
             except TimeoutException:
-                logger.error(f"Контейнер товаров не найден (драйвер #{driver_attempt + 1})")
-                if driver_attempt < max_driver_retries - 1:
-                    logger.info("Попытка с новым драйвером...")
-                    continue
-                return False
+                logger.error(f"Контейнер товаров не найден (драйвер #{driver_number})")
+                error_class = TIMEOUT
                 
             except Exception as e:
-                error_msg = str(e)
-                
-                # Если это ошибка блокировки после 3 попыток перезагрузки страницы
-                if "Access blocked" in error_msg:
-                    if driver_attempt < max_driver_retries - 1:
-                        logger.warning(f"Драйвер #{driver_attempt + 1} заблокирован после 3 попыток перезагрузки, пробуем новый драйвер...")
-                        continue  # Создадим новый драйвер на следующей итерации
-                    else:
-                        logger.error(f"Все {max_driver_retries} драйверов были заблокированы. Общее количество попыток: {max_driver_retries * 3}")
-                        return False
+                error_class = retry_engine.classify(e)
+                # Ошибка блокировки - после попыток перезагрузки страницы
+                if error_class == BLOCK:
+                    logger.warning(f"Драйвер #{driver_number} заблокирован после попыток перезагрузки")
                 else:
-                    logger.error(f"Ошибка загрузки страницы (драйвер #{driver_attempt + 1}): {e}")
-                    if driver_attempt < max_driver_retries - 1:
-                        logger.info("Попытка с новым драйвером...")
-                        continue
-                    return False
-        
-        logger.error(f"Не удалось загрузить страницу после {max_driver_retries} драйверов")
-        return False
+                    logger.error(f"Ошибка загрузки страницы (драйвер #{driver_number}): {e}")
+            
+            if not retries.retry(error_class):
+                logger.error(f"Не удалось загрузить страницу, использовано драйверов: {driver_number}")
+                return False
+            
+            # Следующая попытка - с новым драйвером
+            driver_number += 1
+            logger.info(f"Пересоздание драйвера (драйвер #{driver_number})")
+            self.selenium_manager.blocked = True
+            self._cleanup()
+            self._create_driver()
     
     def _collect_links(self):
         seen_urls = set()
         scroll_num = 0
         no_new_items_count = 0
+        last_growth_time = time.time()
 
         while len(self.collected_links) < self.max_products:
             scroll_num += 1
-            current_items = self._extract_all_links()
+            current_items = self._extract_new_links()
 
-            new_count = 0
+            new_links = {}
             for url, img_url in current_items.items():
                 if url not in seen_urls and len(self.collected_links) < self.max_products:
                     seen_urls.add(url)
                     self.collected_links[url] = img_url
-                    new_count += 1
+                    new_links[url] = img_url
+            new_count = len(new_links)
+            self._emit_links(new_links)
 
             logger.info(f"Скролл {scroll_num}: +{new_count}, всего {len(self.collected_links)}/{self.max_products}")
 
             if new_count == 0:
                 no_new_items_count += 1
-                if no_new_items_count >= 3:
+                # Останавливаемся только если лента не растет дольше окна ожидания
+                stalled_for = time.time() - last_growth_time
+                if no_new_items_count >= 3 and stalled_for >= Settings.SCROLL_STALL_SECONDS:
                     break
             else:
                 no_new_items_count = 0
+                last_growth_time = time.time()
 
             if len(self.collected_links) >= self.max_products:
                 break
 
+            tiles_before = self._get_tiles_state()[0]
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(8)    
+            self._wait_for_new_tiles(tiles_before)
+
+        if self.scroll_latencies:
+            avg_latency = sum(self.scroll_latencies) / len(self.scroll_latencies)
+            logger.info(f"Средняя задержка подгрузки плиток: {avg_latency:.1f}с ({len(self.scroll_latencies)} скроллов)")
+    
+    def _wait_for_new_tiles(self, tiles_before: int) -> bool:
+        """Ждет роста числа плиток или исчезновения индикатора загрузки, но не дольше адаптивного таймаута"""
+        timeout = self._get_scroll_timeout()
+        start_time = time.time()
+        loader_seen = False
+
+        while time.time() - start_time < timeout:
+            time.sleep(Settings.SCROLL_POLL_INTERVAL)
+            tiles_count, is_loading = self._get_tiles_state()
+
+            if tiles_count > tiles_before:
+                self.scroll_latencies.append(time.time() - start_time)
+                return True
+
+            if is_loading:
+                loader_seen = True
+            elif loader_seen:
+                # Подгрузка завершилась, а новых плиток нет - дальше ждать бессмысленно
+                return False
+
+        return False
+    
+    def _get_scroll_timeout(self) -> float:
+        if not self.scroll_latencies:
+            return Settings.SCROLL_WAIT_TIMEOUT
+        recent = sorted(self.scroll_latencies[-10:])
+        median = recent[len(recent) // 2]
+        return min(Settings.SCROLL_WAIT_TIMEOUT, max(Settings.SCROLL_WAIT_MIN, median * 3))
+    
+    def _get_tiles_state(self) -> Tuple[int, bool]:
+        try:
+            state = self.driver.execute_script(self.TILES_STATE_SCRIPT)
+            return int(state[0]), bool(state[1])
+        except Exception:
+            return 0, False
+    
+    def _collect_links_via_api(self) -> bool:
+        """Обходит страницы категории через composer-api по курсору nextPage"""
+        # Страница категории уже загружена в браузере - cookies прошли антибот
+        self.selenium_manager.sync_http_session()
+        
+        page_path = self._get_category_path()
+        visited_pages = set()
+        page_num = 0
+        
+        while page_path and page_path not in visited_pages and len(self.collected_links) < self.max_products:
+            visited_pages.add(page_path)
+            page_num += 1
+            
+            page_data = self._fetch_page_json(page_path)
+            if page_data is None:
+                logger.warning(f"Страница {page_num} категории не получена через API")
+                break
+            
+            new_links = {}
+            for url, img_url in self._extract_links_from_page(page_data).items():
+                if url not in self.collected_links and len(self.collected_links) < self.max_products:
+                    self.collected_links[url] = img_url
+                    new_links[url] = img_url
+            new_count = len(new_links)
+            self._emit_links(new_links)
+            
+            logger.info(f"Страница {page_num}: +{new_count}, всего {len(self.collected_links)}/{self.max_products}")
+            
+            if new_count == 0:
+                break
+            
+            page_path = self._find_next_page(page_data)
+        
+        return len(self.collected_links) > 0
+    
+    def _emit_links(self, new_links: Dict[str, str]):
+        if self.on_links and new_links:
+            self.on_links(new_links)
     
-    def _extract_all_links(self) -> Dict[str, str]:
+    def _get_category_path(self) -> str:
+        parts = urlsplit(self.category_url)
+        return f"{parts.path}?{parts.query}" if parts.query else parts.path
+    
+    def _fetch_page_json(self, page_path: str) -> Optional[Dict]:
+        api_url = f"{Settings.OZON_API_URL}?url={quote(page_path, safe='/')}"
+        
+        json_content = self.selenium_manager.fetch_json_via_http(api_url)
+        if not json_content:
+            if not self.selenium_manager.navigate_to_url(api_url):
+                return None
+            json_content = self.selenium_manager.wait_for_json_response(timeout=30)
+            if not json_content:
+                return None
+            self.selenium_manager.sync_http_session()
+        
         try:
-            container = self.driver.find_element(By.ID, "contentScrollPaginator")
-            elements = container.find_elements(By.CSS_SELECTOR, "[class*='tile-root']")
+            return json.loads(json_content)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Ошибка разбора JSON страницы категории: {e}")
+            return None
+    
+    def _extract_links_from_page(self, page_data: Dict) -> Dict[str, str]:
+        items = {}
+        
+        for key, value in page_data.get('widgetStates', {}).items():
+            if not key.startswith(('searchResultsV2-', 'tileGridDesktop-')) or not isinstance(value, str):
+                continue
+            try:
+                widget = json.loads(value)
+            except json.JSONDecodeError:
+                continue
             
-            items = {}
-            for element in elements:
+            for item in widget.get('items', []):
+                link = item.get('action', {}).get('link', '')
+                if not link.startswith('/product/'):
+                    continue
+                img_url = self._extract_tile_image(item)
+                if img_url:
+                    url = Settings.OZON_BASE_URL + link.split('?', 1)[0]
+                    items[url] = img_url
+                    article = extract_article(url)
+                    if article and article not in self.tiles:
+                        self.tiles[article] = self._extract_tile_info(item)
+        
+        return items
+    
+    def _extract_tile_info(self, item: Dict) -> ListingTile:
+        """Название и цены из mainState плитки: textAtom с id name и атом priceV2"""
+        tile = ListingTile()
+        for state in item.get('mainState', []):
+            if not isinstance(state, dict):
+                continue
+            atom = state.get('atom', {})
+            if state.get('id') == 'name' and not tile.name:
+                tile.name = html.unescape(atom.get('textAtom', {}).get('text', ''))
+            elif atom.get('type') == 'priceV2':
+                for price_item in atom.get('priceV2', {}).get('price', []):
+                    style = price_item.get('textStyle', '')
+                    if style == 'PRICE' and not tile.price:
+                        tile.price = extract_price_number(price_item.get('text', ''))
+                    elif style == 'ORIGINAL_PRICE' and not tile.original_price:
+                        tile.original_price = extract_price_number(price_item.get('text', ''))
+        return tile
+    
+    def _extract_tile_image(self, item: Dict) -> str:
+        for image_item in item.get('tileImage', {}).get('items', []):
+            link = image_item.get('image', {}).get('link', '')
+            if link:
+                return link
+        return ''
+    
+    def _find_next_page(self, page_data: Dict) -> str:
+        next_page = page_data.get('nextPage', '')
+        if next_page:
+            return next_page
+        
+        for key, value in page_data.get('widgetStates', {}).items():
+            if key.startswith('megaPaginator-') and isinstance(value, str):
                 try:
-                    link_element = element.find_element(By.CSS_SELECTOR, "a[data-prerender='true']")
-                    href = link_element.get_attribute("href")
-                    
-                    img_element = element.find_element(By.CSS_SELECTOR, "img")
-                    img_url = img_element.get_attribute("src")
-                    
-                    if href and href.startswith("https://www.ozon.ru/product/") and img_url:
-                        items[href] = img_url
-                except Exception:
+                    return json.loads(value).get('nextPage', '')
+                except json.JSONDecodeError:
                     continue
-                
-            return items
+        return ''
+    
+    def _extract_new_links(self) -> Dict[str, str]:
+        """Возвращает только плитки, появившиеся после предыдущего вызова (один round-trip к браузеру)"""
+        try:
+            items = self.driver.execute_script(self.EXTRACT_NEW_TILES_SCRIPT)
+            return items or {}
         except Exception as e:
             logger.warning(f"Ошибка извлечения ссылок: {e}")
             return {}
@@ -198,13 +408,21 @@ class OzonLinkParser:
             logger.error(f"Ошибка сохранения ссылок: {e}")
             return False
     
+    def _create_driver(self):
+        if Settings.USE_DRIVER_POOL:
+            self.selenium_manager = driver_pool.acquire()
+            self.driver = self.selenium_manager.driver
+        else:
+            self.driver = self.selenium_manager.create_api_driver()
+    
     def _cleanup(self):
         if self.selenium_manager:
-            self.selenium_manager.close()
+            if Settings.USE_DRIVER_POOL and self.driver:
+                # Драйвер уже прошел антибот - отдаем его воркерам следующего этапа
+                driver_pool.release(self.selenium_manager)
+            else:
+                self.selenium_manager.close()
+            self.driver = None
     
     def get_article_from_url(self, url: str) -> str:
-        try:
-            match = re.search(r'/product/[^/]+-(\d+)/', url)
-            return match.group(1) if match else ""
-        except Exception:
-            return ""
\ No newline at end of file
+        return extract_article(url)
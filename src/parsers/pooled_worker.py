@@ -0,0 +1,157 @@
+"""
+Общая часть воркеров товаров и продавцов: драйвер из пула, учет его здоровья и разбор общей очереди
+"""
+import concurrent.futures
+import logging
+import time
+from typing import Callable, List, Optional
+from ..config.settings import Settings
+from ..utils.selenium_manager import SeleniumManager
+from ..utils.driver_pool import driver_pool
+from ..utils.work_queue import WorkQueue
+from ..utils.retry_policy import retry_engine, BLOCK, DRIVER_CRASH
+
+logger = logging.getLogger(__name__)
+
+class PooledWorker:
+    """
+    Воркер с одним драйвером: забирает элементы из общей очереди, неудачные возвращает другим воркерам,
+    после каждого элемента сообщает пулу результат и заранее меняет заблокированный или деградировавший драйвер.
+    Подклассы реализуют _process_item.
+    """
+
+    LABEL = "Воркер"
+    LABEL_GENITIVE = "воркера"
+
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.selenium_manager = SeleniumManager()
+        self.driver = None
+        logger.info(f"{self.LABEL} {worker_id} инициализирован")
+
+    def initialize(self):
+        try:
+            if Settings.USE_DRIVER_POOL:
+                self.selenium_manager = driver_pool.acquire()
+                self.driver = self.selenium_manager.driver
+            else:
+                self.driver = self.selenium_manager.create_api_driver()
+            logger.info(f"{self.LABEL} {self.worker_id} готов к работе")
+        except Exception as e:
+            logger.error(f"Ошибка инициализации {self.LABEL_GENITIVE} {self.worker_id}: {e}")
+            raise
+
+    def parse_from_queue(self, work_queue: WorkQueue, on_result: Optional[Callable] = None) -> List:
+        """Забирает элементы из общей очереди, пока она не опустеет; неудачные возвращает другим воркерам"""
+        results = []
+
+        while True:
+            item = work_queue.get(self.worker_id)
+            if item is None:
+                break
+
+            started = time.time()
+            manager = self.selenium_manager
+            challenges_before = manager.challenges
+            wait_before = manager.wait_seconds
+            try:
+                result = self._process_item(item.key)
+            except BaseException:
+                # Воркер падает - отдаем элемент остальным
+                work_queue.release(item)
+                raise
+
+            if result.success or not work_queue.requeue(item, self.worker_id):
+                results.append(result)
+                work_queue.task_done(item)
+                if on_result:
+                    on_result(result)
+
+            # Ожидание ограничителя частоты и паузы перед повторами не зависят от драйвера:
+            # при замедлении сайта иначе деградировали бы сразу все драйверы пула
+            latency = time.time() - started - (manager.wait_seconds - wait_before)
+            driver_pool.report(manager, result.success, max(0.0, latency),
+                               challenged=manager.challenges > challenges_before)
+            self._recycle_driver_if_unhealthy()
+
+        return results
+
+    def _process_item(self, key: str):
+        raise NotImplementedError
+
+    def _recycle_driver_if_unhealthy(self):
+        if not Settings.USE_DRIVER_POOL:
+            return
+        if self.selenium_manager.blocked or driver_pool.is_degraded(self.selenium_manager):
+            # Деградировавший драйвер меняем заранее, не дожидаясь блокировки
+            logger.warning(f"{self.LABEL} {self.worker_id}: драйвер заблокирован или деградировал, берем новый из пула")
+            # Сначала берем замену: если acquire упадет, воркер закроет и вернет в пул только старый драйвер
+            replacement = driver_pool.acquire()
+            old_manager, self.selenium_manager = self.selenium_manager, replacement
+            self.driver = replacement.driver
+            driver_pool.release(old_manager)
+
+    def close(self):
+        if self.selenium_manager:
+            if Settings.USE_DRIVER_POOL and self.driver:
+                driver_pool.release(self.selenium_manager)
+            else:
+                self.selenium_manager.close()
+        logger.info(f"{self.LABEL} {self.worker_id} закрыт")
+
+class WorkerPoolMixin:
+    """
+    Запуск воркеров парсера над общей очередью; воркер, остановленный блокировкой или падением драйвера,
+    пересоздается в пределах бюджета повторов. Подклассы реализуют _create_worker и задают self.on_result.
+    """
+
+    WORKER_LABEL = "Воркер"
+    WORKER_LABEL_GENITIVE = "воркера"
+    ITEMS_LABEL = "элементами"
+
+    def _create_worker(self, worker_id: int) -> PooledWorker:
+        raise NotImplementedError
+
+    def _run_workers(self, work_queue: WorkQueue, num_workers: int) -> List:
+        all_results = []
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
+            future_to_worker = {}
+
+            for i in range(num_workers):
+                future = executor.submit(self._worker_task_with_retry, i + 1, work_queue)
+                future_to_worker[future] = i + 1
+
+            for future in concurrent.futures.as_completed(future_to_worker):
+                worker_id = future_to_worker[future]
+                try:
+                    results = future.result()
+                    all_results.extend(results)
+                    logger.info(f"{self.WORKER_LABEL} {worker_id} завершил работу с {len(results)} {self.ITEMS_LABEL}")
+                except Exception as e:
+                    logger.error(f"Ошибка {self.WORKER_LABEL_GENITIVE} {worker_id}: {e}")
+
+        return all_results
+
+    def _worker_task_with_retry(self, worker_id: int, work_queue: WorkQueue) -> List:
+        retries = retry_engine.budget()
+        results = []
+        work_queue.register_worker()
+        try:
+            while True:
+                worker = self._create_worker(worker_id)
+                try:
+                    worker.initialize()
+                    results.extend(worker.parse_from_queue(work_queue, self.on_result))
+                    return results
+                except Exception as e:
+                    error_class = retry_engine.classify(e)
+                    if error_class in (BLOCK, DRIVER_CRASH) and retries.retry(error_class):
+                        logger.warning(f"{self.WORKER_LABEL} {worker_id} остановлен ({error_class}), пересоздаем")
+                        continue
+                    raise
+                finally:
+                    # Гарантируем закрытие воркера в любом случае
+                    worker.close()
+        finally:
+            work_queue.unregister_worker()
@@ -0,0 +1,83 @@
+"""
+Разбор ответов API товаров в пуле процессов: при высокой частоте запросов json.loads не упирается в GIL
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import astuple
+from typing import Optional, Tuple, Union
+from ..config.settings import Settings
+from .product_json import FULL_PLAN, DecodePlan, ProductInfo, parse_product_json
+
+logger = logging.getLogger(__name__)
+
+def _init_process():
+    # Предупреждения о разборе отдельных товаров в дочерних процессах не выводим:
+    # логирование настроено только в основном процессе
+    logging.disable(logging.WARNING)
+
+def _decode(article: str, body: Union[str, bytes], plan: DecodePlan) -> Tuple:
+    """Выполняется в дочернем процессе; обратно передается кортеж полей вместо объекта"""
+    return astuple(parse_product_json(article, body, plan))
+
+class ProductDecoder:
+    """
+    Разбор ответов больше JSON_DECODE_MIN_BYTES уходит в пул из JSON_DECODE_PROCESSES процессов,
+    небольшие ответы дешевле разобрать на месте, чем передавать между процессами.
+    При JSON_DECODE_PROCESSES = 0 все ответы разбираются в потоке вызывающего.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def decode(self, article: str, body: Union[str, bytes], plan: DecodePlan = FULL_PLAN) -> ProductInfo:
+        executor = self._get_executor(body)
+        if executor is None:
+            return parse_product_json(article, body, plan)
+        try:
+            return ProductInfo(*executor.submit(_decode, article, body, plan).result())
+        except BrokenProcessPool:
+            self._reset(executor)
+            return parse_product_json(article, body, plan)
+
+    async def decode_async(self, article: str, body: Union[str, bytes], plan: DecodePlan = FULL_PLAN) -> ProductInfo:
+        executor = self._get_executor(body)
+        if executor is None:
+            return parse_product_json(article, body, plan)
+        try:
+            fields = await asyncio.get_running_loop().run_in_executor(executor, _decode, article, body, plan)
+            return ProductInfo(*fields)
+        except BrokenProcessPool:
+            self._reset(executor)
+            return parse_product_json(article, body, plan)
+
+    def _get_executor(self, body: Union[str, bytes]) -> Optional[ProcessPoolExecutor]:
+        if Settings.JSON_DECODE_PROCESSES <= 0 or len(body) < Settings.JSON_DECODE_MIN_BYTES:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=Settings.JSON_DECODE_PROCESSES, initializer=_init_process
+                )
+                logger.info(f"Пул разбора JSON запущен: {Settings.JSON_DECODE_PROCESSES} процессов")
+            return self._executor
+
+    def _reset(self, executor: ProcessPoolExecutor):
+        """Дочерний процесс упал - пул пересоздается при следующем большом ответе"""
+        logger.warning("Пул разбора JSON поврежден, ответ разобран в текущем потоке")
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+# Глобальный экземпляр для всех воркеров и движков
+product_decoder = ProductDecoder()
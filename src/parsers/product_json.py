@@ -0,0 +1,178 @@
+"""
+Разбор ответа composer-api товара. Модуль не зависит от Selenium, поэтому его быстро импортируют процессы разбора JSON
+"""
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+from ..config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ProductInfo:
+    article: str
+    name: str = ""
+    company_name: str = ""
+    company_inn: str = ""
+    image_url: str = ""
+    card_price: int = 0
+    price: int = 0
+    original_price: int = 0
+    seller_id: str = ""
+    seller_link: str = ""
+    success: bool = False
+    error: str = ""
+    from_cache: bool = False
+
+# Поля выгрузки по источнику данных в ответе API товара
+PRICE_FIELDS = frozenset({'card_price', 'price', 'original_price'})
+STICKY_FIELDS = frozenset({'name', 'seller_name', 'image_url'})
+# Поля, для которых нужен этап продавцов (а значит seller_id товара)
+SELLER_FIELDS = frozenset({'inn', 'company_name', 'seller_name', 'orders_count', 'reviews_count',
+                           'average_rating', 'working_time'})
+
+STICKY_PREFIX = 'webStickyProducts-'
+PRICE_PREFIX = 'webPrice-'
+
+SELLER_LINK_PATTERN = re.compile(r'/seller/(?:[^/]*-)?(\d+)/?')
+
+@dataclass(frozen=True)
+class DecodePlan:
+    """Какие виджеты разбирать: webStickyProducts (название, продавец), webPrice (цены) и поиск seller_id"""
+    sticky: bool = True
+    price: bool = True
+    seller: bool = True
+
+    @property
+    def complete(self) -> bool:
+        return self.sticky and self.price and self.seller
+
+    @classmethod
+    def for_fields(cls, selected_fields: Optional[Iterable[str]]) -> 'DecodePlan':
+        """План для выбранных полей; без выбора разбирается все"""
+        if not selected_fields:
+            return FULL_PLAN
+        fields = set(selected_fields)
+        price = bool(fields & PRICE_FIELDS)
+        seller = bool(fields & SELLER_FIELDS)
+        # Без webStickyProducts успешность товара определяется по цене, поэтому без цен он нужен всегда
+        sticky = seller or bool(fields & STICKY_FIELDS) or not price
+        return cls(sticky=sticky, price=price, seller=seller)
+
+FULL_PLAN = DecodePlan()
+
+def product_api_url(article: str) -> str:
+    return f"{Settings.OZON_API_URL}?url=/product/{article}&__rr=1"
+
+def parse_product_json(article: str, json_content: str, plan: DecodePlan = FULL_PLAN) -> ProductInfo:
+    """
+    Разбор ответа composer-api товара (str или bytes); общий для браузерных воркеров и асинхронного движка.
+    widgetStates обходится один раз, декодируются только строки виджетов, нужные плану.
+    """
+    try:
+        data = json.loads(json_content)
+
+        if 'widgetStates' not in data:
+            return ProductInfo(article=article, error="Отсутствует widgetStates в ответе")
+
+        widget_states = data['widgetStates']
+        product_info = ProductInfo(article=article)
+        sticky_product_data, price_data = _find_widgets(widget_states, plan)
+
+        # Информация о товаре из webStickyProducts
+        if sticky_product_data:
+            product_info.name = sticky_product_data.get('name', '')
+            product_info.image_url = sticky_product_data.get('coverImageUrl', '')
+
+            # Информация о продавце
+            seller_info = sticky_product_data.get('seller', {})
+            product_info.company_name = seller_info.get('name', '')
+            product_info.company_inn = seller_info.get('inn', '')
+
+            # Извлекаем ID и ссылку продавца
+            seller_link = seller_info.get('link', '')
+            if plan.seller and seller_link:
+                # Ищем seller_id в разных форматах: /seller/123456/ или /seller/name-123456/
+                seller_id = SELLER_LINK_PATTERN.search(seller_link)
+                if seller_id:
+                    product_info.seller_id = seller_id.group(1)
+                    product_info.seller_link = f"https://ozon.ru/seller/{seller_id.group(1)}"
+                    logger.debug(f"Найден seller_id из sticky_product_data: {product_info.seller_id}")
+                else:
+                    logger.debug(f"Не удалось извлечь seller_id из ссылки: {seller_link}")
+
+        # Резервный поиск seller_id по строкам виджетов, если не нашли в sticky_product_data
+        if plan.seller and not product_info.seller_id:
+            seller_id = _scan_seller_id(widget_states)
+            if seller_id:
+                product_info.seller_id = seller_id
+                product_info.seller_link = f"https://ozon.ru/seller/{seller_id}"
+                logger.info(f"Найден seller_id через резервный поиск для товара {article}: {product_info.seller_id}")
+            else:
+                logger.warning(f"seller_id не найден ни в sticky_product_data, ни в резервном поиске для товара {article}")
+
+        # Цены из webPrice
+        if price_data:
+            product_info.card_price = extract_price_number(price_data.get('cardPrice', ''))
+            product_info.price = extract_price_number(price_data.get('price', ''))
+            product_info.original_price = extract_price_number(price_data.get('originalPrice', ''))
+
+        # Проверяем, что получили основную информацию
+        if product_info.name or product_info.card_price or (not plan.sticky and product_info.price):
+            product_info.success = True
+        else:
+            product_info.error = "Не найдена основная информация о товаре"
+
+        return product_info
+
+    except json.JSONDecodeError as e:
+        return ProductInfo(article=article, error=f"Ошибка парсинга JSON: {str(e)}")
+    except Exception as e:
+        return ProductInfo(article=article, error=f"Ошибка обработки данных: {str(e)}")
+
+def _find_widgets(widget_states: Dict, plan: DecodePlan) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """Один проход по ключам: первый разбираемый webStickyProducts и webPrice, если они нужны плану"""
+    sticky_product_data = None
+    price_data = None
+    need_sticky = plan.sticky
+    need_price = plan.price
+
+    for key, value in widget_states.items():
+        if not (need_sticky or need_price):
+            break
+        if not isinstance(value, str):
+            continue
+        if need_sticky and key.startswith(STICKY_PREFIX):
+            sticky_product_data = _loads_widget(value)
+            need_sticky = sticky_product_data is None
+        elif need_price and key.startswith(PRICE_PREFIX):
+            price_data = _loads_widget(value)
+            need_price = price_data is None
+
+    return sticky_product_data, price_data
+
+def _loads_widget(value: str) -> Optional[Dict]:
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return None
+
+def _scan_seller_id(widget_states: Dict) -> str:
+    """Первая ссылка на продавца в виджетах; строки виджетов уже JSON и не сериализуются заново"""
+    for value in widget_states.values():
+        text = value if isinstance(value, str) else json.dumps(value)
+        match = SELLER_LINK_PATTERN.search(text)
+        if match:
+            return match.group(1)
+    return ""
+
+def extract_price_number(price_str: str) -> int:
+    if not price_str:
+        return 0
+    try:
+        cleaned = re.sub(r'[^\d]', '', str(price_str))
+        return int(cleaned) if cleaned else 0
+    except:
+        return 0
@@ -2,12 +2,15 @@ import logging
 import json
 import re
 import time
-import concurrent.futures
 import html
-from typing import List, Dict, Optional, Set, Tuple
+from typing import Callable, List, Dict, Optional, Set, Tuple
 from dataclasses import dataclass
-from ..utils.selenium_manager import SeleniumManager
+from ..config.settings import Settings
+from ..utils.work_queue import WorkQueue
+from ..utils.retry_policy import retry_engine, NO_WIDGET_STATES, PARSE_ERROR, TIMEOUT
+from ..utils.seller_cache import get_seller_cache
 from ..utils.resource_manager import resource_manager
+from .pooled_worker import PooledWorker, WorkerPoolMixin
 
 logger = logging.getLogger(__name__)
 
@@ -25,82 +28,67 @@ class SellerInfo:
     error: str = ""
 
 
-class SellerWorker:
-    def __init__(self, worker_id: int):
-        self.worker_id = worker_id
-        self.selenium_manager = SeleniumManager()
-        self.driver = None
-        logger.info(f"Воркер продавцов {worker_id} инициализирован")
+class SellerWorker(PooledWorker):
 
-    def initialize(self):
-        try:
-            self.driver = self.selenium_manager.create_driver()
-            logger.info(f"Воркер продавцов {self.worker_id} готов к работе")
-        except Exception as e:
-            logger.error(f"Ошибка инициализации воркера продавцов {self.worker_id}: {e}")
-            raise
+    LABEL = "Воркер продавцов"
+    LABEL_GENITIVE = "воркера продавцов"
 
     def parse_sellers(self, seller_ids: List[str]) -> List[SellerInfo]:
-        results = []
+        return self.parse_from_queue(WorkQueue(seller_ids, max_attempts=1))
 
-        for seller_id in seller_ids:
-            try:
-                result = self._parse_single_seller(seller_id)
-                results.append(result)
+    def _process_item(self, seller_id: str) -> SellerInfo:
+        return self._process_seller(seller_id)
 
-                if result.success:
-                    logger.info(f"Воркер {self.worker_id}: Продавец {seller_id} обработан успешно")
-                else:
-                    logger.warning(f"Воркер {self.worker_id}: Ошибка продавца {seller_id}: {result.error}")
+    def _process_seller(self, seller_id: str) -> SellerInfo:
+        try:
+            result = self._parse_single_seller(seller_id)
 
-            except Exception as e:
-                logger.error(f"Воркер {self.worker_id}: Критическая ошибка продавца {seller_id}: {e}")
-                results.append(SellerInfo(seller_id=seller_id, error=str(e)))
+            if result.success:
+                logger.info(f"Воркер {self.worker_id}: Продавец {seller_id} обработан успешно")
+            else:
+                logger.warning(f"Воркер {self.worker_id}: Ошибка продавца {seller_id}: {result.error}")
 
-            time.sleep(1.5)
+            return result
 
-        return results
+        except Exception as e:
+            logger.error(f"Воркер {self.worker_id}: Критическая ошибка продавца {seller_id}: {e}")
+            return SellerInfo(seller_id=seller_id, error=str(e))
 
     def _parse_single_seller(self, seller_id: str) -> SellerInfo:
-        max_retries = 3
+        retries = retry_engine.budget()
 
-        for attempt in range(max_retries):
+        while True:
             try:
                 api_url = f"https://www.ozon.ru/api/entrypoint-api.bx/page/json/v2?url=/modal/shop-in-shop-info?seller_id={seller_id}&__rr=1"
 
-                if not self.selenium_manager.navigate_to_url(api_url):
-                    if attempt < max_retries - 1:
-                        time.sleep(5)
-                        continue
-                    return SellerInfo(seller_id=seller_id, error="Не удалось загрузить страницу API")
-
-                json_content = self.selenium_manager.wait_for_json_response(timeout=30)
+                json_content = self.selenium_manager.fetch_json_via_http(api_url)
 
                 if not json_content:
-                    if attempt < max_retries - 1:
-                        time.sleep(5)
-                        continue
-                    return SellerInfo(seller_id=seller_id, error="Не получен JSON ответ")
-
-                seller_info = self._parse_json_response(seller_id, json_content)
-
-                if seller_info.success:
-                    return seller_info
-                elif attempt < max_retries - 1:
-                    time.sleep(5)
-                    continue
-                else:
-                    return seller_info
+                    if not self.selenium_manager.navigate_to_url(api_url):
+                        result = SellerInfo(seller_id=seller_id, error="Не удалось загрузить страницу API")
+                        error_class = TIMEOUT
+                    else:
+                        json_content = self.selenium_manager.wait_for_json_response(timeout=30)
+                        if not json_content:
+                            result = SellerInfo(seller_id=seller_id, error="Не получен JSON ответ")
+                            error_class = TIMEOUT
+                        else:
+                            self.selenium_manager.sync_http_session()
+
+                if json_content:
+                    result = self._parse_json_response(seller_id, json_content)
+                    if result.success:
+                        return result
+                    error_class = NO_WIDGET_STATES if 'widgetStates' in result.error else PARSE_ERROR
 
             except Exception as e:
-                if attempt < max_retries - 1:
-                    logger.debug(f"Попытка {attempt + 1} неудачна для продавца {seller_id}: {e}")
-                    time.sleep(5)
-                    continue
-                else:
-                    return SellerInfo(seller_id=seller_id, error=f"Ошибка парсинга: {str(e)}")
+                logger.debug(f"Попытка неудачна для продавца {seller_id}: {e}")
+                result = SellerInfo(seller_id=seller_id, error=f"Ошибка парсинга: {str(e)}")
+                error_class = retry_engine.classify(e)
 
-        return SellerInfo(seller_id=seller_id, error="Превышено количество попыток")
+            # Заблокированный драйвер не повторяем - продавец уйдет другому воркеру
+            if self.selenium_manager.blocked or not self.selenium_manager.backoff(retries, error_class):
+                return result
 
     def _parse_json_response(self, seller_id: str, json_content: str) -> SellerInfo:
         try:
@@ -399,16 +387,21 @@ class SellerWorker:
         except Exception:
             return result
 
-    def close(self):
-        if self.selenium_manager:
-            self.selenium_manager.close()
-        logger.info(f"Воркер продавцов {self.worker_id} закрыт")
+class OzonSellerParser(WorkerPoolMixin):
 
+    WORKER_LABEL = "Воркер продавцов"
+    WORKER_LABEL_GENITIVE = "воркера продавцов"
+    ITEMS_LABEL = "продавцами"
 
-class OzonSellerParser:
-    def __init__(self, max_workers: int = 5, user_id: str = None):
+    def __init__(self, max_workers: int = 5, user_id: str = None,
+                 on_result: Optional[Callable[[SellerInfo], None]] = None,
+                 selected_fields: Optional[List[str]] = None,
+                 completed_results: Optional[Dict[str, SellerInfo]] = None):
         self.max_workers = max_workers
         self.user_id = user_id
+        self.on_result = on_result  # Вызывается из потоков воркеров для каждого готового продавца
+        self.selected_fields = selected_fields  # Определяет, свежесть каких групп полей кэша нужна
+        self.completed_results = completed_results or {}  # Продавцы из журнала прерванного запуска
         logger.info(f"Парсер продавцов инициализирован с макс {max_workers} воркерами для пользователя {user_id}")
 
     def parse_sellers(self, seller_ids: List[str]) -> List[SellerInfo]:
@@ -418,6 +411,54 @@ class OzonSellerParser:
             logger.error("Не найдено ID продавцов для парсинга")
             return []
 
+        # Свежие продавцы берутся из кэша, воркерам уходят только промахи
+        cached, unique_seller_ids = self.lookup_cached(unique_seller_ids)
+        if self.on_result:
+            for result in cached.values():
+                self.on_result(result)
+        if not unique_seller_ids:
+            logger.info(f"Все {len(cached)} продавцов уже получены ранее")
+            return list(cached.values())
+
+        results = self._parse_uncached(unique_seller_ids)
+        self._store_in_cache(results)
+        return list(cached.values()) + results
+
+    def lookup_cached(self, seller_ids: List[str]) -> Tuple[Dict[str, SellerInfo], List[str]]:
+        """Делит продавцов на уже готовых (журнал прерванного запуска, кэш) и тех, кого нужно парсить"""
+        done = {seller_id: self.completed_results[seller_id]
+                for seller_id in seller_ids if seller_id in self.completed_results}
+        seller_ids = [seller_id for seller_id in seller_ids if seller_id not in done]
+
+        if not Settings.SELLER_CACHE_ENABLED or not seller_ids:
+            return done, seller_ids
+
+        try:
+            cache = get_seller_cache()
+            groups = cache.groups_for_fields(self.selected_fields)
+            if not groups:
+                # Выбранным полям не нужны данные страницы продавца - поиск в кэше не нужен
+                return done, seller_ids
+            cached = cache.get_many(seller_ids, groups)
+        except Exception as e:
+            logger.warning(f"Ошибка чтения кэша продавцов: {e}")
+            return done, seller_ids
+
+        if cached:
+            logger.info(f"Кэш продавцов: {len(cached)} попаданий, {len(seller_ids) - len(cached)} промахов")
+        done.update(cached)
+        return done, [seller_id for seller_id in seller_ids if seller_id not in cached]
+
+    def _store_in_cache(self, results: List[SellerInfo]):
+        if not Settings.SELLER_CACHE_ENABLED:
+            return
+        try:
+            get_seller_cache().put_many(results)
+        except Exception as e:
+            logger.warning(f"Ошибка записи в кэш продавцов: {e}")
+
+    def _parse_uncached(self, unique_seller_ids: List[str]) -> List[SellerInfo]:
+
         # Получаем количество воркеров от менеджера ресурсов
         if self.user_id:
             allocated_workers = resource_manager.start_parsing_session(
@@ -433,13 +474,16 @@ class OzonSellerParser:
         else:
             return self._parse_multiple_workers(unique_seller_ids, allocated_workers)
 
+    def parse_stream(self, work_queue: WorkQueue, num_workers: int) -> List[SellerInfo]:
+        """Потоковый режим: воркеры разбирают очередь, которая пополняется, пока ее не закроют"""
+        logger.info(f"Потоковый парсинг продавцов с {num_workers} воркерами для пользователя {self.user_id}")
+        results = self._run_workers(work_queue, num_workers)
+        self._store_in_cache(results)
+        return results
+
     def _parse_single_worker(self, seller_ids: List[str]) -> List[SellerInfo]:
-        worker = SellerWorker(1)
-        try:
-            worker.initialize()
-            return worker.parse_sellers(seller_ids)
-        finally:
-            worker.close()
+        work_queue = WorkQueue(seller_ids, max_attempts=Settings.WORK_QUEUE_MAX_ATTEMPTS)
+        return self._worker_task_with_retry(1, work_queue)
 
     def _calculate_optimal_workers(self, total_sellers: int) -> int:
         if total_sellers <= 10:
@@ -452,64 +496,14 @@ class OzonSellerParser:
             return min(5, self.max_workers)  # Максимум 5 воркеров
 
     def _parse_multiple_workers(self, seller_ids: List[str], num_workers: int) -> List[SellerInfo]:
-        chunks = self._distribute_seller_ids(seller_ids, num_workers)
+        work_queue = WorkQueue(seller_ids, max_attempts=Settings.WORK_QUEUE_MAX_ATTEMPTS)
+        logger.info(f"{len(seller_ids)} продавцов в общей очереди для {num_workers} воркеров")
 
-        for i, chunk in enumerate(chunks):
-            if chunk:
-                logger.info(f"Воркер продавцов {i + 1}: {len(chunk)} продавцов")
+        return self._run_workers(work_queue, num_workers)
 
-        all_results = []
+    def _create_worker(self, worker_id: int) -> SellerWorker:
+        return SellerWorker(worker_id)
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
-            future_to_worker = {}
-
-            for i, chunk in enumerate(chunks):
-                if chunk:
-                    future = executor.submit(self._worker_task_with_retry, i + 1, chunk)
-                    future_to_worker[future] = i + 1
-
-            for future in concurrent.futures.as_completed(future_to_worker):
-                worker_id = future_to_worker[future]
-                try:
-                    results = future.result()
-                    all_results.extend(results)
-                    logger.info(f"Воркер продавцов {worker_id} завершил работу с {len(results)} продавцами")
-                except Exception as e:
-                    logger.error(f"Ошибка воркера продавцов {worker_id}: {e}")
-
-        return all_results
-
-    def _distribute_seller_ids(self, seller_ids: List[str], num_workers: int) -> List[List[str]]:
-        chunks = [[] for _ in range(num_workers)]
-
-        for i, seller_id in enumerate(seller_ids):
-            worker_index = i % num_workers
-            chunks[worker_index].append(seller_id)
-
-        return chunks
-
-    def _worker_task_with_retry(self, worker_id: int, seller_ids: List[str]) -> List[SellerInfo]:
-        max_worker_retries = 3
-        for attempt in range(max_worker_retries):
-            worker = SellerWorker(worker_id)
-            try:
-                worker.initialize()
-                results = worker.parse_sellers(seller_ids)
-                return results
-            except Exception as e:
-                if "Access blocked" in str(e) and attempt < max_worker_retries - 1:
-                    logger.warning(
-                        f"Воркер продавцов {worker_id} заблокирован, пересоздаем (попытка {attempt + 1}/3)"
-                    )
-                    time.sleep(15)
-                    continue
-                else:
-                    raise
-            finally:
-                # Гарантируем закрытие воркера в любом случае
-                worker.close()
-        return []
-    
     def cleanup(self):
         """Принудительная очистка всех ресурсов парсера"""
         logger.info("Очистка ресурсов парсера продавцов...")
@@ -140,6 +140,8 @@ class TelegramBotManager:
         self.dp.message.register(self._cmd_status, Command('status'))
         self.dp.message.register(self._cmd_settings, Command('settings'))
         self.dp.message.register(self._cmd_help, Command('help'))
+        self.dp.message.register(self._cmd_resume, Command('resume'))
+        self.dp.message.register(self._cmd_monitor, Command('monitor'))
         
         self.dp.callback_query.register(self._handle_callback)
         self.dp.message.register(self._handle_url_input, StateFilter(ParsingStates.waiting_for_url))
@@ -195,6 +197,8 @@ class TelegramBotManager:
         if user_results:
             status_text += f"\n📈 <b>Ваши результаты:</b>\n"
             status_text += f"✅ Успешно: {user_results.get('successful_products', 0)}/{user_results.get('total_products', 0)}"
+            if user_results.get('cached_products'):
+                status_text += f"\n💾 Из кэша: {user_results['cached_products']}"
         elif status['last_results']:
             # Fallback для совместимости
             results = status['last_results']
@@ -237,6 +241,11 @@ class TelegramBotManager:
             status_text += f"• Макс на пользователя: {resource_manager.MAX_WORKERS_PER_USER}\n"
             status_text += f"• Мин на пользователя: {resource_manager.MIN_WORKERS_PER_USER}\n"
             
+            from ..utils.rate_limiter import rate_limiter
+            limiter_status = rate_limiter.get_status()
+            status_text += f"• Частота запросов к Ozon: {limiter_status['rate_per_second']} запр/с\n"
+            status_text += f"• Блокировок с запуска: {limiter_status['total_blocks']}\n"
+            
         except Exception as e:
             status_text = f"❌ Ошибка получения статуса ресурсов: {e}"
         
@@ -271,6 +280,53 @@ class TelegramBotManager:
         else:
             await message_or_query.reply(text, reply_markup=reply_markup, parse_mode="HTML")
     
+    async def _cmd_resume(self, message: Message):
+        if not self._is_authorized_user(message):
+            return
+        
+        user_id = str(message.from_user.id)
+        if user_id in self.app_manager.active_parsing_users:
+            await message.reply("⏳ Парсинг уже выполняется")
+            return
+        
+        keyboard = ReplyKeyboardMarkup(keyboard=[
+            [KeyboardButton(text="❌ Завершить")]
+        ], resize_keyboard=True)
+        
+        await message.reply("🔄 Продолжаю прерванный парсинг...", reply_markup=keyboard)
+        
+        self.parsing_user_id = user_id
+        
+        def resume_parsing():
+            if not self.app_manager.resume_parsing(user_id):
+                self.send_message_sync("❌ Нет прерванного парсинга для продолжения")
+        
+        threading.Thread(target=resume_parsing, daemon=True).start()
+    
+    async def _cmd_monitor(self, message: Message):
+        if not self._is_authorized_user(message):
+            return
+        
+        user_id = str(message.from_user.id)
+        if user_id in self.app_manager.active_parsing_users:
+            await message.reply("⏳ Парсинг уже выполняется")
+            return
+        
+        parts = (message.text or "").split(maxsplit=1)
+        url = parts[1].strip() if len(parts) > 1 else ""
+        if not self._is_ozon_category_url(url):
+            await message.reply(
+                "❌ Укажите ссылку на категорию:\n<code>/monitor https://ozon.ru/category/...</code>",
+                parse_mode="HTML"
+            )
+            return
+        
+        await message.reply("📉 Проверяю цены известных товаров категории и ищу новые...")
+        self.parsing_user_id = user_id
+        
+        if not self.app_manager.start_monitoring(url, user_id):
+            await message.reply("❌ Не удалось запустить мониторинг")
+    
     async def _cmd_help(self, message: Message):
         await self._show_help(message)
     
@@ -289,6 +345,11 @@ class TelegramBotManager:
             "<code>https://ozon.ru/category/sistemnye-bloki-15704/</code>\n\n"
             "<b>Настройки:</b>\n"
             "В настройках можно выбрать какие поля экспортировать в Excel файл.\n\n"
+            "<b>Прерванный парсинг:</b>\n"
+            "/resume - продолжить с места остановки без повторного сбора готовых товаров\n\n"
+            "<b>Мониторинг цен:</b>\n"
+            "/monitor &lt;ссылка&gt; - проверить цены уже известных товаров категории и найти новые; "
+            "в ответ приходят новые, снятые товары и изменения цен\n\n"
             "Бот будет уведомлять вас о ходе парсинга 📊"
         )
         
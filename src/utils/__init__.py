@@ -1,6 +1,7 @@
 from .logger import setup_logging
 from .selenium_manager import SeleniumManager
 from .excel_exporter import ExcelExporter
+from .exporters import CsvExporter, ParquetExporter, get_exporter
 from .database import Database
 
-__all__ = ['setup_logging', 'SeleniumManager', 'ExcelExporter', 'Database']
\ No newline at end of file
+__all__ = ['setup_logging', 'SeleniumManager', 'ExcelExporter', 'CsvExporter', 'ParquetExporter', 'get_exporter', 'Database']
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Каталог известных артикулов категорий для режима мониторинга цен
+"""
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from ..config.settings import Settings
+from .sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+class ArticleCatalogue(SQLiteStore):
+    """
+    Последнее известное состояние каждого артикула категории.
+    misses - сколько проверок подряд товар не удалось получить; после MONITOR_REMOVED_AFTER_MISSES
+    товар считается снятым с продажи и больше не запрашивается.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS catalogue (
+            category_url TEXT NOT NULL,
+            article TEXT NOT NULL,
+            url TEXT NOT NULL DEFAULT '',
+            image_url TEXT NOT NULL DEFAULT '',
+            name TEXT NOT NULL DEFAULT '',
+            card_price INTEGER NOT NULL DEFAULT 0,
+            price INTEGER NOT NULL DEFAULT 0,
+            original_price INTEGER NOT NULL DEFAULT 0,
+            first_seen REAL NOT NULL,
+            last_seen REAL NOT NULL,
+            misses INTEGER NOT NULL DEFAULT 0,
+            active INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (category_url, article)
+        );
+    """
+
+    COLUMNS = ('article', 'url', 'image_url', 'name', 'card_price', 'price', 'original_price', 'misses')
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path or Settings.DATA_DIR / "catalogue.sqlite3")
+
+    def get_active(self, category_url: str) -> Dict[str, Dict]:
+        """Артикулы категории, которые еще продаются: {article: запись}"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM catalogue WHERE category_url = ? AND active = 1",
+                (category_url,)
+            ).fetchall()
+        return {row[0]: dict(zip(self.COLUMNS, row)) for row in rows}
+
+    def put_seen(self, category_url: str, items: Iterable[Tuple]):
+        """Сохраняет полученные товары: кортежи (ProductInfo, url, image_url)"""
+        now = time.time()
+        rows = [
+            (category_url, product.article, url, image_url, product.name,
+             product.card_price, product.price, product.original_price, now, now)
+            for product, url, image_url in items
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO catalogue (category_url, article, url, image_url, name,
+                                       card_price, price, original_price, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (category_url, article) DO UPDATE SET
+                    url = CASE WHEN excluded.url != '' THEN excluded.url ELSE url END,
+                    image_url = CASE WHEN excluded.image_url != '' THEN excluded.image_url ELSE image_url END,
+                    name = excluded.name,
+                    card_price = excluded.card_price,
+                    price = excluded.price,
+                    original_price = excluded.original_price,
+                    last_seen = excluded.last_seen,
+                    misses = 0,
+                    active = 1
+                """,
+                rows
+            )
+            self._conn.commit()
+
+    def record_misses(self, category_url: str, articles: Iterable[str]) -> List[str]:
+        """Учитывает подтвержденные пропуски товаров; возвращает артикулы, которые только что стали снятыми"""
+        articles = list(articles)
+        if not articles:
+            return []
+
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE catalogue SET misses = misses + 1 WHERE category_url = ? AND article = ?",
+                [(category_url, article) for article in articles]
+            )
+            removed = [
+                row[0] for row in self._conn.execute(
+                    "SELECT article FROM catalogue WHERE category_url = ? AND active = 1 AND misses >= ?",
+                    (category_url, Settings.MONITOR_REMOVED_AFTER_MISSES)
+                )
+            ]
+            self._conn.executemany(
+                "UPDATE catalogue SET active = 0 WHERE category_url = ? AND article = ?",
+                [(category_url, article) for article in removed]
+            )
+            self._conn.commit()
+        return removed
+
+_article_catalogue: Optional[ArticleCatalogue] = None
+_article_catalogue_lock = threading.Lock()
+
+def get_article_catalogue() -> ArticleCatalogue:
+    """Общий экземпляр каталога (создается при первом обращении)"""
+    global _article_catalogue
+    with _article_catalogue_lock:
+        if _article_catalogue is None:
+            _article_catalogue = ArticleCatalogue()
+        return _article_catalogue
@@ -0,0 +1,164 @@
+"""
+Журнал запуска парсинга на диске для продолжения прерванных запусков
+"""
+import json
+import logging
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+from ..config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RunState:
+    """Состояние запуска, восстановленное из журнала"""
+    run_id: str
+    category_url: str = ""
+    selected_fields: Optional[List[str]] = None
+    user_id: Optional[str] = None
+    max_products: int = 0
+    links: Dict[str, str] = field(default_factory=dict)
+    links_done: bool = False
+    output_folder: str = ""
+    products: Dict[str, dict] = field(default_factory=dict)
+    sellers: Dict[str, dict] = field(default_factory=dict)
+
+    def product_results(self) -> Dict:
+        """Готовые товары как {article: ProductInfo}"""
+        from ..parsers.product_parser import ProductInfo
+        return {article: ProductInfo(**data) for article, data in self.products.items()}
+
+    def seller_results(self) -> Dict:
+        """Готовые продавцы как {seller_id: SellerInfo}"""
+        from ..parsers.seller_parser import SellerInfo
+        return {seller_id: SellerInfo(**data) for seller_id, data in self.sellers.items()}
+
+class RunJournal:
+    """
+    JSONL журнал одного запуска: каждая строка - запись о собранных ссылках, готовом товаре или продавце.
+    Записи дописываются по мере получения результатов, поэтому после падения процесса
+    теряется только то, что обрабатывалось в момент падения.
+    """
+
+    def __init__(self, run_id: str, state: Optional[RunState] = None):
+        self.run_id = run_id
+        self.state = state
+        self.path = Settings.CHECKPOINT_DIR / f"{run_id}.jsonl"
+        self._lock = threading.Lock()
+        self._recorded_products = set(state.products) if state else set()
+        self._recorded_sellers = set(state.sellers) if state else set()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    @classmethod
+    def create(cls, category_url: str, selected_fields: Optional[List[str]], user_id: Optional[str],
+               max_products: int) -> 'RunJournal':
+        run_id = f"{user_id or 'local'}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        journal = cls(run_id)
+        journal._append({
+            'type': 'meta',
+            'category_url': category_url,
+            'selected_fields': selected_fields,
+            'user_id': user_id,
+            'max_products': max_products
+        })
+        logger.info(f"Журнал запуска: {journal.path}")
+        return journal
+
+    @classmethod
+    def resume(cls, run_id: str) -> Optional['RunJournal']:
+        """Открывает журнал прерванного запуска для дозаписи; None - если журнала нет"""
+        state = cls.load(run_id)
+        if state is None:
+            return None
+        return cls(run_id, state)
+
+    @staticmethod
+    def load(run_id: str) -> Optional[RunState]:
+        path = Settings.CHECKPOINT_DIR / f"{run_id}.jsonl"
+        if not path.exists():
+            return None
+
+        state = RunState(run_id=run_id)
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Последняя строка могла не дописаться при падении
+                    continue
+
+                record_type = record.get('type')
+                if record_type == 'meta':
+                    state.category_url = record.get('category_url', '')
+                    state.selected_fields = record.get('selected_fields')
+                    state.user_id = record.get('user_id')
+                    state.max_products = record.get('max_products', 0)
+                elif record_type == 'links':
+                    state.links.update(record.get('links', {}))
+                elif record_type == 'links_done':
+                    state.links_done = True
+                    state.output_folder = record.get('output_folder', '')
+                elif record_type == 'product':
+                    state.products[record['data']['article']] = record['data']
+                elif record_type == 'seller':
+                    state.sellers[record['data']['seller_id']] = record['data']
+        return state
+
+    @staticmethod
+    def find_unfinished(user_id: Optional[str] = None) -> Optional[str]:
+        """run_id последнего незавершенного запуска пользователя; журналы завершенных запусков удаляются в mark_done"""
+        prefix = f"{user_id or 'local'}_"
+        paths = sorted(Settings.CHECKPOINT_DIR.glob(f"{prefix}*.jsonl"), reverse=True)
+        return paths[0].stem if paths else None
+
+    def record_links(self, links: Dict[str, str]):
+        if links:
+            self._append({'type': 'links', 'links': dict(links)})
+
+    def record_links_done(self, output_folder: str):
+        self._append({'type': 'links_done', 'output_folder': output_folder})
+
+    def record_product(self, product):
+        # Неудачные товары не записываются - при продолжении они парсятся заново
+        if not product.success:
+            return
+        with self._lock:
+            if product.article in self._recorded_products:
+                return
+            self._recorded_products.add(product.article)
+        data = asdict(product)
+        data.pop('from_cache', None)
+        self._append({'type': 'product', 'data': data})
+
+    def record_seller(self, seller):
+        if not seller.success:
+            return
+        with self._lock:
+            if seller.seller_id in self._recorded_sellers:
+                return
+            self._recorded_sellers.add(seller.seller_id)
+        self._append({'type': 'seller', 'data': asdict(seller)})
+
+    def mark_done(self):
+        """Запуск завершен - продолжать нечего, журнал удаляется"""
+        self.close()
+        try:
+            self.path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Не удалось удалить журнал запуска {self.path}: {e}")
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def _append(self, record: Dict):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line + "\n")
+            self._file.flush()
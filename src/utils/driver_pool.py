@@ -0,0 +1,251 @@
+"""
+Пул прогретых Chrome драйверов, общий для всех этапов парсинга и всех пользователей
+"""
+import logging
+import threading
+import time
+from typing import Dict, List
+from dataclasses import dataclass, field
+from ..config.settings import Settings
+from .selenium_manager import SeleniumManager
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class DriverHealth:
+    """Скользящие (EWMA) доля успехов, доля проверок антибота и время обработки элемента"""
+    success_rate: float = 1.0
+    block_rate: float = 0.0
+    latency: float = 0.0
+    samples: int = 0
+
+    def update(self, success: bool, latency: float, challenged: bool):
+        alpha = Settings.DRIVER_HEALTH_ALPHA
+        self.success_rate += alpha * ((1.0 if success else 0.0) - self.success_rate)
+        self.block_rate += alpha * ((1.0 if challenged else 0.0) - self.block_rate)
+        self.latency = latency if self.samples == 0 else self.latency + alpha * (latency - self.latency)
+        self.samples += 1
+
+    @property
+    def score(self) -> float:
+        """1.0 - здоровый драйвер; медленные ответы снижают оценку пропорционально превышению цели"""
+        latency_factor = min(1.0, Settings.DRIVER_HEALTH_LATENCY_TARGET / self.latency) if self.latency else 1.0
+        return self.success_rate * (1.0 - self.block_rate) * latency_factor
+
+    @property
+    def degraded(self) -> bool:
+        return self.samples >= Settings.DRIVER_HEALTH_MIN_SAMPLES and self.score < Settings.DRIVER_HEALTH_MIN_SCORE
+
+@dataclass
+class PooledDriver:
+    manager: SeleniumManager
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    uses: int = 0
+    health: DriverHealth = field(default_factory=DriverHealth)
+
+class DriverPool:
+    """Выдает драйверы, уже прошедшие антибот, и возвращает их в пул после работы"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._idle: List[PooledDriver] = []
+        self._in_use: Dict[int, PooledDriver] = {}
+        self._warming = 0
+        self._retired = 0
+        self._closed = False
+        self._cleanup_thread = None
+        self._start_cleanup_thread()
+
+    def _start_cleanup_thread(self):
+        """Запускает поток для закрытия давно простаивающих драйверов"""
+        def cleanup_loop():
+            while True:
+                try:
+                    self._cleanup_idle_drivers()
+                except Exception as e:
+                    logger.error(f"Ошибка в потоке очистки пула драйверов: {e}")
+                time.sleep(60)
+
+        self._cleanup_thread = threading.Thread(target=cleanup_loop, daemon=True)
+        self._cleanup_thread.start()
+
+    def acquire(self) -> SeleniumManager:
+        """Возвращает живой прогретый драйвер из пула или создает новый"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                entry = self._idle.pop()
+
+            if self._is_alive(entry.manager):
+                with self._lock:
+                    self._in_use[id(entry.manager)] = entry
+                logger.debug(f"Выдан драйвер из пула (использований: {entry.uses})")
+                return entry.manager
+
+            logger.info("Драйвер из пула не отвечает, закрываем")
+            entry.manager.close()
+
+        entry = PooledDriver(manager=self._create_warm_driver())
+        with self._lock:
+            self._in_use[id(entry.manager)] = entry
+        return entry.manager
+
+    def release(self, manager: SeleniumManager):
+        """Возвращает драйвер в пул; заблокированные и изношенные драйверы закрываются"""
+        with self._lock:
+            entry = self._in_use.pop(id(manager), None)
+            if entry is None:
+                recycle = True
+                reason = "не из пула"
+            elif manager.blocked:
+                recycle = True
+                reason = "блокировка"
+            elif entry.health.degraded:
+                recycle = True
+                reason = f"низкая оценка здоровья {entry.health.score:.2f}"
+            elif entry.uses >= Settings.DRIVER_POOL_MAX_USES:
+                recycle = True
+                reason = f"{entry.uses} использований"
+            elif self._closed or len(self._idle) >= Settings.DRIVER_POOL_SIZE:
+                recycle = True
+                reason = "пул заполнен"
+            else:
+                recycle = False
+                entry.last_used = time.time()
+                self._idle.append(entry)
+
+        if recycle:
+            logger.info(f"Драйвер закрыт при возврате в пул ({reason})")
+            manager.close()
+            if entry is not None:
+                with self._lock:
+                    self._retired += 1
+                # Замена готовится в фоне, чтобы следующий acquire не ждал запуска Chrome
+                self._refill_spares()
+        else:
+            logger.debug(f"Драйвер возвращен в пул (свободно: {len(self._idle)})")
+
+    def report(self, manager: SeleniumManager, success: bool, latency: float, challenged: bool = False):
+        """Учитывает один обработанный элемент: ротация по числу использований и оценка здоровья"""
+        with self._lock:
+            entry = self._in_use.get(id(manager))
+            if not entry:
+                return
+            entry.uses += 1
+            was_degraded = entry.health.degraded
+            entry.health.update(success, latency, challenged)
+            newly_degraded = entry.health.degraded and not was_degraded
+
+        if newly_degraded:
+            logger.info(f"Драйвер деградировал (оценка {entry.health.score:.2f}), готовим замену")
+            self._refill_spares()
+
+    def is_degraded(self, manager: SeleniumManager) -> bool:
+        """Драйвер стоит заменить до того, как он начнет проваливать элементы"""
+        with self._lock:
+            entry = self._in_use.get(id(manager))
+            return bool(entry and entry.health.degraded)
+
+    def _refill_spares(self):
+        with self._lock:
+            if self._closed:
+                return
+            missing = Settings.DRIVER_POOL_SPARES - len(self._idle) - self._warming
+            if missing <= 0:
+                return
+            self._warming += missing
+
+        for _ in range(missing):
+            threading.Thread(target=self._prewarm_one, daemon=True).start()
+
+    def prewarm(self, count: int):
+        """Заранее в фоне создает драйверы, чтобы в пуле было не меньше count свободных"""
+        with self._lock:
+            if self._closed:
+                return
+            count = min(count, Settings.DRIVER_POOL_SIZE)
+            missing = count - len(self._idle) - self._warming
+            if missing <= 0:
+                return
+            self._warming += missing
+
+        logger.info(f"Прогрев {missing} драйверов в фоне")
+        for _ in range(missing):
+            threading.Thread(target=self._prewarm_one, daemon=True).start()
+
+    def _prewarm_one(self):
+        try:
+            manager = self._create_warm_driver()
+        except Exception as e:
+            logger.warning(f"Не удалось прогреть драйвер: {e}")
+            with self._lock:
+                self._warming -= 1
+            return
+
+        with self._lock:
+            self._warming -= 1
+            if not self._closed and len(self._idle) < Settings.DRIVER_POOL_SIZE:
+                self._idle.append(PooledDriver(manager=manager))
+                return
+        manager.close()
+
+    def _create_warm_driver(self) -> SeleniumManager:
+        manager = SeleniumManager()
+        manager.create_api_driver()
+        try:
+            # Проходим антибот на главной, чтобы драйвер и HTTP сессия были готовы к запросам API
+            if not manager.navigate_to_url(Settings.OZON_BASE_URL):
+                # Драйвер, не прошедший антибот, не выдаем как прогретый
+                raise Exception("Antibot timeout: главная страница не открылась при прогреве")
+            manager.sync_http_session()
+        except Exception as e:
+            logger.warning(f"Прогрев драйвера не удался: {e}")
+            manager.close()
+            raise
+        return manager
+
+    def _is_alive(self, manager: SeleniumManager) -> bool:
+        if not manager.driver:
+            return False
+        try:
+            return manager.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _cleanup_idle_drivers(self):
+        now = time.time()
+        with self._lock:
+            expired = [e for e in self._idle if now - e.last_used > Settings.DRIVER_POOL_IDLE_TTL]
+            self._idle = [e for e in self._idle if e not in expired]
+
+        for entry in expired:
+            entry.manager.close()
+        if expired:
+            logger.info(f"Закрыто {len(expired)} простаивающих драйверов пула")
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            scores = [entry.health.score for entry in self._in_use.values() if entry.health.samples]
+            return {
+                'idle_drivers': len(self._idle),
+                'busy_drivers': len(self._in_use),
+                'warming_drivers': self._warming,
+                'retired_drivers': self._retired,
+                'average_health': round(sum(scores) / len(scores), 2) if scores else None
+            }
+
+    def shutdown(self):
+        """Закрывает все свободные драйверы; занятые закроются при возврате"""
+        with self._lock:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+
+        for entry in idle:
+            entry.manager.close()
+        logger.info(f"Пул драйверов остановлен, закрыто {len(idle)} драйверов")
+
+# Глобальный экземпляр пула драйверов
+driver_pool = DriverPool()
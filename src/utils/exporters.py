@@ -0,0 +1,133 @@
+"""
+Экспортеры результатов: общий маппинг полей и реестр форматов (xlsx, csv, parquet)
+"""
+import csv
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Поле выгрузки -> (заголовок, извлечение из записи товара, тип колонки)
+FIELD_MAPPING: Dict[str, Tuple[str, Callable[[dict], object], str]] = {
+    'article': ('Артикул', lambda p: p.get('article', ''), 'string'),
+    'name': ('Название товара', lambda p: p.get('name', ''), 'string'),
+    'seller_name': ('Продавец', lambda p: p.get('seller', {}).get('name', ''), 'string'),
+    'company_name': ('Название компании', lambda p: p.get('seller', {}).get('company_name', ''), 'string'),
+    'inn': ('ИНН', lambda p: p.get('seller', {}).get('inn', ''), 'string'),
+    'card_price': ('Цена карты', lambda p: p.get('card_price', 0), 'int'),
+    'price': ('Цена', lambda p: p.get('price', 0), 'int'),
+    'original_price': ('Старая цена', lambda p: p.get('original_price', 0), 'int'),
+    'product_url': ('Ссылка товара', lambda p: p.get('product_url', ''), 'string'),
+    'image_url': ('Изображение', lambda p: p.get('image_url', ''), 'string'),
+    'orders_count': ('Заказов', lambda p: p.get('seller', {}).get('orders_count', ''), 'string'),
+    'reviews_count': ('Отзывов', lambda p: p.get('seller', {}).get('reviews_count', ''), 'string'),
+    'average_rating': ('Рейтинг', lambda p: p.get('seller', {}).get('average_rating', ''), 'string'),
+    'working_time': ('Работает с', lambda p: p.get('seller', {}).get('working_time', ''), 'string')
+}
+
+# По умолчанию: название товара, название компании, ссылка на товар и изображение
+DEFAULT_FIELDS = ['name', 'company_name', 'product_url', 'image_url']
+
+def resolve_fields(selected_fields: List[str] = None) -> List[str]:
+    """Выбранные поля, известные маппингу, или поля по умолчанию"""
+    if selected_fields:
+        return [field for field in selected_fields if field in FIELD_MAPPING]
+    return list(DEFAULT_FIELDS)
+
+class BaseExporter:
+    """Экспорт товаров в один файл; товары передаются итератором и читаются один раз"""
+
+    extension = ""
+
+    def __init__(self, output_dir: Path, filename: str):
+        self.output_dir = output_dir
+        self.filename = filename
+        self.filepath = output_dir / f"{filename}.{self.extension}"
+
+    def export_results(self, data: dict, selected_fields: list = None) -> bool:
+        try:
+            fields = resolve_fields(selected_fields)
+            rows = self._write(fields, data.get('products', []))
+            logger.info(f"{self.extension.upper()} файл сохранен: {self.filepath} ({rows} строк)")
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка экспорта в {self.extension.upper()}: {e}")
+            return False
+
+    def _write(self, fields: List[str], products: Iterable[dict]) -> int:
+        raise NotImplementedError
+
+class CsvExporter(BaseExporter):
+    """CSV без оформления; utf-8-sig, чтобы Excel корректно открывал кириллицу"""
+
+    extension = "csv"
+
+    def _write(self, fields: List[str], products: Iterable[dict]) -> int:
+        extractors = [FIELD_MAPPING[field][1] for field in fields]
+        rows = 0
+        with open(self.filepath, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([FIELD_MAPPING[field][0] for field in fields])
+            for product in products:
+                writer.writerow([extractor(product) for extractor in extractors])
+                rows += 1
+        return rows
+
+class ParquetExporter(BaseExporter):
+    """Типизированный колоночный формат; строки пишутся пачками, требуется pyarrow"""
+
+    extension = "parquet"
+    BATCH_SIZE = 10000
+
+    def _write(self, fields: List[str], products: Iterable[dict]) -> int:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("для экспорта в Parquet установите pyarrow")
+
+        types = {'int': pa.int64(), 'string': pa.string()}
+        column_types = [types[FIELD_MAPPING[field][2]] for field in fields]
+        # Колонки называются ключами полей, чтобы их было удобно загружать в аналитику
+        schema = pa.schema(list(zip(fields, column_types)))
+        extractors = [FIELD_MAPPING[field][1] for field in fields]
+        converters = [int if FIELD_MAPPING[field][2] == 'int' else str for field in fields]
+
+        def to_table(columns):
+            # Каждая колонка строится сразу с типом из FIELD_MAPPING, без вывода типа по значениям
+            arrays = [pa.array(column, type=column_type) for column, column_type in zip(columns, column_types)]
+            return pa.Table.from_arrays(arrays, schema=schema)
+
+        rows = 0
+        batch_rows = 0
+        columns = [[] for _ in fields]
+        with pq.ParquetWriter(str(self.filepath), schema) as writer:
+            for product in products:
+                for column, extractor, convert in zip(columns, extractors, converters):
+                    value = extractor(product)
+                    column.append(convert(value) if value not in (None, '') else None)
+                rows += 1
+                batch_rows += 1
+
+                if batch_rows >= self.BATCH_SIZE:
+                    writer.write_table(to_table(columns))
+                    columns = [[] for _ in fields]
+                    batch_rows = 0
+
+            if batch_rows or rows == 0:
+                writer.write_table(to_table(columns))
+        return rows
+
+def get_exporter(export_format: str, output_dir: Path, filename: str) -> BaseExporter:
+    """Экспортер по формату из Settings.EXPORT_FORMATS"""
+    from .excel_exporter import ExcelExporter
+
+    exporters = {
+        'xlsx': ExcelExporter,
+        'csv': CsvExporter,
+        'parquet': ParquetExporter
+    }
+    if export_format not in exporters:
+        raise ValueError(f"Неизвестный формат экспорта: {export_format}")
+    return exporters[export_format](output_dir, filename)
@@ -0,0 +1,106 @@
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Optional
+from .rate_limiter import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+class HttpFetcher:
+    """HTTP-клиент для composer-api с cookies, снятыми с прогретого Selenium драйвера"""
+
+    CHALLENGE_STATUSES = {403, 429, 503}
+
+    def __init__(self, timeout: int = 30, pool_size: int = 10):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.session: Optional[requests.Session] = None
+        self.user_agent = ""
+        self.is_ready = False
+        self.wait_seconds = 0.0  # Сколько запросы ждали токен ограничителя частоты
+
+    def load_from_driver(self, driver) -> bool:
+        """Переносит cookies и user-agent из драйвера, прошедшего антибот"""
+        try:
+            user_agent = driver.execute_script("return navigator.userAgent")
+            cookies = driver.get_cookies()
+        except Exception as e:
+            logger.debug(f"Не удалось получить cookies из драйвера: {e}")
+            self.is_ready = False
+            return False
+
+        if not cookies:
+            self.is_ready = False
+            return False
+
+        if self.session is None:
+            self.session = self._create_session()
+
+        self.user_agent = user_agent or ""
+        self.session.headers['User-Agent'] = self.user_agent
+        self.session.cookies.clear()
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain'), path=cookie.get('path', '/')
+            )
+
+        self.is_ready = True
+        logger.debug(f"HTTP сессия прогрета: {len(cookies)} cookies")
+        return True
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'Accept': 'application/json',
+            'Accept-Language': 'ru-RU,ru;q=0.9',
+            'Referer': 'https://www.ozon.ru/',
+        })
+        return session
+
+    def fetch_json(self, url: str) -> Optional[str]:
+        """
+        Возвращает тело JSON ответа или None, если нужен откат на браузер
+        (сессия не прогрета, сетевая ошибка или страница антибота)
+        """
+        if not self.is_ready or self.session is None:
+            return None
+
+        self.wait_seconds += rate_limiter.acquire()
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.debug(f"Ошибка HTTP запроса {url}: {e}")
+            return None
+
+        if response.status_code in self.CHALLENGE_STATUSES or not self._looks_like_json(response):
+            logger.info(f"HTTP запрос получил страницу антибота (статус {response.status_code}), откат на браузер")
+            rate_limiter.report_block()
+            self.invalidate()
+            return None
+
+        if response.status_code != 200:
+            logger.debug(f"HTTP статус {response.status_code} для {url}")
+            return None
+
+        rate_limiter.report_success()
+        return response.text
+
+    def _looks_like_json(self, response: requests.Response) -> bool:
+        content_type = response.headers.get('Content-Type', '')
+        if 'json' in content_type:
+            return True
+        return response.text.lstrip().startswith('{')
+
+    def invalidate(self):
+        """Помечает cookies устаревшими до следующего прохождения антибота в браузере"""
+        self.is_ready = False
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+        self.is_ready = False
@@ -0,0 +1,72 @@
+"""
+Индекс ссылок категории: url -> изображение плюс поиск ссылки и изображения по артикулу
+"""
+import re
+from typing import Dict, Iterator, List, Mapping, MutableMapping, Optional
+
+ARTICLE_PATTERN = re.compile(r'/product/[^/]+-(\d+)/')
+
+def extract_article(url: str) -> str:
+    """Артикул из ссылки товара или пустая строка"""
+    match = ARTICLE_PATTERN.search(url)
+    return match.group(1) if match else ""
+
+class LinkIndex(MutableMapping[str, str]):
+    """
+    Ведет себя как словарь ссылок {url: изображение}, который собирает OzonLinkParser,
+    и одновременно хранит индекс article -> url. Индекс строится по мере добавления ссылок,
+    поэтому все этапы находят ссылку и изображение товара за O(1) и по точному артикулу,
+    а не по вхождению артикула в url.
+    """
+
+    def __init__(self, links: Optional[Mapping[str, str]] = None):
+        self._images: Dict[str, str] = {}
+        self._urls_by_article: Dict[str, str] = {}
+        if links:
+            self.update(links)
+
+    @classmethod
+    def wrap(cls, links: Optional[Mapping[str, str]]) -> 'LinkIndex':
+        """Индекс как есть или индекс, построенный один раз по обычному словарю ссылок"""
+        return links if isinstance(links, cls) else cls(links)
+
+    def add(self, url: str, image_url: str = "") -> str:
+        """Добавляет ссылку; возвращает артикул, если он встретился впервые, иначе пустую строку"""
+        self._images[url] = image_url
+        article = extract_article(url)
+        if not article or article in self._urls_by_article:
+            return ""
+        self._urls_by_article[article] = url
+        return article
+
+    def __setitem__(self, url: str, image_url: str):
+        self.add(url, image_url)
+
+    def __getitem__(self, url: str) -> str:
+        return self._images[url]
+
+    def __delitem__(self, url: str):
+        del self._images[url]
+        article = extract_article(url)
+        if self._urls_by_article.get(article) == url:
+            del self._urls_by_article[article]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._images)
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def articles(self) -> List[str]:
+        """Артикулы в порядке сбора, без повторов"""
+        return list(self._urls_by_article)
+
+    def url_for(self, article: str) -> str:
+        return self._urls_by_article.get(article, "")
+
+    def image_for(self, article: str) -> str:
+        url = self._urls_by_article.get(article)
+        return self._images.get(url, "") if url else ""
+
+    def to_dict(self) -> Dict[str, str]:
+        return dict(self._images)
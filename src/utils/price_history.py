@@ -0,0 +1,143 @@
+"""
+История цен товаров: наблюдения только дописываются и хранятся компактно
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+from ..config.settings import Settings
+from .sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PricePoint:
+    ts: int
+    card_price: int
+    price: int
+    original_price: int
+
+@dataclass
+class PriceDrop:
+    article: str
+    old_price: int
+    new_price: int
+    change_percent: float
+
+class PriceHistory(SQLiteStore):
+    """
+    Одна строка на наблюдение. Артикул и время хранятся целыми числами (в SQLite это varint),
+    таблица WITHOUT ROWID упорядочена по (article, ts), поэтому первичный ключ и есть индекс для
+    выборки ряда цен одного артикула. latest хранит последнее наблюдение каждого артикула:
+    запросы "что подешевело" обходят артикулы, а не все наблюдения.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS prices (
+            article INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            card_price INTEGER NOT NULL,
+            price INTEGER NOT NULL,
+            original_price INTEGER NOT NULL,
+            PRIMARY KEY (article, ts)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS latest (
+            article INTEGER PRIMARY KEY,
+            ts INTEGER NOT NULL,
+            card_price INTEGER NOT NULL,
+            price INTEGER NOT NULL,
+            original_price INTEGER NOT NULL
+        );
+    """
+
+    PRICE_FIELDS = ('card_price', 'price', 'original_price')
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path or Settings.DATA_DIR / "price_history.sqlite3")
+
+    def record(self, products: Iterable, ts: Optional[int] = None):
+        """Дописывает цены успешно полученных товаров; товары из кэша не пишутся - их цены уже в истории"""
+        ts = int(ts if ts is not None else time.time())
+        rows = [
+            (int(product.article), ts, product.card_price, product.price, product.original_price)
+            for product in products
+            if product.success and not product.from_cache and product.article.isdigit()
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.executemany(
+                """
+                INSERT INTO latest VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (article) DO UPDATE SET
+                    ts = excluded.ts,
+                    card_price = excluded.card_price,
+                    price = excluded.price,
+                    original_price = excluded.original_price
+                WHERE excluded.ts >= latest.ts
+                """,
+                rows
+            )
+            self._conn.commit()
+        logger.debug(f"История цен: записано {len(rows)} наблюдений")
+
+    def series(self, article: str, start: Optional[int] = None, end: Optional[int] = None) -> List[PricePoint]:
+        """Ряд цен артикула за период [start, end] по возрастанию времени"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ts, card_price, price, original_price FROM prices "
+                "WHERE article = ? AND ts >= ? AND ts <= ? ORDER BY ts",
+                (int(article), start if start is not None else 0, end if end is not None else 2 ** 62)
+            ).fetchall()
+        return [PricePoint(*row) for row in rows]
+
+    def drops_since(self, since: int, min_drop: float = 0.1, field: str = 'card_price') -> List[PriceDrop]:
+        """
+        Артикулы, у которых последняя цена ниже цены на момент since хотя бы на min_drop (0.1 = 10%).
+        Цена на момент since - последнее наблюдение не позже since. Самые сильные снижения первыми.
+        """
+        if field not in self.PRICE_FIELDS:
+            raise ValueError(f"Неизвестное поле цены: {field}")
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT latest.article, past.{field}, latest.{field}
+                FROM latest
+                JOIN prices AS past ON past.article = latest.article AND past.ts = (
+                    SELECT MAX(ts) FROM prices WHERE article = latest.article AND ts <= ?
+                )
+                WHERE latest.ts > ? AND past.{field} > 0 AND latest.{field} > 0
+                  AND latest.{field} <= past.{field} * (1 - ?)
+                """,
+                (since, since, min_drop)
+            ).fetchall()
+
+        drops = [
+            PriceDrop(article=str(article), old_price=old_price, new_price=new_price,
+                      change_percent=round((new_price - old_price) / old_price * 100, 1))
+            for article, old_price, new_price in rows
+        ]
+        drops.sort(key=lambda drop: drop.change_percent)
+        return drops
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            observations = self._conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0]
+            articles = self._conn.execute("SELECT COUNT(*) FROM latest").fetchone()[0]
+        return {'observations': observations, 'articles': articles}
+
+_price_history: Optional[PriceHistory] = None
+_price_history_lock = threading.Lock()
+
+def get_price_history() -> PriceHistory:
+    """Общий экземпляр истории цен (создается при первом обращении)"""
+    global _price_history
+    with _price_history_lock:
+        if _price_history is None:
+            _price_history = PriceHistory()
+        return _price_history
@@ -0,0 +1,91 @@
+"""
+Кэш результатов парсинга товаров: свежие артикулы не запрашиваются повторно
+"""
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, fields
+from typing import Dict, Iterable, Optional
+from ..config.settings import Settings
+from .sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+class ProductCache(SQLiteStore):
+    """ProductInfo по артикулу с временем получения"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS products (
+            article TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        );
+    """
+
+    # Ограничение SQLite на число параметров в запросе
+    BATCH_SIZE = 500
+
+    def __init__(self, db_path=None):
+        super().__init__(db_path or Settings.CACHE_DIR / "products.sqlite3")
+
+    def get_fresh(self, articles: Iterable[str], max_age_minutes: float) -> Dict:
+        """Возвращает {article: ProductInfo} для артикулов, полученных не раньше max_age_minutes назад"""
+        from ..parsers.product_parser import ProductInfo
+
+        articles = list(articles)
+        min_fetched_at = time.time() - max_age_minutes * 60
+        known_fields = {f.name for f in fields(ProductInfo)}
+        found = {}
+
+        with self._lock:
+            for i in range(0, len(articles), self.BATCH_SIZE):
+                batch = articles[i:i + self.BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT article, data FROM products "
+                    f"WHERE article IN ({placeholders}) AND fetched_at >= ?",
+                    batch + [min_fetched_at]
+                ).fetchall()
+
+                for article, data in rows:
+                    try:
+                        values = {k: v for k, v in json.loads(data).items() if k in known_fields}
+                    except ValueError:
+                        continue
+                    values['from_cache'] = True
+                    found[article] = ProductInfo(**values)
+
+        return found
+
+    def put_many(self, products: Iterable):
+        """Сохраняет успешно распарсенные товары, полученные не из кэша"""
+        now = time.time()
+        rows = []
+        for product in products:
+            if not product.success or product.from_cache:
+                continue
+            data = asdict(product)
+            data.pop('from_cache', None)
+            rows.append((product.article, json.dumps(data, ensure_ascii=False), now))
+
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO products (article, data, fetched_at) VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+_product_cache: Optional[ProductCache] = None
+_product_cache_lock = threading.Lock()
+
+def get_product_cache() -> ProductCache:
+    """Общий экземпляр кэша товаров (создается при первом обращении)"""
+    global _product_cache
+    with _product_cache_lock:
+        if _product_cache is None:
+            _product_cache = ProductCache()
+        return _product_cache
@@ -0,0 +1,104 @@
+"""
+Общий для процесса ограничитель частоты запросов к Ozon (token bucket с адаптацией скорости)
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict
+from ..config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """
+    Все воркеры всех пользователей берут токен перед запросом к Ozon.
+    Скорость подстраивается как AIMD: при блокировке умножается на RATE_LIMIT_BACKOFF,
+    после серии успешных запросов без блокировок растет на RATE_LIMIT_STEP.
+    """
+
+    def __init__(self, rate: float = None, burst: int = None):
+        self._lock = threading.Lock()
+        self.rate = rate or Settings.RATE_LIMIT_RPS
+        self.burst = burst or Settings.RATE_LIMIT_BURST
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._last_decrease = 0.0
+        self._successes_since_change = 0
+        self.total_requests = 0
+        self.total_blocks = 0
+
+    def acquire(self) -> float:
+        """Ждет свободный токен; возвращает время ожидания в секундах"""
+        if not Settings.RATE_LIMIT_ENABLED:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            wait_time = self._try_take()
+            if wait_time == 0:
+                return waited
+            time.sleep(wait_time)
+            waited += wait_time
+
+    async def acquire_async(self):
+        """Ждет свободный токен, не блокируя цикл событий"""
+        if not Settings.RATE_LIMIT_ENABLED:
+            return
+
+        while True:
+            wait_time = self._try_take()
+            if wait_time == 0:
+                return
+            await asyncio.sleep(wait_time)
+
+    def _try_take(self) -> float:
+        """Берет токен и возвращает 0 или возвращает время ожидания следующего токена"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.total_requests += 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def report_success(self):
+        with self._lock:
+            self._successes_since_change += 1
+            if self._successes_since_change < Settings.RATE_LIMIT_INCREASE_EVERY:
+                return
+            self._successes_since_change = 0
+            if self.rate < Settings.RATE_LIMIT_MAX_RPS:
+                self._refill()
+                self.rate = min(Settings.RATE_LIMIT_MAX_RPS, self.rate + Settings.RATE_LIMIT_STEP)
+                logger.debug(f"Частота запросов увеличена до {self.rate:.2f} запр/с")
+
+    def report_block(self):
+        with self._lock:
+            self.total_blocks += 1
+            self._successes_since_change = 0
+            now = time.monotonic()
+            # Одна блокировка видна сразу нескольким воркерам - снижаем скорость не чаще раза за период
+            if now - self._last_decrease < Settings.RATE_LIMIT_DECREASE_COOLDOWN:
+                return
+            self._last_decrease = now
+            self._refill()
+            self.rate = max(Settings.RATE_LIMIT_MIN_RPS, self.rate * Settings.RATE_LIMIT_BACKOFF)
+            self._tokens = 0.0
+            logger.info(f"Блокировка: частота запросов снижена до {self.rate:.2f} запр/с")
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                'rate_per_second': round(self.rate, 2),
+                'total_requests': self.total_requests,
+                'total_blocks': self.total_blocks
+            }
+
+# Глобальный экземпляр ограничителя
+rate_limiter = RateLimiter()
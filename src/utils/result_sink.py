@@ -0,0 +1,52 @@
+"""
+Потоковая запись результатов парсинга товаров в JSONL по мере готовности
+"""
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+def product_record(product, product_url: str = "") -> Dict:
+    """Строка JSONL для одного товара"""
+    return {
+        'article': product.article,
+        'name': product.name,
+        'company_name': product.company_name,
+        'seller_id': product.seller_id,
+        'seller_link': product.seller_link,
+        'image_url': product.image_url,
+        'card_price': product.card_price,
+        'price': product.price,
+        'original_price': product.original_price,
+        'product_url': product_url,
+        'success': product.success,
+        'error': product.error
+    }
+
+class ResultSink:
+    """Дописывает по одной строке на каждый готовый товар, чтобы результаты не терялись при падении процесса"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Файл пересоздается: при продолжении запуска готовые товары приходят в sink повторно
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self.count = 0
+
+    def write(self, product, product_url: str = ""):
+        line = json.dumps(product_record(product, product_url), ensure_ascii=False)
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
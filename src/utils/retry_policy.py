@@ -0,0 +1,113 @@
+"""
+Политики повторных попыток по классам ошибок: экспоненциальная задержка с джиттером и бюджет попыток
+"""
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from ..config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Классы ошибок
+TIMEOUT = 'timeout'                  # Страница или JSON не получены вовремя
+BLOCK = 'block'                      # Антибот не пройден
+NO_WIDGET_STATES = 'no_widget_states'  # JSON пришел без widgetStates (обычно временно)
+DRIVER_CRASH = 'driver_crash'        # Драйвер упал или сессия Chrome потеряна
+PARSE_ERROR = 'parse_error'          # Данные получены, но разобрать их не удалось
+
+@dataclass
+class RetryPolicy:
+    max_retries: int
+    base_delay: float
+    max_delay: float
+    multiplier: float = 2.0
+
+    def delay(self, retry_number: int) -> float:
+        """Задержка перед повтором с номером retry_number (с 1), половина которой случайна"""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (retry_number - 1))
+        jitter = delay * Settings.RETRY_JITTER
+        return delay - jitter + random.uniform(0, jitter)
+
+class RetryBudget:
+    """Счетчики попыток одной операции (товар, страница, воркер) по классам ошибок"""
+
+    def __init__(self, engine: 'RetryEngine'):
+        self.engine = engine
+        self.retries: Dict[str, int] = {}
+
+    def retry(self, error_class: str, stop_event: Optional[threading.Event] = None) -> bool:
+        """
+        Учитывает неудачу. Если бюджет класса не исчерпан - ждет задержку и возвращает True,
+        иначе сразу возвращает False
+        """
+        delay = self.next_delay(error_class)
+        if delay is None:
+            return False
+
+        if stop_event:
+            stop_event.wait(delay)
+        else:
+            time.sleep(delay)
+        return True
+
+    def next_delay(self, error_class: str) -> Optional[float]:
+        """Учитывает неудачу без ожидания: задержка перед повтором или None, если бюджет исчерпан"""
+        retry_number = self.retries.get(error_class, 0) + 1
+        policy = self.engine.policy(error_class)
+        if retry_number > policy.max_retries:
+            self.engine.record(error_class, exhausted=True)
+            return None
+
+        self.retries[error_class] = retry_number
+        delay = policy.delay(retry_number)
+        self.engine.record(error_class, delay=delay)
+        logger.debug(f"Повтор после ошибки '{error_class}' ({retry_number}/{policy.max_retries}) через {delay:.1f}с")
+        return delay
+
+class RetryEngine:
+    """Политики из Settings.RETRY_POLICIES и общие счетчики повторов"""
+
+    def __init__(self, policies: Optional[Dict[str, Dict]] = None):
+        self._lock = threading.Lock()
+        self.policies = {
+            error_class: RetryPolicy(**params)
+            for error_class, params in (policies or Settings.RETRY_POLICIES).items()
+        }
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def budget(self) -> RetryBudget:
+        return RetryBudget(self)
+
+    def policy(self, error_class: str) -> RetryPolicy:
+        return self.policies.get(error_class) or self.policies[TIMEOUT]
+
+    def classify(self, error: Exception) -> str:
+        """Класс ошибки по исключению"""
+        message = str(error)
+        if "Access blocked" in message or "Antibot timeout" in message:
+            return BLOCK
+        if isinstance(error, TimeoutException):
+            return TIMEOUT
+        if isinstance(error, WebDriverException):
+            return DRIVER_CRASH
+        return PARSE_ERROR
+
+    def record(self, error_class: str, delay: float = 0.0, exhausted: bool = False):
+        with self._lock:
+            stats = self._stats.setdefault(error_class, {'retries': 0, 'exhausted': 0, 'delay_seconds': 0.0})
+            if exhausted:
+                stats['exhausted'] += 1
+            else:
+                stats['retries'] += 1
+                stats['delay_seconds'] += delay
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {error_class: dict(stats) for error_class, stats in self._stats.items()}
+
+# Глобальный экземпляр с политиками из настроек
+retry_engine = RetryEngine()
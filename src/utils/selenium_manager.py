@@ -2,6 +2,8 @@
 import logging
 import time
 import json
+import base64
+import re
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
@@ -9,15 +11,81 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium_stealth import stealth
 from typing import Optional
+from dataclasses import dataclass
+from ..config.settings import Settings
+from .http_fetcher import HttpFetcher
+from .rate_limiter import rate_limiter
+from .retry_policy import retry_engine, BLOCK, DRIVER_CRASH
 
 logger = logging.getLogger(__name__)
 
+# Результаты проверки антибота
+BLOCK_OK = 'ok'                  # Обычная страница или JSON
+BLOCK_CHALLENGE = 'challenge'    # Страница проверки, которая проходит сама после ожидания/перезагрузки
+BLOCK_HARD = 'hard_block'        # Доступ запрещен - ждать бесполезно, нужен другой драйвер
+
+@dataclass
+class BlockCheck:
+    status: str
+    reason: str = ""
+
+    @property
+    def is_ok(self) -> bool:
+        return self.status == BLOCK_OK
+
 class SeleniumManager:
     
+    # Одна проверка вместо page_source: заголовок, HTTP статус документа и маркеры страницы проверки
+    DETECT_BLOCK_SCRIPT = """
+        const nav = performance.getEntriesByType('navigation')[0];
+        const markers = [
+            '#challenge-form', '#challenge-running', '#cf-challenge-running', '#cf-wrapper',
+            '#ddos-guard', 'iframe[src*="captcha"]', 'form[action*="captcha"]',
+            'script[src*="challenge"]', 'script[src*="antibot"]', '[class*="antibot"]'
+        ];
+        return {
+            title: document.title || '',
+            status: nav && nav.responseStatus ? nav.responseStatus : 0,
+            json: (document.contentType || '').indexOf('json') !== -1,
+            marker: markers.find(selector => document.querySelector(selector) !== null) || ''
+        };
+    """
+    
+    # Заголовки страниц антибота целиком: название товара или категории со словом "challenge"
+    # или "blocked" не должно считаться блокировкой
+    CHALLENGE_TITLES = re.compile(
+        r"(?:antibot(?: challenge page)?|just a moment|checking your browser(?: before accessing .*)?"
+        r"|проверка браузера|ddos-guard|one more step)[\s.!…]*",
+        re.IGNORECASE
+    )
+    HARD_BLOCK_TITLES = re.compile(
+        r"(?:доступ ограничен|access denied|access restricted|(?:403 )?forbidden|blocked)[\s.!…]*",
+        re.IGNORECASE
+    )
+    
     def __init__(self, headless=True):
         self.headless = headless
         self.driver: Optional[webdriver.Chrome] = None
         self.wait: Optional[WebDriverWait] = None
+        self.http_fetcher = HttpFetcher(timeout=Settings.HTTP_FETCH_TIMEOUT)
+        self.network_logging = False
+        self.blocked = False
+        self.challenges = 0  # Сколько раз на этом драйвере встречалась проверка антибота
+        self._wait_seconds = 0.0  # Ожидание ограничителя частоты и паузы перед повторами
+    
+    @property
+    def wait_seconds(self) -> float:
+        """Время, которое запросы драйвера ждали сами по себе; в задержку ответов драйвера оно не входит"""
+        return self._wait_seconds + self.http_fetcher.wait_seconds
+    
+    def backoff(self, retries, error_class: str) -> bool:
+        """Пауза перед повтором по бюджету retries; False - если бюджет класса исчерпан"""
+        delay = retries.next_delay(error_class)
+        if delay is None:
+            return False
+        time.sleep(delay)
+        self._wait_seconds += delay
+        return True
     
     def create_driver(self) -> webdriver.Chrome:
         chrome_options = Options()
@@ -57,6 +125,8 @@ class SeleniumManager:
             
             self.driver = driver
             self.wait = WebDriverWait(driver, 20)
+            self.blocked = False
+            self.network_logging = False
             
             logger.info("Chrome драйвер создан успешно")
             return driver
@@ -74,7 +144,7 @@ class SeleniumManager:
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
         chrome_options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
-        chrome_options.add_experimental_option('loggingPrefs', {'performance': 'ALL'})
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
         
         chrome_options.add_argument("--disable-extensions")
         chrome_options.add_argument("--disable-plugins")
@@ -102,6 +172,8 @@ class SeleniumManager:
             
             self.driver = driver
             self.wait = WebDriverWait(driver, 20)
+            self.blocked = False
+            self.network_logging = True
             
             logger.info("Chrome драйвер с логированием создан успешно")
             return driver
@@ -110,6 +182,12 @@ class SeleniumManager:
             logger.error(f"Ошибка создания Chrome драйвера с логированием: {e}")
             raise
     
+    def create_api_driver(self) -> webdriver.Chrome:
+        """Драйвер для запросов к JSON API: с CDP логированием сети, если оно включено"""
+        if Settings.USE_NETWORK_INTERCEPTION:
+            return self.create_driver_with_logging()
+        return self.create_driver()
+    
     def navigate_to_url(self, url: str) -> bool:
         if not self.driver:
             logger.error("Драйвер не инициализирован")
@@ -117,6 +195,10 @@ class SeleniumManager:
         
         try:
             logger.debug(f"Переход по URL: {url}")
+            if self.network_logging:
+                # Сбрасываем накопленные события сети от предыдущих переходов
+                self._drain_performance_log()
+            self._wait_seconds += rate_limiter.acquire()
             self.driver.get(url)
             
 
@@ -131,10 +213,29 @@ class SeleniumManager:
             logger.error(f"Ошибка WebDriver: {e}")
             return False
     
+    def fetch_json_via_http(self, url: str) -> Optional[str]:
+        """Быстрый путь: запрос к API через HTTP сессию с cookies браузера"""
+        if not Settings.USE_HTTP_FETCH:
+            return None
+        return self.http_fetcher.fetch_json(url)
+    
+    def sync_http_session(self) -> bool:
+        """Обновляет cookies HTTP сессии после успешного прохождения антибота в браузере"""
+        if not Settings.USE_HTTP_FETCH or not self.driver:
+            return False
+        return self.http_fetcher.load_from_driver(self.driver)
+    
     def wait_for_json_response(self, timeout: int = 90) -> Optional[str]:
         if not self.driver:
             return None
             
+        if self.network_logging:
+            json_content = self._wait_for_network_json(timeout)
+            if json_content:
+                return json_content
+            logger.debug("Тело ответа не получено через CDP, ищем JSON в странице")
+            return self._extract_json_from_html(self.driver.page_source)
+            
         try:
             logger.debug("Ожидание JSON ответа...")
             start_time = time.time()
@@ -150,14 +251,10 @@ class SeleniumManager:
                     page_source = self.driver.page_source
                     json_content = self._extract_json_from_html(page_source)
                     
-                    if json_content:
-                        try:
-                            data = json.loads(json_content)
-                            if 'widgetStates' in data:
-                                logger.debug("JSON ответ с widgetStates найден")
-                                return json_content
-                        except json.JSONDecodeError:
-                            pass
+                    # Полный разбор JSON выполняет вызывающий код
+                    if json_content and '"widgetStates"' in json_content:
+                        logger.debug("JSON ответ с widgetStates найден")
+                        return json_content
                     
                     time.sleep(2.5)  # Увеличенное время ожидания между проверками
                     
@@ -173,6 +270,62 @@ class SeleniumManager:
             logger.error(f"Ошибка ожидания JSON ответа: {e}")
             return None
     
+    def _wait_for_network_json(self, timeout: int) -> Optional[str]:
+        """Ждет завершения загрузки документа в сетевом слое и забирает тело через Network.getResponseBody"""
+        start_time = time.time()
+        document_requests = set()
+        finished_requests = set()
+        
+        try:
+            while time.time() - start_time < timeout:
+                for entry in self.driver.get_log('performance'):
+                    try:
+                        message = json.loads(entry['message'])['message']
+                    except (KeyError, ValueError):
+                        continue
+                    
+                    method = message.get('method')
+                    params = message.get('params', {})
+                    
+                    if method == 'Network.responseReceived' and params.get('type') == 'Document':
+                        document_requests.add(params.get('requestId'))
+                    elif method == 'Network.loadingFinished':
+                        finished_requests.add(params.get('requestId'))
+                
+                for request_id in document_requests & finished_requests:
+                    body = self._get_response_body(request_id)
+                    if body and '"widgetStates"' in body:
+                        logger.debug("JSON ответ с widgetStates получен через CDP")
+                        return body
+                    document_requests.discard(request_id)
+                
+                time.sleep(Settings.NETWORK_POLL_INTERVAL)
+            
+            logger.warning(f"Таймаут ожидания ответа в сетевом логе после {timeout} секунд")
+            return None
+            
+        except Exception as e:
+            logger.debug(f"Ошибка чтения сетевого лога: {e}")
+            return None
+    
+    def _get_response_body(self, request_id: str) -> Optional[str]:
+        try:
+            response = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        except Exception as e:
+            logger.debug(f"Не удалось получить тело ответа {request_id}: {e}")
+            return None
+        
+        body = response.get('body', '')
+        if response.get('base64Encoded'):
+            body = base64.b64decode(body).decode('utf-8', errors='replace')
+        return body
+    
+    def _drain_performance_log(self):
+        try:
+            self.driver.get_log('performance')
+        except Exception:
+            pass
+    
     def _extract_json_from_html(self, html_content: str) -> Optional[str]:
         try:
             import re
@@ -205,57 +358,86 @@ class SeleniumManager:
         start_time = time.time()
         reload_attempts = 0
         max_reload_attempts = 3
+        # Повторные проверки после перезагрузки и ошибок драйвера - с растущей задержкой вместо 15 секунд
+        retries = retry_engine.budget()
 
         while time.time() - start_time < max_wait_time:
             try:
-                if self._is_blocked():
+                check = self.detect_block()
+                if check.status == BLOCK_HARD:
+                    # Жесткая блокировка не снимается перезагрузкой - сразу отдаем драйвер на замену
+                    logger.warning(f"Доступ запрещен ({check.reason}), возвращаем новый драйвер")
+                    self.challenges += 1
+                    rate_limiter.report_block()
+                    self.blocked = True
+                    raise Exception(f"Access blocked: {check.reason}")
+                if check.status == BLOCK_CHALLENGE:
+                    if reload_attempts == 0:
+                        # Первая проверка антибота на этой странице - сигнал снизить частоту запросов
+                        self.challenges += 1
+                        rate_limiter.report_block()
                     if reload_attempts < max_reload_attempts:
                         logger.info(
-                            f"Обнаружена блокировка, перезагрузка страницы "
+                            f"Обнаружена проверка антибота ({check.reason}), перезагрузка страницы "
                             f"(попытка {reload_attempts + 1}/{max_reload_attempts})"
                         )
+                        self._wait_seconds += rate_limiter.acquire()
                         self.driver.refresh()
                         reload_attempts += 1
-                        time.sleep(15)      
+                        delay = retry_engine.policy(BLOCK).delay(reload_attempts)
+                        time.sleep(delay)
+                        self._wait_seconds += delay
                         continue
                     else:
                         logger.warning("Превышено кол-во попыток, возвращаем новый драйвер")
+                        self.blocked = True
                         raise Exception("Access blocked after retries")
                 else:
                     logger.info("Антибот защита пройдена")
+                    if reload_attempts == 0:
+                        rate_limiter.report_success()
                     return
             except Exception as e:
                 if "Access blocked" in str(e):
                     raise
-                time.sleep(15)  
+                if not self.backoff(retries, DRIVER_CRASH):
+                    break
                 continue
 
         logger.warning(f"Антибот защита не пройдена за {max_wait_time} секунд")
+        self.blocked = True
         raise Exception("Antibot timeout")
     
-    def _is_blocked(self) -> bool:
+    def detect_block(self) -> BlockCheck:
+        """Проверяет текущую страницу одним execute_script, не сериализуя DOM"""
         if not self.driver:
-            return True
-            
-        try:
-            blocked_indicators = [
-                "cloudflare", "checking your browser", "enable javascript",
-                "access denied", "blocked", "ddos-guard", "проверка браузера",
-                "доступ ограничен", "access restricted"
-            ]
-            
-            page_source = self.driver.page_source.lower()
-            
-            for indicator in blocked_indicators:
-                if indicator in page_source:
-                    return True
-                    
-            return False
-            
-        except Exception:
-            return True
+            return BlockCheck(BLOCK_HARD, "нет драйвера")
+        
+        state = self.driver.execute_script(self.DETECT_BLOCK_SCRIPT) or {}
+        
+        # Ответ API в формате JSON - это не страница антибота, даже если в данных встречается "blocked"
+        if state.get('json'):
+            return BlockCheck(BLOCK_OK)
+        
+        title = state.get('title', '').strip()
+        status = state.get('status', 0)
+        marker = state.get('marker', '')
+        
+        if marker:
+            return BlockCheck(BLOCK_CHALLENGE, f"маркер {marker}")
+        if self.CHALLENGE_TITLES.fullmatch(title):
+            return BlockCheck(BLOCK_CHALLENGE, f"заголовок '{title}'")
+        if self.HARD_BLOCK_TITLES.fullmatch(title):
+            return BlockCheck(BLOCK_HARD, f"заголовок '{title}'")
+        if status == 429:
+            return BlockCheck(BLOCK_HARD, "HTTP 429")
+        if status in (403, 503):
+            # Страница проверки без известных маркеров - даем ей шанс пройти после перезагрузки
+            return BlockCheck(BLOCK_CHALLENGE, f"HTTP {status}")
+        return BlockCheck(BLOCK_OK)
     
     def close(self):
+        self.http_fetcher.close()
         if self.driver:
             try:
                 self.driver.quit()
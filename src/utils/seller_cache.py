@@ -0,0 +1,138 @@
+"""
+Кэш данных продавцов на диске с отдельным временем жизни для групп полей
+"""
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+from ..config.settings import Settings
+from .sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Группы полей SellerInfo: юридические данные меняются редко, статистика - часто
+FIELD_GROUPS = {
+    'legal': ('company_name', 'inn', 'working_time'),
+    'stats': ('orders_count', 'reviews_count', 'average_rating'),
+}
+
+# Поля выгрузки (FIELD_NAMES в bot_manager) -> группа кэша
+SELECTED_FIELD_GROUPS = {
+    'company_name': 'legal',
+    'inn': 'legal',
+    'working_time': 'legal',
+    'orders_count': 'stats',
+    'reviews_count': 'stats',
+    'average_rating': 'stats',
+}
+
+class SellerCache(SQLiteStore):
+    """Кэш SellerInfo по seller_id со статистикой попаданий"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sellers (
+            seller_id TEXT PRIMARY KEY,
+            company_name TEXT NOT NULL DEFAULT '',
+            inn TEXT NOT NULL DEFAULT '',
+            working_time TEXT NOT NULL DEFAULT '',
+            legal_updated_at REAL NOT NULL DEFAULT 0,
+            orders_count TEXT NOT NULL DEFAULT '',
+            reviews_count TEXT NOT NULL DEFAULT '',
+            average_rating TEXT NOT NULL DEFAULT '',
+            stats_updated_at REAL NOT NULL DEFAULT 0
+        );
+    """
+
+    # Ограничение SQLite на число параметров в запросе
+    BATCH_SIZE = 500
+
+    def __init__(self, db_path=None, ttl_hours: Optional[Dict[str, float]] = None):
+        super().__init__(db_path or Settings.CACHE_DIR / "sellers.sqlite3")
+        self.ttl_hours = ttl_hours or Settings.SELLER_CACHE_TTL_HOURS
+        self.hits = 0
+        self.misses = 0
+
+    def groups_for_fields(self, selected_fields: Optional[List[str]]) -> Set[str]:
+        """
+        Группы, свежесть которых нужна для выбранных полей (без полей - все группы).
+        Пустое множество значит, что выбранным полям данные страницы продавца не нужны и кэш не читается.
+        """
+        if not selected_fields:
+            return set(FIELD_GROUPS)
+        return {SELECTED_FIELD_GROUPS[f] for f in selected_fields if f in SELECTED_FIELD_GROUPS}
+
+    def get_many(self, seller_ids: Iterable[str], groups: Optional[Set[str]] = None) -> Dict:
+        """Возвращает {seller_id: SellerInfo} для продавцов, у которых все нужные группы свежие"""
+        from ..parsers.seller_parser import SellerInfo
+
+        groups = set(FIELD_GROUPS) if groups is None else groups
+        if not groups:
+            # Без нужных групп любая запись "свежая" - не отдаем их и не считаем это попаданиями
+            return {}
+        seller_ids = list(seller_ids)
+        now = time.time()
+        found = {}
+
+        with self._lock:
+            for i in range(0, len(seller_ids), self.BATCH_SIZE):
+                batch = seller_ids[i:i + self.BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT seller_id, company_name, inn, working_time, legal_updated_at, "
+                    f"orders_count, reviews_count, average_rating, stats_updated_at "
+                    f"FROM sellers WHERE seller_id IN ({placeholders})",
+                    batch
+                ).fetchall()
+
+                for row in rows:
+                    updated_at = {'legal': row[4], 'stats': row[8]}
+                    if all(now - updated_at[g] <= self.ttl_hours[g] * 3600 for g in groups):
+                        found[row[0]] = SellerInfo(
+                            seller_id=row[0], company_name=row[1], inn=row[2], working_time=row[3],
+                            orders_count=row[5], reviews_count=row[6], average_rating=row[7],
+                            success=True
+                        )
+
+            self.hits += len(found)
+            self.misses += len(seller_ids) - len(found)
+
+        return found
+
+    def put_many(self, sellers: Iterable):
+        """Сохраняет успешно распарсенных продавцов; обе группы полей считаются обновленными"""
+        now = time.time()
+        rows = [
+            (s.seller_id, s.company_name, s.inn, s.working_time, now,
+             s.orders_count, s.reviews_count, s.average_rating, now)
+            for s in sellers if s.success
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sellers (seller_id, company_name, inn, working_time, legal_updated_at, "
+                "orders_count, reviews_count, average_rating, stats_updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total * 100) if total else 0.0
+            }
+
+_seller_cache: Optional[SellerCache] = None
+_seller_cache_lock = threading.Lock()
+
+def get_seller_cache() -> SellerCache:
+    """Общий экземпляр кэша продавцов (создается при первом обращении)"""
+    global _seller_cache
+    with _seller_cache_lock:
+        if _seller_cache is None:
+            _seller_cache = SellerCache()
+        return _seller_cache
@@ -0,0 +1,121 @@
+"""
+Общая очередь задач для воркеров: свободный воркер сам забирает следующий элемент
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Iterable, Optional, Set
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class WorkItem:
+    key: str
+    attempts: int = 0
+    failed_workers: Set[int] = field(default_factory=set)
+    requeued_at: float = 0.0
+
+class WorkQueue:
+    """
+    Потокобезопасная очередь с повторной выдачей неудачных элементов.
+    Неудачный элемент в первую очередь достается другому воркеру; воркер, на котором он упал,
+    заберет его сам только если остальные не успели за handoff_timeout секунд.
+    """
+
+    def __init__(self, items: Optional[Iterable[str]] = None, max_attempts: int = 3,
+                 handoff_timeout: float = 5.0, maxsize: int = 0):
+        self.max_attempts = max_attempts
+        self.maxsize = maxsize
+        self.handoff_timeout = handoff_timeout
+        self._cond = threading.Condition()
+        self._pending: Deque[WorkItem] = deque()
+        self._in_flight = 0
+        self._workers = 0
+        self._closed = False
+        self.completed = 0
+
+        if items is not None:
+            for key in items:
+                self._pending.append(WorkItem(key=key))
+            self._closed = True
+
+    def put(self, key: str):
+        """Добавляет элемент; при заданном maxsize ждет, пока воркеры разберут очередь"""
+        with self._cond:
+            while self.maxsize and len(self._pending) >= self.maxsize and self._workers > 0:
+                self._cond.wait(timeout=0.5)
+            self._pending.append(WorkItem(key=key))
+            self._cond.notify_all()
+
+    def close(self):
+        """Новых элементов больше не будет"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def register_worker(self):
+        with self._cond:
+            self._workers += 1
+
+    def unregister_worker(self):
+        with self._cond:
+            self._workers -= 1
+            self._cond.notify_all()
+
+    def get(self, worker_id: int) -> Optional[WorkItem]:
+        """Возвращает следующий элемент или None, когда очередь закрыта и вся работа завершена"""
+        with self._cond:
+            while True:
+                item = self._pick(worker_id)
+                if item is not None:
+                    self._in_flight += 1
+                    self._cond.notify_all()
+                    return item
+
+                if self._closed and not self._pending and self._in_flight == 0:
+                    return None
+
+                self._cond.wait(timeout=0.5)
+
+    def _pick(self, worker_id: int) -> Optional[WorkItem]:
+        now = time.time()
+        for item in self._pending:
+            own_failure = worker_id in item.failed_workers
+            if not own_failure or self._workers <= 1 or now - item.requeued_at >= self.handoff_timeout:
+                self._pending.remove(item)
+                return item
+        return None
+
+    def requeue(self, item: WorkItem, worker_id: int) -> bool:
+        """Возвращает неудачный элемент в очередь; False, если попытки исчерпаны"""
+        with self._cond:
+            item.attempts += 1
+            if item.attempts >= self.max_attempts:
+                return False
+
+            item.failed_workers.add(worker_id)
+            item.requeued_at = time.time()
+            self._pending.append(item)
+            self._in_flight -= 1
+            self._cond.notify_all()
+            logger.debug(f"Элемент {item.key} возвращен в очередь (попытка {item.attempts + 1}/{self.max_attempts})")
+            return True
+
+    def task_done(self, item: WorkItem):
+        with self._cond:
+            self._in_flight -= 1
+            self.completed += 1
+            self._cond.notify_all()
+
+    def release(self, item: WorkItem):
+        """Возвращает элемент, который воркер не успел обработать (падение воркера), без учета попытки"""
+        with self._cond:
+            self._pending.appendleft(item)
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._pending) + self._in_flight
@@ -0,0 +1,64 @@
+"""
+Тесты асинхронного движка: ошибка одного товара не теряет результаты остальных, учет сессии пользователя
+"""
+import asyncio
+
+from src.parsers import async_product_parser
+from src.parsers.async_product_parser import AsyncProductParser
+from src.parsers.product_json import ProductInfo
+from src.utils.work_queue import WorkQueue
+
+
+def test_failing_item_and_callback_do_not_lose_results():
+    written = []
+
+    def on_result(result):
+        if result.article == '3':
+            raise OSError("диск заполнен")
+        written.append(result.article)
+
+    parser = AsyncProductParser(2, on_result=on_result)
+
+    async def fake_process(session, article):
+        if article == '2':
+            raise ValueError("сломанный ответ")
+        return ProductInfo(article=article, success=True)
+
+    parser._process_article = fake_process
+    queue = WorkQueue(['1', '2', '3', '4'], max_attempts=1)
+
+    results = asyncio.run(parser._parse_queue(queue))
+
+    by_article = {result.article: result for result in results}
+    assert sorted(by_article) == ['1', '2', '3', '4']
+    assert not by_article['2'].success and 'сломанный ответ' in by_article['2'].error
+    assert by_article['3'].success
+    assert sorted(written) == ['1', '2', '4']
+    assert len(queue) == 0
+
+
+class FakeResourceManager:
+    def __init__(self):
+        self.sessions = []
+
+    def start_parsing_session(self, user_id, stage, total_items):
+        self.sessions.append((user_id, stage, total_items))
+        return 1
+
+
+def test_products_stage_is_registered_in_user_session(monkeypatch):
+    resources = FakeResourceManager()
+    monkeypatch.setattr(async_product_parser, 'resource_manager', resources)
+    parser = AsyncProductParser(2, user_id='u1')
+    parser._warm_cookies = lambda article: True
+    parser._release_driver = lambda: None
+
+    async def fake_process(session, article):
+        return ProductInfo(article=article, success=True)
+
+    parser._process_article = fake_process
+
+    results = parser._parse_articles(['1', '2'])
+
+    assert [result.article for result in results] == ['1', '2']
+    assert resources.sessions == [('u1', 'products', 2)]
@@ -0,0 +1,64 @@
+"""
+Тесты журнала запуска: восстановление состояния, удаление завершенных журналов, продолжение запуска
+"""
+import json
+
+import pytest
+
+from src.config.settings import Settings
+from src.core.app_manager import AppManager
+from src.parsers.product_json import ProductInfo
+from src.utils.checkpoint import RunJournal
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Settings, 'CHECKPOINT_DIR', tmp_path)
+    return tmp_path
+
+
+def test_unfinished_run_is_restored():
+    journal = RunJournal.create('https://www.ozon.ru/category/x-1/', ['name'], 'u1', 50)
+    journal.record_links({'https://www.ozon.ru/product/a-1/': 'img'})
+    journal.record_links_done('folder')
+    journal.record_product(ProductInfo(article='1', name='A', success=True))
+    journal.record_product(ProductInfo(article='2', error='fail'))
+    journal.close()
+
+    assert RunJournal.find_unfinished('u1') == journal.run_id
+    state = RunJournal.load(journal.run_id)
+    assert state.links_done and state.output_folder == 'folder'
+    assert list(state.product_results()) == ['1']
+    assert state.max_products == 50
+
+
+def test_mark_done_removes_journal(checkpoint_dir):
+    journal = RunJournal.create('url', None, 'u1', 10)
+    journal.mark_done()
+
+    assert not list(checkpoint_dir.iterdir())
+    assert RunJournal.find_unfinished('u1') is None
+
+
+def test_truncated_last_line_means_unfinished(checkpoint_dir):
+    path = checkpoint_dir / 'u1_20240101_000000_000000.jsonl'
+    path.write_text(json.dumps({'type': 'meta'}) + '\n{"type": "prod', encoding='utf-8')
+
+    assert RunJournal.find_unfinished('u1') == path.stem
+    assert RunJournal.load(path.stem) is not None
+
+
+def test_resume_passes_journal_limit_without_touching_settings(monkeypatch):
+    journal = RunJournal.create('https://www.ozon.ru/category/x-1/', ['name'], 'u1', 50)
+    journal.close()
+    settings = Settings()
+    monkeypatch.setattr(settings, 'MAX_PRODUCTS', 1000)
+    manager = AppManager(settings)
+    calls = []
+    monkeypatch.setattr(manager, 'start_parsing', lambda *args, **kwargs: calls.append((args, kwargs)) or True)
+
+    assert manager.resume_parsing('u1')
+
+    [(args, kwargs)] = calls
+    assert kwargs == {'resume_run_id': journal.run_id, 'max_products': 50}
+    assert settings.MAX_PRODUCTS == 1000
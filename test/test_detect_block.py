@@ -0,0 +1,52 @@
+"""
+Тесты распознавания страниц антибота по состоянию документа
+"""
+import pytest
+
+from src.utils.selenium_manager import BLOCK_CHALLENGE, BLOCK_HARD, BLOCK_OK, SeleniumManager
+
+
+class FakeDriver:
+    def __init__(self, state):
+        self.state = state
+
+    def execute_script(self, script):
+        return self.state
+
+
+def detect(title='', status=200, json_page=False, marker=''):
+    manager = SeleniumManager()
+    manager.driver = FakeDriver({'title': title, 'status': status, 'json': json_page, 'marker': marker})
+    return manager.detect_block().status
+
+
+@pytest.mark.parametrize('title', [
+    'Antibot Challenge Page', 'Just a moment...', 'Checking your browser before accessing ozon.ru',
+    'DDoS-Guard', 'One more step'
+])
+def test_challenge_titles(title):
+    assert detect(title) == BLOCK_CHALLENGE
+
+
+@pytest.mark.parametrize('title', ['Доступ ограничен', 'Access Denied', '403 Forbidden', 'Blocked'])
+def test_hard_block_titles(title):
+    assert detect(title) == BLOCK_HARD
+
+
+@pytest.mark.parametrize('title', [
+    'Настольная игра Challenge Accepted - купить на OZON',
+    'Horizon Forbidden West для PS5 - купить по выгодной цене | OZON',
+    'Замок Blocked Lock - купить в интернет-магазине OZON',
+])
+def test_product_titles_with_antibot_words_are_ok(title):
+    assert detect(title) == BLOCK_OK
+
+
+def test_json_response_is_never_a_block():
+    assert detect('Access Denied', status=403, json_page=True) == BLOCK_OK
+
+
+def test_marker_and_status():
+    assert detect(marker='#challenge-form') == BLOCK_CHALLENGE
+    assert detect(status=429) == BLOCK_HARD
+    assert detect(status=503) == BLOCK_CHALLENGE
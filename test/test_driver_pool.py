@@ -0,0 +1,64 @@
+"""
+Тесты пула драйверов: прогрев нового драйвера
+"""
+import pytest
+
+from src.config.settings import Settings
+from src.utils import driver_pool as driver_pool_module
+from src.utils.driver_pool import DriverPool
+
+
+class FakeManager:
+    instances = []
+    navigate_ok = True
+
+    def __init__(self):
+        self.driver = None
+        self.closed = False
+        self.synced = False
+        FakeManager.instances.append(self)
+
+    def create_api_driver(self):
+        self.driver = object()
+        return self.driver
+
+    def navigate_to_url(self, url):
+        return FakeManager.navigate_ok
+
+    def sync_http_session(self):
+        self.synced = True
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeManager.instances = []
+    FakeManager.navigate_ok = True
+    monkeypatch.setattr(driver_pool_module, 'SeleniumManager', FakeManager)
+    monkeypatch.setattr(Settings, 'DRIVER_POOL_SPARES', 0)
+    pool = DriverPool()
+    yield pool
+    pool.shutdown()
+
+
+def test_warm_driver_is_synced_and_handed_out(pool):
+    manager = pool.acquire()
+
+    assert manager.synced
+    assert not manager.closed
+    assert pool.get_status()['busy_drivers'] == 1
+
+
+def test_driver_that_failed_antibot_is_closed_and_not_handed_out(pool):
+    FakeManager.navigate_ok = False
+
+    with pytest.raises(Exception, match="Antibot timeout"):
+        pool.acquire()
+
+    [manager] = FakeManager.instances
+    assert manager.closed
+    assert not manager.synced
+    assert pool.get_status()['busy_drivers'] == 0
@@ -0,0 +1,83 @@
+"""
+Тесты экспортеров: реестр форматов, CSV и типизированные колонки Parquet
+"""
+import csv
+
+import pytest
+
+from src.utils.excel_exporter import ExcelExporter
+from src.utils.exporters import CsvExporter, ParquetExporter, get_exporter, resolve_fields
+
+PRODUCTS = [
+    {'article': '1', 'name': 'Товар "1"', 'card_price': 90, 'price': 100, 'original_price': 0,
+     'seller': {'name': 'Магазин', 'inn': '7700000000'}},
+    {'article': '2', 'name': 'Товар 2', 'card_price': 0, 'price': 250, 'original_price': 300,
+     'seller': {}},
+]
+
+
+def test_registry_returns_exporter_for_each_format(tmp_path):
+    assert isinstance(get_exporter('xlsx', tmp_path, 'out'), ExcelExporter)
+    assert isinstance(get_exporter('csv', tmp_path, 'out'), CsvExporter)
+
+    exporter = get_exporter('parquet', tmp_path, 'out')
+    assert isinstance(exporter, ParquetExporter)
+    assert exporter.filepath == tmp_path / 'out.parquet'
+
+    with pytest.raises(ValueError):
+        get_exporter('xml', tmp_path, 'out')
+
+
+def test_unknown_fields_are_dropped_and_empty_selection_uses_defaults():
+    assert resolve_fields(['article', 'unknown', 'price']) == ['article', 'price']
+    assert resolve_fields(None) == ['name', 'company_name', 'product_url', 'image_url']
+
+
+def test_csv_has_headers_and_one_row_per_product(tmp_path):
+    exporter = CsvExporter(tmp_path, 'out')
+
+    assert exporter.export_results({'products': iter(PRODUCTS)}, ['article', 'name', 'seller_name', 'price'])
+
+    with open(exporter.filepath, encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows == [
+        ['Артикул', 'Название товара', 'Продавец', 'Цена'],
+        ['1', 'Товар "1"', 'Магазин', '100'],
+        ['2', 'Товар 2', '', '250'],
+    ]
+
+
+def test_parquet_columns_use_mapping_types(tmp_path):
+    pytest.importorskip('pyarrow')
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    exporter = ParquetExporter(tmp_path, 'out')
+    exporter.BATCH_SIZE = 1
+
+    assert exporter.export_results({'products': iter(PRODUCTS)}, ['article', 'inn', 'price', 'original_price'])
+
+    table = pq.read_table(exporter.filepath)
+    assert table.schema.field('article').type == pa.string()
+    assert table.schema.field('inn').type == pa.string()
+    assert table.schema.field('price').type == pa.int64()
+    assert table.to_pydict() == {
+        'article': ['1', '2'],
+        'inn': ['7700000000', None],
+        'price': [100, 250],
+        'original_price': [0, 300],
+    }
+
+
+def test_parquet_without_products_keeps_schema(tmp_path):
+    pytest.importorskip('pyarrow')
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    exporter = ParquetExporter(tmp_path, 'out')
+
+    assert exporter.export_results({'products': iter([])}, ['article', 'price'])
+
+    table = pq.read_table(exporter.filepath)
+    assert table.num_rows == 0
+    assert table.schema.field('price').type == pa.int64()
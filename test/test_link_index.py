@@ -0,0 +1,47 @@
+"""
+Тесты индекса ссылок: поиск по точному артикулу и поведение как у словаря ссылок
+"""
+from src.utils.link_index import LinkIndex, extract_article
+
+URL_123 = 'https://www.ozon.ru/product/chaynik-123/'
+URL_1234 = 'https://www.ozon.ru/product/chaynik-1234/'
+
+
+def test_extract_article():
+    assert extract_article(URL_123) == '123'
+    assert extract_article('https://www.ozon.ru/category/x-15500/') == ''
+
+
+def test_lookup_is_by_exact_article_not_substring():
+    links = LinkIndex({URL_1234: 'img1234', URL_123: 'img123'})
+    assert links.url_for('123') == URL_123
+    assert links.image_for('123') == 'img123'
+    assert links.url_for('12') == ''
+    assert links.image_for('12') == ''
+
+
+def test_add_reports_only_new_articles_and_keeps_first_url():
+    links = LinkIndex()
+    assert links.add(URL_123, 'img') == '123'
+    assert links.add(URL_123 + '?at=1', 'img2') == ''
+    assert links.add('https://www.ozon.ru/highlight/', '') == ''
+    assert links.articles() == ['123']
+    assert links.url_for('123') == URL_123
+    assert len(links) == 3
+
+
+def test_mapping_interface_and_delete():
+    links = LinkIndex()
+    links[URL_123] = 'img'
+    assert dict(links) == {URL_123: 'img'} == links.to_dict()
+
+    del links[URL_123]
+    assert links.url_for('123') == ''
+    assert not links
+
+
+def test_wrap_reuses_existing_index():
+    links = LinkIndex({URL_123: 'img'})
+    assert LinkIndex.wrap(links) is links
+    assert LinkIndex.wrap({URL_123: 'img'}).articles() == ['123']
+    assert LinkIndex.wrap(None).articles() == []
@@ -0,0 +1,263 @@
+"""
+Тесты сбора ссылок категории: извлечение новых плиток, страницы composer-api и остановка скролла
+"""
+import json
+import shutil
+import subprocess
+from html.parser import HTMLParser
+from pathlib import Path
+
+import pytest
+
+from src.config.settings import Settings
+from src.parsers.link_parser import ListingTile, OzonLinkParser
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+CATEGORY_URL = 'https://www.ozon.ru/category/posuda-1/'
+
+
+class _TreeBuilder(HTMLParser):
+    """Фикстура HTML -> дерево {tag, attrs, children} для DOM-заглушки в node"""
+
+    VOID_TAGS = {'img', 'br', 'input', 'meta', 'link'}
+
+    def __init__(self):
+        super().__init__()
+        self.root = {'tag': 'document', 'attrs': {}, 'children': []}
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        node = {'tag': tag, 'attrs': dict(attrs), 'children': []}
+        self.stack[-1]['children'].append(node)
+        if tag not in self.VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_endtag(self, tag):
+        if tag not in self.VOID_TAGS:
+            self.stack.pop()
+
+
+# Минимальный DOM: селекторы вида tag[attr*='v'][attr='v']:not([attr]), списки через запятую
+DOM_SHIM = r"""
+const input = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+class Element {
+  constructor(node) {
+    this.tagName = node.tag; this.attrs = node.attrs;
+    this.children = node.children.map(child => new Element(child));
+  }
+  get href() { return this.attrs.href || ''; }
+  get src() { return this.attrs.src || ''; }
+  getAttribute(name) { return name in this.attrs ? this.attrs[name] : null; }
+  setAttribute(name, value) { this.attrs[name] = String(value); }
+  *walk() { for (const child of this.children) { yield child; yield* child.walk(); } }
+  querySelectorAll(selector) { return [...this.walk()].filter(el => matches(el, selector)); }
+  querySelector(selector) { return this.querySelectorAll(selector)[0] || null; }
+}
+function matchesCompound(el, selector) {
+  const tag = selector.match(/^[a-z]+/);
+  if (tag && el.tagName !== tag[0]) return false;
+  for (const [, not, name, op, value] of selector.matchAll(/(:not\()?\[([\w-]+)(?:([*]?=)'([^']*)')?\]\)?/g)) {
+    const actual = el.getAttribute(name);
+    let ok = actual !== null;
+    if (ok && op === '=') ok = actual === value;
+    if (ok && op === '*=') ok = actual.includes(value);
+    if (not ? ok : !ok) return false;
+  }
+  return true;
+}
+function matches(el, selector) { return selector.split(',').some(part => matchesCompound(el, part.trim())); }
+const root = new Element(input.tree);
+const document = {
+  getElementById: id => root.querySelectorAll(`[id='${id}']`)[0] || null,
+  querySelector: selector => root.querySelector(selector),
+};
+const run = new Function('document', input.script);
+console.log(JSON.stringify(input.calls.map(() => run(document))));
+"""
+
+
+def run_in_dom(script, html, calls=1):
+    if not shutil.which('node'):
+        pytest.skip("для проверки скриптов страницы нужен node")
+    builder = _TreeBuilder()
+    builder.feed(html)
+    payload = json.dumps({'tree': builder.root, 'script': script, 'calls': list(range(calls))})
+    output = subprocess.run(['node', '-e', DOM_SHIM], input=payload, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout)
+
+
+def test_tile_script_returns_only_product_tiles_once():
+    html = (FIXTURES / 'category_tiles.html').read_text(encoding='utf-8')
+
+    first, second = run_in_dom(OzonLinkParser.EXTRACT_NEW_TILES_SCRIPT, html, calls=2)
+
+    assert first == {
+        'https://www.ozon.ru/product/chaynik-101/': 'https://cdn.ozon.ru/101.jpg',
+        'https://www.ozon.ru/product/kruzhka-102/': 'https://cdn.ozon.ru/102.jpg',
+    }
+    # Плитки помечены data-seen; плитка без картинки не помечается и проверяется на следующем скролле
+    assert second == {}
+
+
+def test_tiles_state_script_counts_tiles_and_loader():
+    html = (FIXTURES / 'category_tiles.html').read_text(encoding='utf-8')
+    assert run_in_dom(OzonLinkParser.TILES_STATE_SCRIPT, html) == [[4, True]]
+
+
+@pytest.fixture
+def parser():
+    return OzonLinkParser(CATEGORY_URL, max_products=10)
+
+
+@pytest.fixture
+def category_page():
+    return json.loads((FIXTURES / 'category_page.json').read_text(encoding='utf-8'))
+
+
+def test_page_json_links_and_tiles(parser, category_page):
+    links = parser._extract_links_from_page(category_page)
+
+    assert links == {
+        'https://www.ozon.ru/product/chaynik-101/': 'https://cdn.ozon.ru/101.jpg',
+        'https://www.ozon.ru/product/kruzhka-102/': 'https://cdn.ozon.ru/102.jpg',
+    }
+    assert parser.tiles['101'] == ListingTile(name='Чайник', price=1299, original_price=1990)
+    assert parser.tiles['102'] == ListingTile()
+
+
+def test_next_page_cursor(parser, category_page):
+    assert parser._find_next_page(category_page) == '/category/posuda-1/?page=2'
+    assert parser._find_next_page({'nextPage': '/category/posuda-1/?page=3', **category_page}) == '/category/posuda-1/?page=3'
+    assert parser._find_next_page({'widgetStates': {}}) == ''
+
+
+def page(articles, next_page=''):
+    items = [{'action': {'link': f'/product/tovar-{a}/'}, 'tileImage': {'items': [{'image': {'link': f'img{a}'}}]}}
+             for a in articles]
+    return {'nextPage': next_page, 'widgetStates': {'tileGridDesktop-1': json.dumps({'items': items})}}
+
+
+class FakeSeleniumManager:
+    def sync_http_session(self):
+        return True
+
+
+def collect_via_api(parser, pages):
+    requested = []
+
+    def fetch(path):
+        requested.append(path)
+        return pages.get(path)
+
+    parser.selenium_manager = FakeSeleniumManager()
+    parser._fetch_page_json = fetch
+    return parser._collect_links_via_api(), requested
+
+
+def test_api_walks_pages_until_cursor_ends(parser):
+    pages = {
+        '/category/posuda-1/': page(['1', '2'], '/category/posuda-1/?page=2'),
+        '/category/posuda-1/?page=2': page(['3'], ''),
+    }
+    emitted = []
+    parser.on_links = emitted.append
+
+    success, requested = collect_via_api(parser, pages)
+
+    assert success
+    assert requested == ['/category/posuda-1/', '/category/posuda-1/?page=2']
+    assert parser.collected_links.articles() == ['1', '2', '3']
+    assert [list(batch) for batch in emitted] == [
+        ['https://www.ozon.ru/product/tovar-1/', 'https://www.ozon.ru/product/tovar-2/'],
+        ['https://www.ozon.ru/product/tovar-3/'],
+    ]
+
+
+def test_api_stops_on_repeated_cursor_page_without_new_links_and_limit(parser):
+    looping = {'/category/posuda-1/': page(['1'], '/category/posuda-1/')}
+    assert collect_via_api(parser, looping)[1] == ['/category/posuda-1/']
+
+    parser = OzonLinkParser(CATEGORY_URL, max_products=10)
+    stale = {
+        '/category/posuda-1/': page(['1'], '/p2'),
+        '/p2': page(['1'], '/p3'),
+    }
+    assert collect_via_api(parser, stale)[1] == ['/category/posuda-1/', '/p2']
+
+    parser = OzonLinkParser(CATEGORY_URL, max_products=2)
+    limited = {'/category/posuda-1/': page(['1', '2', '3'], '/p2'), '/p2': page(['4'])}
+    success, requested = collect_via_api(parser, limited)
+    assert parser.collected_links.articles() == ['1', '2']
+    assert requested == ['/category/posuda-1/']
+
+
+class ScrollDriver:
+    """Лента категории: каждый скролл подгружает следующую порцию плиток"""
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.tiles = 0
+        self.scrolls = 0
+
+    def execute_script(self, script):
+        if script == OzonLinkParser.EXTRACT_NEW_TILES_SCRIPT:
+            batch = self.batches.pop(0) if self.batches else {}
+            self.tiles += len(batch)
+            return batch
+        if script == OzonLinkParser.TILES_STATE_SCRIPT:
+            return [self.tiles + (len(self.batches[0]) if self.batches else 0), False]
+        self.scrolls += 1
+        return None
+
+
+def links(*articles):
+    return {f'https://www.ozon.ru/product/tovar-{a}/': f'img{a}' for a in articles}
+
+
+@pytest.fixture
+def fast_scroll(monkeypatch):
+    monkeypatch.setattr(Settings, 'SCROLL_POLL_INTERVAL', 0.0)
+    monkeypatch.setattr(Settings, 'SCROLL_WAIT_TIMEOUT', 0.05)
+    monkeypatch.setattr(Settings, 'SCROLL_WAIT_MIN', 0.0)
+    monkeypatch.setattr(Settings, 'SCROLL_STALL_SECONDS', 0.0)
+
+
+def test_scroll_collects_until_limit(parser, fast_scroll):
+    parser.max_products = 3
+    parser.driver = ScrollDriver([links('1', '2'), links('2', '3', '4')])
+
+    parser._collect_links()
+
+    assert parser.collected_links.articles() == ['1', '2', '3']
+
+
+def test_scroll_stops_after_three_empty_scrolls_once_stall_window_passed(parser, fast_scroll):
+    parser.driver = ScrollDriver([links('1'), {}, {}, {}, links('2')])
+
+    parser._collect_links()
+
+    assert parser.collected_links.articles() == ['1']
+    assert parser.driver.scrolls == 3
+
+
+def test_scroll_keeps_waiting_inside_stall_window(parser, fast_scroll, monkeypatch):
+    monkeypatch.setattr(Settings, 'SCROLL_STALL_SECONDS', 0.3)
+    parser.driver = ScrollDriver([links('1'), {}, {}, {}, links('2')])
+
+    parser._collect_links()
+
+    # Пустые скроллы шли быстрее окна ожидания - лента дождалась следующей порции
+    assert parser.collected_links.articles() == ['1', '2']
+
+
+def test_scroll_timeout_adapts_to_observed_latency(parser, monkeypatch):
+    monkeypatch.setattr(Settings, 'SCROLL_WAIT_TIMEOUT', 8)
+    monkeypatch.setattr(Settings, 'SCROLL_WAIT_MIN', 2)
+
+    assert parser._get_scroll_timeout() == 8
+    parser.scroll_latencies = [0.5, 0.4, 0.6]
+    assert parser._get_scroll_timeout() == 2
+    parser.scroll_latencies = [1.0, 1.2, 1.1]
+    assert parser._get_scroll_timeout() == pytest.approx(3.3)
+    parser.scroll_latencies = [5.0]
+    assert parser._get_scroll_timeout() == 8
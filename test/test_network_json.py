@@ -0,0 +1,79 @@
+"""
+Тесты получения ответа API из сетевого лога Chrome (CDP) вместо опроса page_source
+"""
+import base64
+import json
+
+import pytest
+
+from src.config.settings import Settings
+from src.utils.selenium_manager import SeleniumManager
+
+BODY = json.dumps({'widgetStates': {'webPrice-1': '{}'}})
+
+
+def log_entry(method, **params):
+    return {'message': json.dumps({'message': {'method': method, 'params': params}})}
+
+
+class NetworkDriver:
+    def __init__(self, batches, bodies, page_source=''):
+        self.batches = list(batches)
+        self.bodies = bodies
+        self.page_source = page_source
+        self.body_requests = []
+
+    def get_log(self, log_type):
+        assert log_type == 'performance'
+        return self.batches.pop(0) if self.batches else []
+
+    def execute_cdp_cmd(self, command, params):
+        assert command == 'Network.getResponseBody'
+        self.body_requests.append(params['requestId'])
+        return self.bodies[params['requestId']]
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(Settings, 'NETWORK_POLL_INTERVAL', 0.0)
+    manager = SeleniumManager()
+    manager.network_logging = True
+    return manager
+
+
+def test_body_is_taken_when_document_finished_loading(manager):
+    manager.driver = NetworkDriver(
+        [
+            [log_entry('Network.responseReceived', requestId='img', type='Image'),
+             log_entry('Network.responseReceived', requestId='doc', type='Document')],
+            [{'message': 'не JSON'}, log_entry('Network.loadingFinished', requestId='img')],
+            [log_entry('Network.loadingFinished', requestId='doc')],
+        ],
+        {'doc': {'body': BODY, 'base64Encoded': False}}
+    )
+
+    assert manager.wait_for_json_response(timeout=5) == BODY
+    # Тело запрашивается только у документа и только после окончания загрузки
+    assert manager.driver.body_requests == ['doc']
+
+
+def test_base64_body_is_decoded(manager):
+    encoded = base64.b64encode(BODY.encode('utf-8')).decode('ascii')
+    manager.driver = NetworkDriver(
+        [[log_entry('Network.responseReceived', requestId='doc', type='Document'),
+          log_entry('Network.loadingFinished', requestId='doc')]],
+        {'doc': {'body': encoded, 'base64Encoded': True}}
+    )
+
+    assert manager.wait_for_json_response(timeout=5) == BODY
+
+
+def test_document_without_widget_states_falls_back_to_page(manager):
+    manager.driver = NetworkDriver(
+        [[log_entry('Network.responseReceived', requestId='doc', type='Document'),
+          log_entry('Network.loadingFinished', requestId='doc')]],
+        {'doc': {'body': '<html>проверка</html>', 'base64Encoded': False}},
+        page_source=f'<html><body><pre>{BODY}</pre></body></html>'
+    )
+
+    assert manager.wait_for_json_response(timeout=0.05) == BODY
@@ -0,0 +1,212 @@
+"""
+Тесты общей части воркеров: разбор очереди, пересоздание воркера, замена деградировавшего драйвера,
+задержка драйвера без ожидания ограничителя частоты
+"""
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.config.settings import Settings
+from src.parsers import pooled_worker
+from src.parsers.pooled_worker import PooledWorker, WorkerPoolMixin
+from src.utils import selenium_manager as selenium_manager_module
+from src.utils.driver_pool import DriverPool
+from src.utils.rate_limiter import RateLimiter
+from src.utils.retry_policy import BLOCK, RetryPolicy, retry_engine
+from src.utils.selenium_manager import SeleniumManager
+from src.utils.work_queue import WorkQueue
+
+
+class FakeManager:
+    def __init__(self, name):
+        self.name = name
+        self.driver = object()
+        self.blocked = False
+        self.challenges = 0
+        self.wait_seconds = 0.0
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self):
+        self.reports = []
+        self.released = []
+        self.degraded = set()
+        self.fail_acquire = False
+        self.created = 0
+
+    def acquire(self):
+        if self.fail_acquire:
+            raise RuntimeError("нет драйвера")
+        self.created += 1
+        return FakeManager(f"driver{self.created}")
+
+    def release(self, manager):
+        self.released.append(manager.name)
+
+    def report(self, manager, success, elapsed, challenged=False):
+        self.reports.append((manager.name, success))
+
+    def is_degraded(self, manager):
+        return manager.name in self.degraded
+
+
+class EchoWorker(PooledWorker):
+    def __init__(self, worker_id, failing=()):
+        super().__init__(worker_id)
+        self.failing = set(failing)
+
+    def _process_item(self, key):
+        return SimpleNamespace(key=key, success=key not in self.failing)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    fake = FakePool()
+    monkeypatch.setattr(pooled_worker, 'driver_pool', fake)
+    monkeypatch.setattr(Settings, 'USE_DRIVER_POOL', True)
+    return fake
+
+
+def test_worker_reports_every_item_and_returns_results(pool):
+    worker = EchoWorker(1, failing={'b'})
+    worker.initialize()
+    seen = []
+
+    results = worker.parse_from_queue(WorkQueue(['a', 'b'], max_attempts=1), seen.append)
+
+    assert [(r.key, r.success) for r in results] == [('a', True), ('b', False)]
+    assert seen == results
+    assert pool.reports == [('driver1', True), ('driver1', False)]
+
+
+def test_degraded_driver_is_replaced_before_release(pool):
+    worker = EchoWorker(1)
+    worker.initialize()
+    pool.degraded.add('driver1')
+
+    worker.parse_from_queue(WorkQueue(['a'], max_attempts=1))
+
+    assert worker.selenium_manager.name == 'driver2'
+    assert pool.released == ['driver1']
+
+
+def test_failed_replacement_keeps_old_driver_for_single_release(pool):
+    worker = EchoWorker(1)
+    worker.initialize()
+    pool.degraded.add('driver1')
+    pool.fail_acquire = True
+
+    with pytest.raises(RuntimeError):
+        worker.parse_from_queue(WorkQueue(['a'], max_attempts=1))
+    worker.close()
+
+    assert pool.released == ['driver1']
+
+
+class EchoParser(WorkerPoolMixin):
+    def __init__(self, crash_first=0):
+        self.on_result = None
+        self.crashes_left = crash_first
+
+    def _create_worker(self, worker_id):
+        parser = self
+
+        class Worker(EchoWorker):
+            def _process_item(self, key):
+                if parser.crashes_left:
+                    parser.crashes_left -= 1
+                    raise Exception("Access blocked")
+                return super()._process_item(key)
+
+        return Worker(worker_id)
+
+
+def test_run_workers_collects_results_from_all_workers(pool):
+    results = EchoParser()._run_workers(WorkQueue([str(i) for i in range(20)]), 3)
+    assert sorted(int(r.key) for r in results) == list(range(20))
+
+
+def test_blocked_worker_is_recreated_and_item_is_not_lost(pool, monkeypatch):
+    policies = dict(retry_engine.policies, **{BLOCK: RetryPolicy(max_retries=2, base_delay=0.0, max_delay=0.0)})
+    monkeypatch.setattr(retry_engine, 'policies', policies)
+
+    results = EchoParser(crash_first=1)._worker_task_with_retry(1, WorkQueue(['a', 'b']))
+
+    assert [r.key for r in results] == ['a', 'b']
+    assert pool.released == ['driver1', 'driver2']
+
+
+class FakeDriver:
+    def __init__(self, page_load=0.0):
+        self.page_load = page_load
+
+    def get(self, url):
+        time.sleep(self.page_load)
+
+    def execute_script(self, script):
+        if script == "return 1":
+            return 1
+        return {'title': '', 'status': 200, 'json': True, 'marker': ''}
+
+    def quit(self):
+        pass
+
+
+class NavigatingWorker(PooledWorker):
+    def _process_item(self, key):
+        return SimpleNamespace(key=key, success=self.selenium_manager.navigate_to_url(f'https://www.ozon.ru/{key}'))
+
+
+@pytest.fixture
+def real_pool(monkeypatch):
+    monkeypatch.setattr(Settings, 'USE_DRIVER_POOL', True)
+    monkeypatch.setattr(Settings, 'DRIVER_POOL_SPARES', 0)
+    monkeypatch.setattr(Settings, 'DRIVER_HEALTH_MIN_SAMPLES', 3)
+    monkeypatch.setattr(Settings, 'DRIVER_HEALTH_LATENCY_TARGET', 0.01)
+    monkeypatch.setattr(Settings, 'RATE_LIMIT_ENABLED', True)
+
+    def make_pool(page_load):
+        def create_driver():
+            manager = SeleniumManager()
+            manager.driver = FakeDriver(page_load)
+            return manager
+
+        pool = DriverPool()
+        monkeypatch.setattr(pool, '_create_warm_driver', create_driver)
+        monkeypatch.setattr(pooled_worker, 'driver_pool', pool)
+        return pool
+
+    return make_pool
+
+
+def test_slow_rate_limiter_does_not_retire_healthy_drivers(real_pool, monkeypatch):
+    # Один токен в 0.05с - каждый переход ждет ограничитель дольше цели задержки драйвера
+    monkeypatch.setattr(selenium_manager_module, 'rate_limiter', RateLimiter(rate=20, burst=1))
+    pool = real_pool(page_load=0.0)
+    worker = NavigatingWorker(1)
+    worker.initialize()
+    driver = worker.selenium_manager
+
+    worker.parse_from_queue(WorkQueue([str(i) for i in range(8)], max_attempts=1))
+
+    assert driver.wait_seconds > 0.2
+    assert worker.selenium_manager is driver
+    assert not pool.is_degraded(driver)
+    assert pool.get_status()['retired_drivers'] == 0
+
+
+def test_slow_driver_is_still_replaced(real_pool, monkeypatch):
+    monkeypatch.setattr(selenium_manager_module, 'rate_limiter', RateLimiter(rate=1000, burst=100))
+    pool = real_pool(page_load=0.05)
+    worker = NavigatingWorker(1)
+    worker.initialize()
+    driver = worker.selenium_manager
+
+    worker.parse_from_queue(WorkQueue([str(i) for i in range(8)], max_attempts=1))
+
+    assert worker.selenium_manager is not driver
+    assert pool.get_status()['retired_drivers'] >= 1
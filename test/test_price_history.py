@@ -0,0 +1,78 @@
+"""
+Тесты истории цен: запись наблюдений, последняя цена артикула и поиск снижений
+"""
+import pytest
+
+from src.parsers.product_json import ProductInfo
+from src.utils.price_history import PriceHistory
+
+
+def product(article, card_price, price=0, original_price=0, **kwargs):
+    return ProductInfo(article=article, card_price=card_price, price=price, original_price=original_price,
+                       success=True, **kwargs)
+
+
+@pytest.fixture
+def history(tmp_path):
+    return PriceHistory(tmp_path / 'history.sqlite3')
+
+
+def latest(history, article):
+    with history._lock:
+        return history._conn.execute(
+            "SELECT ts, card_price FROM latest WHERE article = ?", (int(article),)
+        ).fetchone()
+
+
+def test_only_fresh_successful_numeric_articles_are_recorded(history):
+    history.record([
+        product('1', 100),
+        ProductInfo(article='2', error='ошибка'),
+        product('3', 300, from_cache=True),
+        product('abc', 400),
+    ], ts=10)
+
+    assert history.get_stats() == {'observations': 1, 'articles': 1}
+
+
+def test_series_is_ordered_and_bounded(history):
+    for ts, price in ((30, 90), (10, 100), (20, 95)):
+        history.record([product('1', price, 120, 150)], ts=ts)
+
+    assert [(p.ts, p.card_price) for p in history.series('1')] == [(10, 100), (20, 95), (30, 90)]
+    assert [p.ts for p in history.series('1', start=15, end=25)] == [20]
+    assert history.series('2') == []
+
+
+def test_latest_is_not_overwritten_by_older_observation(history):
+    history.record([product('1', 90)], ts=20)
+    history.record([product('1', 100)], ts=10)
+
+    assert latest(history, '1') == (20, 90)
+    assert history.get_stats() == {'observations': 2, 'articles': 1}
+
+
+def test_drops_since_compares_latest_with_price_at_that_time(history):
+    history.record([product('1', 1000), product('2', 1000), product('3', 1000)], ts=10)
+    history.record([product('1', 950)], ts=15)
+    history.record([product('1', 800), product('2', 950), product('3', 1100)], ts=30)
+
+    # Цена на момент 20 - последнее наблюдение не позже 20: у артикула 1 это 950
+    drops = history.drops_since(20, min_drop=0.1)
+    assert [(d.article, d.old_price, d.new_price, d.change_percent) for d in drops] == [('1', 950, 800, -15.8)]
+
+    drops = history.drops_since(20, min_drop=0.01)
+    assert [d.article for d in drops] == ['1', '2']
+
+
+def test_drops_ignore_articles_without_new_observations_and_zero_prices(history):
+    history.record([product('1', 1000), product('2', 0, price=500)], ts=10)
+    history.record([product('2', 0, price=300)], ts=30)
+
+    assert history.drops_since(20) == []
+    assert [d.article for d in history.drops_since(20, field='price')] == ['2']
+
+
+def test_unknown_field_is_rejected(history):
+    with pytest.raises(ValueError):
+        history.drops_since(0, field='name')
@@ -0,0 +1,160 @@
+"""
+Тесты режима мониторинга цен: первая проверка, новые товары, изменение цен и снятие с продажи
+"""
+import json
+
+import pytest
+
+import src.core.price_monitor as price_monitor
+import src.utils.article_catalogue as article_catalogue
+from src.config.settings import Settings
+from src.parsers.product_json import ProductInfo
+from src.utils.link_index import LinkIndex
+
+
+def product_url(article):
+    return f'https://www.ozon.ru/product/tovar-{article}/'
+
+
+class Shop:
+    """Состояние категории, которое видят поддельные парсеры"""
+
+    def __init__(self):
+        self.listed = [str(i) for i in range(1, 6)]
+        self.prices = {article: 100 for article in self.listed}
+        self.link_requests = []
+        self.links_ok = True
+        self.fields = []
+        self.workers = []
+
+    def link_parser(self, category_url, max_products, user_id):
+        shop = self
+
+        class FakeLinkParser:
+            output_folder = 'monitor_test'
+
+            def start_parsing(self):
+                shop.link_requests.append(max_products)
+                if not shop.links_ok:
+                    return False, LinkIndex()
+                return True, LinkIndex({product_url(a): f'img{a}' for a in shop.listed[:max_products]})
+
+        return FakeLinkParser()
+
+    def product_parser(self, max_workers, *args, selected_fields=None, cache_max_age_minutes=None, **kwargs):
+        shop = self
+        shop.workers.append(max_workers)
+        shop.fields.append((selected_fields, cache_max_age_minutes))
+
+        class FakeProductParser:
+            def parse_products(self, links):
+                return [
+                    ProductInfo(article=a, name=f'Товар {a}', card_price=shop.prices[a], price=shop.prices[a] + 10,
+                                success=True) if a in shop.prices else ProductInfo(article=a, error='нет товара')
+                    for a in links.articles()
+                ]
+
+            def cleanup(self):
+                pass
+
+        return FakeProductParser()
+
+
+@pytest.fixture
+def shop(tmp_path, monkeypatch):
+    shop = Shop()
+    monkeypatch.setattr(Settings, 'DATA_DIR', tmp_path)
+    monkeypatch.setattr(Settings, 'OUTPUT_DIR', tmp_path / 'output')
+    monkeypatch.setattr(Settings, 'MONITOR_DISCOVERY_PRODUCTS', 2)
+    monkeypatch.setattr(Settings, 'MONITOR_REMOVED_AFTER_MISSES', 2)
+    monkeypatch.setattr(article_catalogue, '_article_catalogue', None)
+    monkeypatch.setattr(price_monitor, 'OzonLinkParser', shop.link_parser)
+    monkeypatch.setattr(price_monitor, 'create_product_parser', shop.product_parser)
+    return shop
+
+
+def make_monitor():
+    return price_monitor.PriceMonitor('https://www.ozon.ru/category/x-1/', max_products=5, max_workers=3)
+
+
+def run():
+    return make_monitor().run()
+
+
+def test_first_run_is_baseline_with_full_crawl(shop):
+    diff = run()
+
+    assert diff.baseline
+    assert [item.article for item in diff.new] == ['1', '2', '3', '4', '5']
+    assert shop.link_requests == [5]
+    # Цены свежие и без этапа продавцов, лимиты переданы вызывающим кодом
+    assert shop.fields == [(price_monitor.PriceMonitor.FIELDS, 0)]
+    assert shop.workers == [3]
+
+
+def test_next_run_reports_new_and_changed_prices(shop):
+    run()
+    shop.listed.insert(0, '6')
+    shop.prices['6'] = 500
+    shop.prices['3'] = 80
+
+    diff = run()
+
+    assert not diff.baseline
+    assert shop.link_requests == [5, 2]
+    assert [item.article for item in diff.new] == ['6']
+    assert [(c.article, c.old_card_price, c.card_price, c.old_price, c.price) for c in diff.price_changed] == [
+        ('3', 100, 80, 110, 90)
+    ]
+    assert diff.checked == 6
+
+
+def test_product_is_removed_after_consecutive_confirmed_misses(shop):
+    run()
+    shop.listed.remove('4')
+    del shop.prices['4']
+
+    first_miss = run()
+    assert first_miss.failed == 1 and not first_miss.removed
+    # Первые страницы не покрывают товар - его отсутствие подтверждается полным обходом ссылок
+    assert shop.link_requests == [5, 2, 5]
+
+    second_miss = run()
+    assert [item.article for item in second_miss.removed] == ['4']
+    assert second_miss.failed == 0
+    assert second_miss.removed[0].card_price == 100
+
+    # Снятый товар больше не запрашивается
+    assert run().checked == 4
+
+
+def test_failed_fetch_of_listed_product_is_not_a_miss(shop):
+    run()
+    # Товар все еще в категории, но его запрос каждый раз падает (блокировка, таймаут)
+    del shop.prices['4']
+
+    for _ in range(3):
+        diff = run()
+        assert diff.failed == 1 and not diff.removed
+
+    assert run().checked == 5
+
+
+def test_failed_listing_crawl_does_not_confirm_absence(shop):
+    run()
+    shop.listed.remove('4')
+    del shop.prices['4']
+    shop.links_ok = False
+
+    for _ in range(3):
+        diff = run()
+        assert diff.failed == 1 and not diff.removed
+
+
+def test_save_diff_writes_json(shop):
+    monitor = make_monitor()
+    diff = monitor.run()
+
+    data = json.loads(monitor.save_diff(diff).read_text(encoding='utf-8'))
+    assert data['baseline'] is True
+    assert len(data['new']) == 5
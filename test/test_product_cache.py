@@ -0,0 +1,85 @@
+"""
+Тесты кэша товаров: окно свежести, запись только успешных результатов и отказ от частично разобранных товаров
+"""
+import pytest
+
+from src.config.settings import Settings
+from src.parsers import product_parser
+from src.parsers.product_json import ProductInfo
+from src.parsers.product_parser import OzonProductParser
+from src.utils import product_cache as product_cache_module
+from src.utils.product_cache import ProductCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(product_cache_module.time, 'time', clock.time)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ProductCache(tmp_path / 'products.sqlite3')
+    yield cache
+    cache.close()
+
+
+def product(article, **kwargs):
+    return ProductInfo(article=article, name=f'Товар {article}', card_price=100, success=True, **kwargs)
+
+
+def test_fresh_products_are_returned_and_stale_are_not(cache, clock):
+    cache.put_many([product('1')])
+
+    clock.now += 30 * 60
+    found = cache.get_fresh(['1'], max_age_minutes=60)
+    assert found['1'].name == 'Товар 1'
+    assert found['1'].from_cache
+
+    clock.now += 60 * 60
+    assert cache.get_fresh(['1'], max_age_minutes=60) == {}
+
+
+def test_put_many_skips_failed_and_cached_results(cache):
+    cache.put_many([
+        product('1'),
+        ProductInfo(article='2', error='таймаут'),
+        product('3', from_cache=True),
+    ])
+
+    assert set(cache.get_fresh(['1', '2', '3'], max_age_minutes=60)) == {'1'}
+
+
+@pytest.fixture
+def shared_cache(cache, monkeypatch):
+    monkeypatch.setattr(Settings, 'PRODUCT_CACHE_ENABLED', True)
+    monkeypatch.setattr(product_parser, 'get_product_cache', lambda: cache)
+    return cache
+
+
+def test_partially_decoded_results_are_not_cached(shared_cache):
+    parser = OzonProductParser(selected_fields=['price'])
+    assert not parser.decode_plan.complete
+
+    parser._store_in_cache([product('1')])
+
+    assert shared_cache.get_fresh(['1'], max_age_minutes=60) == {}
+
+
+def test_fully_decoded_results_are_cached_and_found_by_lookup(shared_cache):
+    parser = OzonProductParser(cache_max_age_minutes=60)
+    parser._store_in_cache([product('1')])
+
+    cached, missing = parser.lookup_cached(['1', '2'])
+
+    assert set(cached) == {'1'}
+    assert missing == ['2']
@@ -0,0 +1,59 @@
+"""
+Тесты пула разбора ответов API: результат совпадает с разбором на месте, пул безопасно останавливается
+"""
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from src.config.settings import Settings
+from src.parsers.product_decoder import ProductDecoder
+from src.parsers.product_json import DecodePlan, parse_product_json
+
+BODY = (Path(__file__).parent / 'fixtures' / 'product_response.json').read_text(encoding='utf-8')
+
+
+@pytest.fixture
+def decoder(monkeypatch):
+    monkeypatch.setattr(Settings, 'JSON_DECODE_PROCESSES', 1)
+    monkeypatch.setattr(Settings, 'JSON_DECODE_MIN_BYTES', 0)
+    decoder = ProductDecoder()
+    yield decoder
+    decoder.shutdown()
+
+
+@pytest.mark.parametrize('body', [BODY, BODY.encode('utf-8')])
+def test_pool_decode_matches_inline_parse(decoder, body):
+    expected = parse_product_json('1', body)
+
+    assert expected.success and expected.seller_id == '4242'
+    assert decoder.decode('1', body) == expected
+    assert decoder._executor is not None
+
+
+def test_pool_decode_respects_plan(decoder):
+    plan = DecodePlan.for_fields(['price'])
+    assert decoder.decode('1', BODY, plan) == parse_product_json('1', BODY, plan)
+
+
+def test_async_decode_matches_inline_parse(decoder):
+    result = asyncio.run(decoder.decode_async('1', BODY))
+    assert result == parse_product_json('1', BODY)
+
+
+def test_small_responses_are_decoded_inline(decoder, monkeypatch):
+    monkeypatch.setattr(Settings, 'JSON_DECODE_MIN_BYTES', len(BODY) + 1)
+
+    assert decoder.decode('1', BODY) == parse_product_json('1', BODY)
+    assert decoder._executor is None
+
+
+def test_shutdown_is_safe_to_call_twice(decoder):
+    decoder.decode('1', BODY)
+
+    decoder.shutdown()
+    decoder.shutdown()
+
+    assert decoder._executor is None
+    # После остановки пул создается заново при следующем большом ответе
+    assert decoder.decode('1', BODY) == parse_product_json('1', BODY)
@@ -0,0 +1,66 @@
+"""
+Тесты разбора ответа API товара: выбор виджетов по DecodePlan и поиск seller_id
+"""
+import json
+
+from src.parsers.product_json import FULL_PLAN, DecodePlan, parse_product_json
+
+
+def response(sticky=True, price=True, seller_link='/seller/ooo-romashka-4242/', extra=None):
+    widgets = {}
+    if sticky:
+        widgets['webStickyProducts-1-default-1'] = json.dumps({
+            'name': 'Чайник', 'coverImageUrl': 'cover.jpg',
+            'seller': {'name': 'Ромашка', 'link': seller_link}
+        })
+    if price:
+        widgets['webPrice-2-default-1'] = json.dumps({
+            'cardPrice': '1 990 ₽', 'price': '2 190 ₽', 'originalPrice': '3 000 ₽'
+        })
+    widgets.update(extra or {})
+    return json.dumps({'widgetStates': widgets})
+
+
+def test_plan_for_fields():
+    assert DecodePlan.for_fields(None) == FULL_PLAN
+    assert DecodePlan.for_fields([]) == FULL_PLAN
+    assert DecodePlan.for_fields(['card_price', 'price']) == DecodePlan(sticky=False, price=True, seller=False)
+    assert DecodePlan.for_fields(['name', 'price']) == DecodePlan(sticky=True, price=True, seller=False)
+    assert DecodePlan.for_fields(['inn']) == DecodePlan(sticky=True, price=False, seller=True)
+    # Без цен успешность определяется по названию, поэтому webStickyProducts нужен
+    assert DecodePlan.for_fields(['article']) == DecodePlan(sticky=True, price=False, seller=False)
+    assert FULL_PLAN.complete and not DecodePlan(seller=False).complete
+
+
+def test_full_plan_decodes_everything():
+    info = parse_product_json('1', response())
+
+    assert info.success
+    assert (info.name, info.image_url, info.company_name) == ('Чайник', 'cover.jpg', 'Ромашка')
+    assert (info.card_price, info.price, info.original_price) == (1990, 2190, 3000)
+    assert (info.seller_id, info.seller_link) == ('4242', 'https://ozon.ru/seller/4242')
+
+
+def test_price_plan_skips_sticky_widget_and_seller():
+    info = parse_product_json('1', response(), DecodePlan.for_fields(['price']))
+
+    assert info.success
+    assert info.price == 2190
+    assert info.name == '' and info.seller_id == ''
+
+
+def test_price_plan_without_price_widget_fails():
+    info = parse_product_json('1', response(price=False), DecodePlan.for_fields(['price']))
+    assert not info.success
+
+
+def test_seller_id_fallback_scans_other_widgets():
+    body = response(seller_link='', extra={'webCurrentSeller-3': json.dumps({'link': '/seller/555/'})})
+    assert parse_product_json('1', body).seller_id == '555'
+    assert parse_product_json('1', body, DecodePlan(seller=False)).seller_id == ''
+
+
+def test_bytes_body_and_errors():
+    assert parse_product_json('1', response().encode('utf-8')).success
+    assert 'widgetStates' in parse_product_json('1', '{}').error
+    assert 'JSON' in parse_product_json('1', '<html>').error
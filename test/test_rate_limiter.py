@@ -0,0 +1,72 @@
+"""
+Тесты ограничителя частоты запросов: шаги AIMD и выдача токенов
+"""
+import pytest
+
+from src.config.settings import Settings
+from src.utils.rate_limiter import RateLimiter
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    monkeypatch.setattr(Settings, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setattr(Settings, 'RATE_LIMIT_MIN_RPS', 0.5)
+    monkeypatch.setattr(Settings, 'RATE_LIMIT_MAX_RPS', 4.0)
+    monkeypatch.setattr(Settings, 'RATE_LIMIT_STEP', 0.5)
+    monkeypatch.setattr(Settings, 'RATE_LIMIT_BACKOFF', 0.5)
+    monkeypatch.setattr(Settings, 'RATE_LIMIT_INCREASE_EVERY', 3)
+    monkeypatch.setattr(Settings, 'RATE_LIMIT_DECREASE_COOLDOWN', 0.0)
+
+
+def test_burst_tokens_then_wait():
+    limiter = RateLimiter(rate=2.0, burst=2)
+    assert limiter._try_take() == 0
+    assert limiter._try_take() == 0
+    assert 0 < limiter._try_take() <= 0.5
+    assert limiter.total_requests == 2
+
+
+def test_additive_increase_after_series_of_successes():
+    limiter = RateLimiter(rate=2.0, burst=1)
+    for _ in range(2):
+        limiter.report_success()
+    assert limiter.rate == 2.0
+    limiter.report_success()
+    assert limiter.rate == 2.5
+
+
+def test_increase_is_capped_at_max_rate():
+    limiter = RateLimiter(rate=3.8, burst=1)
+    for _ in range(3):
+        limiter.report_success()
+    assert limiter.rate == 4.0
+
+
+def test_block_halves_rate_drains_tokens_and_resets_successes():
+    limiter = RateLimiter(rate=2.0, burst=5)
+    limiter.report_success()
+    limiter.report_success()
+    limiter.report_block()
+
+    assert limiter.rate == 1.0
+    assert limiter._tokens == 0.0
+    assert limiter.total_blocks == 1
+    # Серия успешных запросов начинается заново
+    limiter.report_success()
+    assert limiter.rate == 1.0
+
+
+def test_decrease_is_bounded_by_min_rate():
+    limiter = RateLimiter(rate=0.6, burst=1)
+    limiter.report_block()
+    assert limiter.rate == 0.5
+
+
+def test_simultaneous_blocks_decrease_once_per_cooldown(monkeypatch):
+    monkeypatch.setattr(Settings, 'RATE_LIMIT_DECREASE_COOLDOWN', 60.0)
+    limiter = RateLimiter(rate=2.0, burst=1)
+    limiter._last_decrease = -1e9
+    limiter.report_block()
+    limiter.report_block()
+    assert limiter.rate == 1.0
+    assert limiter.total_blocks == 2
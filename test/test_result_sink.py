@@ -0,0 +1,38 @@
+"""
+Тесты потоковой записи результатов: строка на каждый готовый товар, после закрытия запись прекращается
+"""
+import json
+
+from src.parsers.product_json import ProductInfo
+from src.utils.result_sink import ResultSink
+
+
+def read_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_each_result_is_written_as_it_arrives(tmp_path):
+    sink = ResultSink(tmp_path / 'products.jsonl')
+    sink.write(ProductInfo(article='3', name='Товар 3', success=True), 'url3')
+
+    assert read_lines(sink.path) == [{
+        'article': '3', 'name': 'Товар 3', 'company_name': '', 'seller_id': '', 'seller_link': '',
+        'image_url': '', 'card_price': 0, 'price': 0, 'original_price': 0, 'product_url': 'url3',
+        'success': True, 'error': ''
+    }]
+
+    sink.write(ProductInfo(article='1', error='таймаут'))
+    sink.close()
+
+    assert [record['article'] for record in read_lines(sink.path)] == ['3', '1']
+    assert sink.count == 2
+
+
+def test_writes_after_close_are_ignored(tmp_path):
+    sink = ResultSink(tmp_path / 'products.jsonl')
+    sink.close()
+    sink.write(ProductInfo(article='1', success=True))
+
+    assert read_lines(sink.path) == []
+    assert sink.count == 0
@@ -0,0 +1,69 @@
+"""
+Тесты политик повторов: задержки, бюджеты по классам ошибок, классификация исключений
+"""
+import threading
+
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from src.config.settings import Settings
+from src.utils.retry_policy import BLOCK, DRIVER_CRASH, PARSE_ERROR, TIMEOUT, RetryEngine, RetryPolicy
+
+POLICIES = {
+    TIMEOUT: {'max_retries': 2, 'base_delay': 1.0, 'max_delay': 3.0},
+    BLOCK: {'max_retries': 1, 'base_delay': 10.0, 'max_delay': 10.0},
+}
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(Settings, 'RETRY_JITTER', 0.0)
+
+
+def test_delay_grows_exponentially_up_to_max():
+    policy = RetryPolicy(max_retries=5, base_delay=1.0, max_delay=3.0)
+    assert [policy.delay(n) for n in (1, 2, 3, 4)] == [1.0, 2.0, 3.0, 3.0]
+
+
+def test_jitter_keeps_delay_within_bounds(monkeypatch):
+    monkeypatch.setattr(Settings, 'RETRY_JITTER', 0.5)
+    policy = RetryPolicy(max_retries=1, base_delay=4.0, max_delay=4.0)
+    assert all(2.0 <= policy.delay(1) <= 4.0 for _ in range(100))
+
+
+def test_budget_is_counted_per_error_class():
+    engine = RetryEngine(POLICIES)
+    budget = engine.budget()
+
+    assert budget.next_delay(TIMEOUT) == 1.0
+    assert budget.next_delay(BLOCK) == 10.0
+    assert budget.next_delay(TIMEOUT) == 2.0
+    assert budget.next_delay(TIMEOUT) is None
+    assert budget.next_delay(BLOCK) is None
+
+    stats = engine.get_stats()
+    assert stats[TIMEOUT] == {'retries': 2, 'exhausted': 1, 'delay_seconds': 3.0}
+    assert stats[BLOCK]['exhausted'] == 1
+
+
+def test_unknown_class_uses_timeout_policy():
+    budget = RetryEngine(POLICIES).budget()
+    assert budget.next_delay(PARSE_ERROR) == 1.0
+
+
+def test_retry_waits_on_stop_event():
+    engine = RetryEngine({TIMEOUT: {'max_retries': 1, 'base_delay': 60.0, 'max_delay': 60.0}})
+    stop_event = threading.Event()
+    stop_event.set()
+
+    budget = engine.budget()
+    assert budget.retry(TIMEOUT, stop_event)
+    assert not budget.retry(TIMEOUT, stop_event)
+
+
+def test_classify():
+    engine = RetryEngine(POLICIES)
+    assert engine.classify(Exception("Access blocked")) == BLOCK
+    assert engine.classify(TimeoutException()) == TIMEOUT
+    assert engine.classify(WebDriverException("session deleted")) == DRIVER_CRASH
+    assert engine.classify(ValueError()) == PARSE_ERROR
@@ -0,0 +1,96 @@
+"""
+Тесты кэша продавцов: время жизни групп полей, промахи по устаревшей группе и счетчики попаданий
+"""
+import pytest
+
+from src.config.settings import Settings
+from src.parsers import seller_parser
+from src.parsers.seller_parser import OzonSellerParser, SellerInfo
+from src.utils import seller_cache as seller_cache_module
+from src.utils.seller_cache import SellerCache
+
+HOUR = 3600
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(seller_cache_module.time, 'time', clock.time)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = SellerCache(tmp_path / 'sellers.sqlite3', ttl_hours={'legal': 24, 'stats': 1})
+    yield cache
+    cache.close()
+
+
+def seller(seller_id, **kwargs):
+    return SellerInfo(seller_id=seller_id, company_name='ООО Ромашка', inn='7700000000',
+                      orders_count='100', success=True, **kwargs)
+
+
+def test_each_group_expires_after_its_own_ttl(cache, clock):
+    cache.put_many([seller('1')])
+
+    clock.now += 2 * HOUR
+
+    assert set(cache.get_many(['1'], {'legal'})) == {'1'}
+    assert cache.get_many(['1'], {'stats'}) == {}
+
+    clock.now += 23 * HOUR
+
+    assert cache.get_many(['1'], {'legal'}) == {}
+
+
+def test_seller_with_one_stale_group_is_a_miss(cache, clock):
+    cache.put_many([seller('1')])
+    clock.now += 2 * HOUR
+
+    assert cache.get_many(['1'], {'legal', 'stats'}) == {}
+    assert cache.get_many(['1']) == {}
+
+
+def test_failed_sellers_are_not_stored(cache):
+    cache.put_many([seller('1'), SellerInfo(seller_id='2', error='нет страницы')])
+
+    assert set(cache.get_many(['1', '2'])) == {'1'}
+
+
+def test_hit_and_miss_counters(cache, clock):
+    cache.put_many([seller('1'), seller('2')])
+
+    found = cache.get_many(['1', '2', '3'])
+
+    assert found['1'].company_name == 'ООО Ромашка'
+    assert cache.get_stats() == {'hits': 2, 'misses': 1, 'hit_rate': pytest.approx(200 / 3)}
+
+
+def test_empty_group_set_is_not_a_lookup(cache):
+    cache.put_many([seller('1')])
+
+    assert cache.groups_for_fields(['seller_name']) == set()
+    assert cache.get_many(['1', '2'], set()) == {}
+    assert cache.get_stats()['hits'] == 0
+    assert cache.get_stats()['misses'] == 0
+
+
+def test_parser_skips_cache_when_no_seller_page_fields_are_selected(cache, monkeypatch):
+    cache.put_many([seller('1')])
+    monkeypatch.setattr(Settings, 'SELLER_CACHE_ENABLED', True)
+    monkeypatch.setattr(seller_parser, 'get_seller_cache', lambda: cache)
+
+    done, missing = OzonSellerParser(selected_fields=['seller_name']).lookup_cached(['1'])
+    assert (done, missing) == ({}, ['1'])
+
+    done, missing = OzonSellerParser(selected_fields=['inn']).lookup_cached(['1'])
+    assert (set(done), missing) == ({'1'}, [])
@@ -0,0 +1,144 @@
+"""
+Тесты планировщика этапов и запуска только по плиткам категории
+"""
+import json
+
+import pytest
+
+import src.core.app_manager as app_manager
+from src.config.settings import Settings
+from src.core.stage_planner import StagePlan, plan_stages
+from src.parsers.link_parser import ListingTile, OzonLinkParser
+from src.parsers.product_json import DecodePlan, ProductInfo
+from src.utils.link_index import LinkIndex
+
+
+@pytest.fixture(autouse=True)
+def api_links(monkeypatch):
+    monkeypatch.setattr(Settings, 'LINK_COLLECTION_MODE', 'api')
+    monkeypatch.setattr(Settings, 'LISTING_ONLY_RUNS', True)
+
+
+def test_no_selection_runs_all_stages():
+    assert plan_stages(None) == StagePlan()
+
+
+@pytest.mark.parametrize('fields', [['product_url', 'image_url'], ['article', 'name', 'price'], ['original_price']])
+def test_listing_fields_need_no_product_api(fields):
+    plan = plan_stages(fields)
+    assert plan.listing_only and not plan.sellers
+
+
+def test_card_price_needs_product_json_only():
+    plan = plan_stages(['name', 'card_price'])
+    assert plan.products and not plan.sellers
+    assert plan.decode_plan == DecodePlan(sticky=True, price=True, seller=False)
+
+
+def test_seller_fields_need_seller_stage():
+    plan = plan_stages(['article', 'inn'])
+    assert plan.products and plan.sellers
+
+
+def test_scroll_mode_and_setting_limit_listing_only_runs(monkeypatch):
+    monkeypatch.setattr(Settings, 'LINK_COLLECTION_MODE', 'scroll')
+    assert not plan_stages(['name', 'price']).listing_only
+    assert plan_stages(['product_url', 'image_url']).listing_only
+
+    monkeypatch.setattr(Settings, 'LISTING_ONLY_RUNS', False)
+    assert not plan_stages(['product_url']).listing_only
+
+
+def test_tile_complete_allows_missing_original_price():
+    plan = plan_stages(['name', 'price', 'original_price'])
+    assert plan.tile_complete(ListingTile(name='Чайник', price=100))
+    assert not plan.tile_complete(ListingTile(name='Чайник'))
+    assert not plan.tile_complete(None)
+    assert plan_stages(['product_url']).tile_complete(None)
+
+
+def tile_item(article, name, prices):
+    return {
+        'action': {'link': f'/product/tovar-{article}/?at=1'},
+        'tileImage': {'items': [{'image': {'link': f'img{article}'}}]},
+        'mainState': [
+            {'atom': {'type': 'priceV2', 'priceV2': {'price': [
+                {'text': text, 'textStyle': style} for style, text in prices
+            ]}}},
+            {'id': 'name', 'atom': {'type': 'textAtom', 'textAtom': {'text': name}}},
+        ]
+    }
+
+
+def test_link_parser_keeps_tile_name_and_prices():
+    parser = OzonLinkParser('https://www.ozon.ru/category/x-1/')
+    page = {'widgetStates': {'tileGridDesktop-1': json.dumps({'items': [
+        tile_item('1', 'Чай &amp; кофе', [('PRICE', '1 299 ₽'), ('ORIGINAL_PRICE', '2 000 ₽')]),
+        tile_item('2', 'Кружка', [('PRICE', '500 ₽')]),
+    ]})}}
+
+    links = parser._extract_links_from_page(page)
+
+    assert list(links) == ['https://www.ozon.ru/product/tovar-1/', 'https://www.ozon.ru/product/tovar-2/']
+    assert parser.tiles['1'] == ListingTile(name='Чай & кофе', price=1299, original_price=2000)
+    assert parser.tiles['2'] == ListingTile(name='Кружка', price=500)
+
+
+@pytest.fixture
+def listing_run(monkeypatch):
+    """Ссылки трех товаров; у третьего в плитке нет названия"""
+    tiles = {'1': ListingTile('Чайник', 1000, 1500), '2': ListingTile('Кружка', 200), '3': ListingTile('', 300)}
+    links = LinkIndex({f'https://www.ozon.ru/product/tovar-{a}/': f'img{a}' for a in ('1', '2', '3')})
+    calls = []
+
+    class FakeLinkParser:
+        output_folder = 'listing_test'
+
+        def __init__(self, *args):
+            self.tiles = tiles
+
+        def start_parsing(self):
+            return True, links
+
+    class FakeProductParser:
+        def __init__(self, *args, on_result=None, selected_fields=None, **kwargs):
+            self.on_result = on_result
+            calls.append(selected_fields)
+
+        def parse_products(self, missing):
+            results = [ProductInfo(article=a, name='Из API', price=301, success=True) for a in missing.articles()]
+            for result in results:
+                self.on_result(result)
+            return results
+
+        def cleanup(self):
+            pass
+
+    monkeypatch.setattr(app_manager, 'OzonLinkParser', FakeLinkParser)
+    monkeypatch.setattr(app_manager, 'create_product_parser', FakeProductParser)
+    monkeypatch.setattr(Settings, 'STREAM_RESULTS', False)
+    return calls
+
+
+def run_listing(fields):
+    manager = app_manager.AppManager(Settings)
+    return manager._run_listing_stages('https://www.ozon.ru/category/x-1/', 10, fields, None, plan_stages(fields))
+
+
+def test_links_only_run_uses_no_product_api(listing_run):
+    _, _, products, sellers, _ = run_listing(['product_url', 'image_url'])
+
+    assert listing_run == []
+    assert sellers == []
+    assert [(p.article, p.image_url, p.success) for p in products] == [
+        ('1', 'img1', True), ('2', 'img2', True), ('3', 'img3', True)
+    ]
+
+
+def test_incomplete_tiles_are_fetched_from_product_api_in_category_order(listing_run):
+    _, _, products, _, _ = run_listing(['name', 'price'])
+
+    assert listing_run == [['name', 'price']]
+    assert [(p.article, p.name, p.price) for p in products] == [
+        ('1', 'Чайник', 1000), ('2', 'Кружка', 200), ('3', 'Из API', 301)
+    ]
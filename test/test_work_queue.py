@@ -0,0 +1,106 @@
+"""
+Тесты общей очереди воркеров: повторная выдача, передача другому воркеру, завершение
+"""
+import threading
+import time
+
+from src.utils.work_queue import WorkQueue
+
+
+def test_items_are_handed_out_in_order_and_queue_finishes():
+    queue = WorkQueue(['a', 'b'])
+    first = queue.get(1)
+    second = queue.get(1)
+    assert (first.key, second.key) == ('a', 'b')
+
+    queue.task_done(first)
+    queue.task_done(second)
+    assert queue.get(1) is None
+    assert queue.completed == 2
+    assert len(queue) == 0
+
+
+def test_requeue_stops_after_max_attempts():
+    queue = WorkQueue(['a'], max_attempts=2)
+    queue.register_worker()
+
+    item = queue.get(1)
+    assert queue.requeue(item, 1)
+    item = queue.get(1)
+    assert item.attempts == 1
+    assert not queue.requeue(item, 1)
+
+    queue.task_done(item)
+    assert queue.get(1) is None
+
+
+def test_failed_item_goes_to_another_worker_first():
+    queue = WorkQueue(['a', 'b'], handoff_timeout=60)
+    queue.register_worker()
+    queue.register_worker()
+
+    item = queue.get(1)
+    queue.requeue(item, 1)
+
+    # Воркер 1 получает следующий элемент, а не свой неудачный
+    assert queue.get(1).key == 'b'
+    assert queue.get(2).key == 'a'
+
+
+def test_own_failure_is_retaken_after_handoff_timeout():
+    queue = WorkQueue(['a'], handoff_timeout=0.05)
+    queue.register_worker()
+    queue.register_worker()
+
+    item = queue.get(1)
+    queue.requeue(item, 1)
+    time.sleep(0.1)
+    assert queue.get(1).key == 'a'
+
+
+def test_single_worker_retakes_own_failure_immediately():
+    queue = WorkQueue(['a'], handoff_timeout=60)
+    queue.register_worker()
+
+    item = queue.get(1)
+    queue.requeue(item, 1)
+    assert queue.get(1) is item
+
+
+def test_release_puts_item_first_without_counting_attempt():
+    queue = WorkQueue(['a', 'b'])
+    item = queue.get(1)
+    queue.release(item)
+
+    again = queue.get(2)
+    assert again is item
+    assert again.attempts == 0
+
+
+def test_streaming_queue_waits_for_close():
+    queue = WorkQueue()
+    got = []
+
+    def worker():
+        queue.register_worker()
+        try:
+            while True:
+                item = queue.get(1)
+                if item is None:
+                    return
+                got.append(item.key)
+                queue.task_done(item)
+        finally:
+            queue.unregister_worker()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    queue.put('a')
+    queue.put('b')
+    time.sleep(0.1)
+    assert thread.is_alive()
+
+    queue.close()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert got == ['a', 'b']